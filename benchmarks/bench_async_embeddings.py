@@ -0,0 +1,74 @@
+"""
+bench_async_embeddings.py
+
+Benchmark the blocking WatsonxEmbeddings.get_embeddings_batch path against
+aget_embeddings_batch with bounded concurrency.
+
+Both paths talk to the local mock watsonx.ai server (watsonx_agent_client/mock_server.py)
+with a fixed per-request latency, so no IBM Cloud credentials are needed. Run from the repository root:
+
+    python -m benchmarks.bench_async_embeddings --texts 2000 --batch-size 50 --latency 0.1
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import urllib.request
+
+from embeddings.watsonx_embeddings import WatsonxEmbeddings
+from watsonx_agent_client.mock_server import MockWatsonxServer
+
+class MockEndpointEmbeddings(WatsonxEmbeddings):
+    """WatsonxEmbeddings that sends its requests to the local mock server instead of watsonx.ai."""
+
+    def __init__(self, endpoint, **kwargs):
+        self.endpoint = endpoint
+        super().__init__(**kwargs)
+
+    def _initialize_client(self):
+        return None
+
+    def _embed_request(self, inputs):
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps({
+                "model_id": self.model_id,
+                "inputs": inputs,
+                "parameters": {"truncate_input_tokens": self.max_tokens},
+            }).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=60) as response:
+            return json.loads(response.read())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=2000, help="Number of texts to embed.")
+    parser.add_argument("--batch-size", type=int, default=50, help="Texts per request.")
+    parser.add_argument("--latency", type=float, default=0.1, help="Mock server latency per request, in seconds.")
+    parser.add_argument("--dimension", type=int, default=384, help="Embedding dimension returned by the mock.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16], help="Async in-flight limits to test.")
+    args = parser.parse_args()
+
+    server = MockWatsonxServer(latency=f"fixed:{args.latency}", embedding_dimension=args.dimension).start()
+    endpoint = f"{server.url}/ml/v1/text/embeddings"
+    texts = [f"Benchmark sentence number {i}." for i in range(args.texts)]
+
+    embedder = MockEndpointEmbeddings(endpoint, max_concurrency=max(args.concurrency))
+    start = time.perf_counter()
+    embedder.get_embeddings_batch(texts, batch_size=args.batch_size)
+    elapsed = time.perf_counter() - start
+    print(f"sync                 {elapsed:8.3f}s  {args.texts / elapsed:10.1f} texts/s")
+
+    for limit in args.concurrency:
+        start = time.perf_counter()
+        asyncio.run(embedder.aget_embeddings_batch(texts, batch_size=args.batch_size, max_concurrency=limit))
+        elapsed = time.perf_counter() - start
+        print(f"async concurrency={limit:<3} {elapsed:8.3f}s  {args.texts / elapsed:10.1f} texts/s")
+
+    embedder.close()
+    server.stop()
+
+if __name__ == "__main__":
+    main()
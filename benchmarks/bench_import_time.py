@@ -0,0 +1,147 @@
+"""
+bench_import_time.py
+
+Start-up cost of the entry points of the repository, measured with "python -X importtime".
+
+Every entry point is imported in a fresh interpreter, --repeat times, and the median of the
+total import time (the cumulative time of the top-level imports) is reported together with
+the heaviest modules it imports directly. Modules the interpreter itself imports at start-up
+(site, encodings, ...) are measured once with an empty program and left out. Entry points
+whose dependencies are not installed are listed with the import error instead. With --json
+the results are written to a file that a later run can be compared against with --compare,
+to catch start-up regressions:
+
+    python -m benchmarks.bench_import_time --repeat 5 --json import_times.json
+    python -m benchmarks.bench_import_time --compare import_times.json --threshold 0.2
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_ENTRY_POINTS = [
+    "watsonx_agent_client",
+    "watsonx_agent_client.client_pool",
+    "embeddings.watsonx_embeddings",
+    "check_models",
+    "examples.llm.watsonx",
+    "main",
+]
+
+def parse_import_time(stderr):
+    """
+    Parse "-X importtime" output.
+
+    :return: A (top_level, direct) tuple. top_level maps the top-level imports to their
+        cumulative import times in microseconds; direct maps each of them to a dict of the
+        modules it imports directly and their cumulative times.
+    """
+    top_level = {}
+    direct = {}
+    # Children are reported before the module importing them.
+    pending = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        # Top-level imports are indented by one space, every nesting level adds two more.
+        depth = (len(parts[2]) - len(parts[2].lstrip(" ")) - 1) // 2
+        if depth == 0:
+            top_level[parts[2].strip()] = int(parts[1])
+            direct[parts[2].strip()] = pending
+            pending = {}
+        elif depth == 1:
+            pending[parts[2].strip()] = int(parts[1])
+    return top_level, direct
+
+def startup_modules(python):
+    """Return the top-level modules an empty program imports, i.e. the interpreter start-up."""
+    process = subprocess.run([python, "-X", "importtime", "-c", "pass"], cwd=REPO_ROOT, capture_output=True, text=True)
+    return set(parse_import_time(process.stderr)[0])
+
+def measure(python, module, repeat, exclude=()):
+    """
+    Import a module in fresh interpreters.
+
+    :return: A dict with the median total in milliseconds and the direct imports of the
+        median run, or with an error message if the import failed.
+    """
+    runs = []
+    for _ in range(repeat):
+        process = subprocess.run(
+            [python, "-X", "importtime", "-c", f"import {module}"],
+            cwd=REPO_ROOT, capture_output=True, text=True,
+        )
+        if process.returncode != 0:
+            errors = [line for line in process.stderr.splitlines() if line and not line.startswith("import time:")]
+            return {"module": module, "ok": False, "error": errors[-1] if errors else f"exit code {process.returncode}"}
+        top_level, direct = parse_import_time(process.stderr)
+        total_us = sum(us for name, us in top_level.items() if name not in exclude)
+        imports = {}
+        for name in top_level:
+            if name not in exclude:
+                imports.update(direct[name])
+        runs.append((total_us, imports))
+    runs.sort(key=lambda run: run[0])
+    _, direct = runs[len(runs) // 2]
+    return {
+        "module": module,
+        "ok": True,
+        "total_ms": statistics.median(run[0] for run in runs) / 1000,
+        "imports_ms": {name: us / 1000 for name, us in sorted(direct.items(), key=lambda item: -item[1])},
+    }
+
+def report(results, top, baseline=None, threshold=0.2):
+    """Print one line per entry point, its heaviest imports, and regressions against a baseline."""
+    regressions = []
+    for result in results:
+        if not result["ok"]:
+            print(f"{result['module']:<44} {'-':>10}  failed: {result['error']}")
+            continue
+        line = f"{result['module']:<44} {result['total_ms']:8.1f} ms"
+        previous = (baseline or {}).get(result["module"])
+        if previous and previous.get("ok"):
+            change = result["total_ms"] / previous["total_ms"] - 1 if previous["total_ms"] else 0.0
+            line += f"  ({change:+.0%} vs {previous['total_ms']:.1f} ms)"
+            if change > threshold:
+                regressions.append(result["module"])
+        print(line)
+        for name, ms in list(result["imports_ms"].items())[:top]:
+            print(f"    {name:<40} {ms:8.1f} ms")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=DEFAULT_ENTRY_POINTS, help="Modules to import.")
+    parser.add_argument("--python", default=sys.executable, help="Interpreter to measure, e.g. a framework venv.")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh imports per module; the median is reported.")
+    parser.add_argument("--top", type=int, default=5, help="Heaviest direct imports to list per module.")
+    parser.add_argument("--json", default=None, help="Write the results to this file.")
+    parser.add_argument("--compare", default=None, help="Results of an earlier --json run to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Relative slowdown against --compare that counts as a regression.")
+    args = parser.parse_args()
+
+    exclude = startup_modules(args.python)
+    results = [measure(args.python, module, args.repeat, exclude) for module in args.modules]
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {result["module"]: result for result in json.load(f)["results"]}
+    regressions = report(results, args.top, baseline, args.threshold)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"python": args.python, "repeat": args.repeat, "results": results}, f, indent=2)
+    if regressions:
+        print(f"\nRegressions above {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+bench_llm_model_reuse.py
+
+Micro-benchmark of the per-call overhead of WatsonxLLM.build_model, before and after
+ChatWatsonx instances were cached.
+
+"rebuild" clears the instance cache before every call, which is what generate_text used
+to do on every prompt; "cached" reuses the instance. With --generate, full generate_text
+calls are timed as well, and the run stops at the first call that returns an error instead
+of timing the error path.
+
+ChatWatsonx only talks to IBM Cloud regions (it exchanges the API key with IBM Cloud IAM
+itself), so this benchmark needs real credentials: it uses IBM_CLOUD_URL,
+IBM_CLOUD_PROJECT_ID and IBM_CLOUD_API_KEY from the .env file, and --url overrides the
+region. Run from the repository root inside the Langflow environment:
+
+    python -m benchmarks.bench_llm_model_reuse --iterations 50 --generate 10
+"""
+
+import argparse
+import statistics
+import time
+
+from examples.llm.watsonx import WatsonxLLM
+from watsonx_agent_client.client_pool import load_credentials
+
+DEFAULT_URL = "https://us-south.ml.cloud.ibm.com"
+
+def time_calls(function, iterations, before=None):
+    """Return per-call durations in seconds, running before() untimed ahead of every call."""
+    durations = []
+    for _ in range(iterations):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+def checked_generate(llm, prompt):
+    """Call generate_text and raise if it returned an error message instead of a completion."""
+    text = llm.generate_text(prompt)
+    if text.startswith("Error generating text"):
+        raise RuntimeError(text)
+    return text
+
+def report(label, durations):
+    durations = sorted(durations)
+    p95 = durations[min(len(durations) - 1, int(0.95 * len(durations)))]
+    print(f"{label:<22} mean {statistics.mean(durations) * 1000:9.3f} ms  p50 {statistics.median(durations) * 1000:9.3f} ms  "
+          f"p95 {p95 * 1000:9.3f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50, help="build_model calls per mode.")
+    parser.add_argument("--generate", type=int, default=0, help="generate_text calls per mode (0 to skip).")
+    parser.add_argument("--url", default=None, help=f"watsonx.ai region URL; defaults to IBM_CLOUD_URL or {DEFAULT_URL}.")
+    parser.add_argument("--model", default="ibm/granite-3-8b-instruct")
+    args = parser.parse_args()
+
+    env_url, project_id, api_key = load_credentials()
+    if not project_id or not api_key:
+        parser.error("set IBM_CLOUD_PROJECT_ID and IBM_CLOUD_API_KEY in the .env file")
+
+    llm = WatsonxLLM(
+        url=args.url or env_url or DEFAULT_URL,
+        project_id=project_id,
+        api_key=api_key,
+        model_name=args.model,
+        max_tokens=20,
+        stop_sequence="",
+        temperature=0.1,
+        top_p=0.9,
+        frequency_penalty=0.5,
+        presence_penalty=0.3,
+        seed=8,
+        logprobs=True,
+        top_logprobs=3,
+        stream=False,
+    )
+    report("build_model rebuild", time_calls(llm.build_model, args.iterations, before=WatsonxLLM.clear_model_cache))
+    report("build_model cached", time_calls(llm.build_model, args.iterations))
+    if args.generate:
+        prompt = "Explain the benefits of connection reuse."
+        report("generate_text rebuild", time_calls(lambda: checked_generate(llm, prompt), args.generate,
+                                                   before=WatsonxLLM.clear_model_cache))
+        report("generate_text cached", time_calls(lambda: checked_generate(llm, prompt), args.generate))
+
+if __name__ == "__main__":
+    main()
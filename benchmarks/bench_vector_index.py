@@ -0,0 +1,70 @@
+"""
+bench_vector_index.py
+
+Measure recall against query latency for the vector indexes in embeddings/vector_index.py.
+
+The exact VectorIndex provides the ground truth. IVFIndex is then queried with a range
+of n_probe values, reporting recall@k and mean latency per query for each. The data is
+synthetic and clustered, which is closer to real embeddings than uniform noise. Run from
+the repository root:
+
+    python -m benchmarks.bench_vector_index --vectors 200000 --dim 384 --queries 200
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from embeddings.vector_index import IVFIndex, VectorIndex
+
+def make_dataset(n, dim, n_clusters, seed):
+    """Generate n vectors drawn around n_clusters random centres."""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((n_clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, n_clusters, n)
+    return centres[labels] + 0.5 * rng.standard_normal((n, dim)).astype(np.float32)
+
+def time_search(index, queries, k, **kwargs):
+    """Run one query at a time and return (ids, mean seconds per query)."""
+    ids = []
+    start = time.perf_counter()
+    for query in queries:
+        ids.append(index.search(query, k, **kwargs)[0][0])
+    return np.array(ids), (time.perf_counter() - start) / len(queries)
+
+def recall(found, truth):
+    """Fraction of the true top-k neighbours that were found, averaged over queries."""
+    hits = sum(len(np.intersect1d(f, t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=200000, help="Number of indexed vectors.")
+    parser.add_argument("--dim", type=int, default=384, help="Vector dimension.")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries.")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours per query.")
+    parser.add_argument("--n-lists", type=int, default=None, help="IVF clusters (default 4 * sqrt(n)).")
+    parser.add_argument("--n-probe", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64], help="n_probe values to test.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    data = make_dataset(args.vectors + args.queries, args.dim, n_clusters=max(10, args.vectors // 1000), seed=args.seed)
+    vectors, queries = data[:args.vectors], data[args.vectors:]
+
+    flat = VectorIndex(dim=args.dim, initial_capacity=args.vectors)
+    flat.add(vectors)
+    truth, flat_latency = time_search(flat, queries, args.k)
+    print(f"flat               recall@{args.k}=1.000  {flat_latency * 1000:8.3f} ms/query")
+
+    ivf = IVFIndex(dim=args.dim, n_lists=args.n_lists, initial_capacity=args.vectors)
+    ivf.add(vectors)
+    start = time.perf_counter()
+    ivf.train()
+    print(f"ivf trained with {ivf.n_lists} lists in {time.perf_counter() - start:.2f}s")
+    for n_probe in args.n_probe:
+        found, latency = time_search(ivf, queries, args.k, n_probe=n_probe)
+        print(f"ivf n_probe={n_probe:<5} recall@{args.k}={recall(found, truth):.3f}  {latency * 1000:8.3f} ms/query")
+
+if __name__ == "__main__":
+    main()
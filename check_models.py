@@ -4,41 +4,73 @@ check_models.py
 This script checks the integration and functionality of the Watsonx models.
 It tests both the text generation and embeddings endpoints using the IBM Watsonx AI SDK.
 Ensure your .env file is properly configured with your IBM Cloud credentials.
+
+With --benchmark it instead sweeps the models of the catalog (models.json, or the spec
+endpoint with --source specs) across prompt lengths, output lengths and concurrency levels,
+and reports latency percentiles, time to first token, tokens per second and embedding
+vectors per second (see watsonx_agent_client/model_benchmark.py):
+
+    python check_models.py --benchmark --mock --provider ibm --json results.json
+    python check_models.py --benchmark --mock --provider ibm --compare results.json
 """
 
+import argparse
+import json
 import os
-from dotenv import load_dotenv
-from ibm_watsonx_ai import APIClient, Credentials
+import sys
+import time
+
 from embeddings.watsonx_embeddings import WatsonxEmbeddings
+from watsonx_agent_client.client_pool import ClientPool, get_client, load_credentials
+from watsonx_agent_client.model_catalog import get_catalog, get_model_router
+from watsonx_agent_client.response_cache import ResponseCache
+from watsonx_agent_client.scheduler import get_scheduler
 
-def initialize_client():
-    """Initialize the IBM Watsonx API client using credentials from the .env file."""
-    load_dotenv()  # Load credentials from .env file
-    api_key = os.getenv("IBM_CLOUD_API_KEY")
-    url = os.getenv("IBM_CLOUD_URL")
-    project_id = os.getenv("IBM_CLOUD_PROJECT_ID")
+# Set WATSONX_RESPONSE_CACHE to reuse deterministic generations across runs.
+response_cache = ResponseCache.from_env()
 
-    credentials = Credentials(url=url, token=api_key)
-    client = APIClient(credentials, project_id=project_id)
-    return client
+def initialize_client():
+    """Get the shared IBM Watsonx API client for the credentials from the .env file."""
+    return get_client()
 
 def check_text_generation():
     """Test the text generation model using a sample prompt."""
     print("Checking text generation model...")
     client = initialize_client()
-    model_id = "ibm/granite-13b-instruct-v2"  # Example model ID
     prompt = "Write a brief introduction about IBM Watsonx."
     parameters = {
         "decoding_method": "greedy",
         "max_new_tokens": 100
     }
+    # Set WATSONX_MODEL_ID to check a specific model; otherwise the model catalog picks one.
+    router = get_model_router()
+    model_id = os.getenv("WATSONX_MODEL_ID") or router.choose(
+        "text_generation", output_tokens=parameters["max_new_tokens"], preferred=["ibm/granite-13b-instruct-v2"]
+    )
+    print("Model:", model_id)
     
+    def generate():
+        # The project's scheduler rate-limits the call and retries it when throttled.
+        start = time.perf_counter()
+        try:
+            result = get_scheduler(load_credentials()[1]).call(
+                lambda: client.foundation_models.model(
+                    model=model_id, 
+                    inputs=[prompt], 
+                    parameters=parameters
+                ).result()
+            )
+        except Exception:
+            router.record(model_id, time.perf_counter() - start, ok=False)
+            raise
+        router.record(model_id, time.perf_counter() - start)
+        return result
+
     try:
-        result = client.foundation_models.model(
-            model=model_id, 
-            inputs=[prompt], 
-            parameters=parameters
-        ).result()
+        if response_cache is not None:
+            result = response_cache.cached_call(model_id, parameters, prompt, generate)
+        else:
+            result = generate()
         print("Text Generation Result:")
         print(result)
     except Exception as e:
@@ -56,8 +88,112 @@ def check_embeddings_generation():
     except Exception as e:
         print("Error during embeddings generation:", e)
 
+def select_models(args, url, function):
+    """Return the model ids to benchmark for a function ("text_generation" or "embedding")."""
+    catalog = get_catalog()
+    region = None
+    if args.source == "specs":
+        catalog.refresh(url)
+        region = url
+    models = [entry.model_id for entry in catalog.find(function, provider=args.provider, region=region)]
+    if args.models:
+        models = [model_id for model_id in models if model_id in args.models]
+    return models[:args.limit] if args.limit else models
+
+def run_benchmark(args):
+    """Sweep the selected models and print, save and compare the results."""
+    from watsonx_agent_client import model_benchmark
+
+    mock = None
+    if args.mock:
+        from watsonx_agent_client.mock_server import MockWatsonxServer
+
+        mock = MockWatsonxServer(latency=args.mock_latency, tokens_per_second=args.mock_tokens_per_second).start()
+        url, project_id, api_key = mock.url, "mock-project", "mock-key"
+        pool = ClientPool(iam_url=f"{mock.url}/identity/token")
+    else:
+        url, project_id, api_key = load_credentials()
+        url = args.url or url
+        pool = ClientPool()
+    client = model_benchmark.BenchmarkClient(url, project_id, lambda: pool.get_token(url, project_id, api_key))
+    # Exchange the API key up front so the first combination does not pay for it.
+    pool.get_token(url, project_id, api_key)
+    router = get_model_router()
+
+    def record(model_id, sample):
+        router.record(model_id, sample["latency"], sample["output_tokens"], sample["time_to_first_token"])
+
+    def record_failure(model_id, error, seconds):
+        router.record(model_id, seconds, ok=False)
+
+    results = []
+    try:
+        for model_id in select_models(args, url, "text_generation"):
+            for prompt_tokens in args.prompt_tokens:
+                for output_tokens in args.output_tokens:
+                    for concurrency in args.concurrency:
+                        result = model_benchmark.benchmark_generation(
+                            client, model_id, prompt_tokens, output_tokens, concurrency, args.requests,
+                            on_sample=record, on_error=record_failure,
+                        )
+                        results.append(result)
+                        print(model_benchmark.format_result(result))
+        if args.embedding_batch_sizes:
+            for model_id in select_models(args, url, "embedding"):
+                for batch_size in args.embedding_batch_sizes:
+                    for concurrency in args.concurrency:
+                        result = model_benchmark.benchmark_embeddings(client, model_id, batch_size, concurrency, args.requests)
+                        results.append(result)
+                        print(model_benchmark.format_result(result))
+    finally:
+        if mock is not None:
+            mock.stop()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"url": url, "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results}, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        changes, regressions = model_benchmark.compare_results(results, baseline, args.threshold)
+        print(f"\nCompared {len(changes)} metrics with {args.compare}; {len(regressions)} regressed (threshold {args.threshold:.0%}):")
+        for result, metric, old, new, change in regressions:
+            detail = f"{old:.4g} -> {new:.4g} ({change:+.0%})" if new is not None else f"{old:.4g} -> not measured"
+            print(f"  {' '.join(map(str, model_benchmark.result_key(result)))}: {metric} {detail}")
+        if regressions:
+            sys.exit(1)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--benchmark", action="store_true", help="Run the performance sweep instead of the checks.")
+    parser.add_argument("--mock", action="store_true", help="Benchmark against an in-process mock server.")
+    parser.add_argument("--mock-latency", default="lognormal:0.2:0.3", help="Latency spec of the mock server.")
+    parser.add_argument("--mock-tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--url", default=None, help="watsonx.ai base URL; defaults to IBM_CLOUD_URL.")
+    parser.add_argument("--source", choices=["models.json", "specs"], default="models.json",
+                        help="Take the models from models.json or from the spec endpoint of --url.")
+    parser.add_argument("--models", nargs="+", default=None, help="Only benchmark these model ids.")
+    parser.add_argument("--provider", default=None, help="Only benchmark models of this provider, e.g. ibm.")
+    parser.add_argument("--limit", type=int, default=None, help="Benchmark at most this many models per kind.")
+    parser.add_argument("--prompt-tokens", type=int, nargs="+", default=[128], help="Prompt lengths to test.")
+    parser.add_argument("--output-tokens", type=int, nargs="+", default=[64], help="Output lengths to test.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4], help="Requests in flight to test.")
+    parser.add_argument("--requests", type=int, default=8, help="Requests per combination (at least the concurrency).")
+    parser.add_argument("--embedding-batch-sizes", type=int, nargs="*", default=[1, 32],
+                        help="Embedding batch sizes to test; pass no value to skip the embedding models.")
+    parser.add_argument("--json", default=None, help="Write the results to this file.")
+    parser.add_argument("--compare", default=None, help="Results of an earlier --json run to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative change that counts as a regression.")
+    return parser.parse_args()
+
 if __name__ == "__main__":
+    args = parse_args()
+    if args.benchmark:
+        run_benchmark(args)
+        sys.exit(0)
     print("Starting model checks...\n")
     check_text_generation()
     print("\n")
     check_embeddings_generation()
+    if response_cache is not None:
+        print("\nResponse cache:", response_cache.stats())
@@ -0,0 +1,129 @@
+"""
+chunker.py
+
+This module splits documents into overlapping, token-bounded chunks and feeds them to
+WatsonxEmbeddings in batches. Every stage is a generator: documents are read one at a
+time, chunks are produced lazily and only one batch of chunks is embedded at once, so a
+corpus of any size can be streamed through without holding it in memory.
+
+Each chunk carries the character offsets of its text in the source document, so the
+vectors coming out of embed_chunks can be mapped back to the exact passage they encode.
+"""
+
+import re
+from itertools import islice
+
+import numpy as np
+
+from embeddings.watsonx_embeddings import l2_normalize
+
+# Runs of Latin letters and digits, single characters of other scripts, or single
+# punctuation characters.
+_TOKEN_PATTERN = re.compile(r"[0-9A-Za-z_\u00C0-\u024F]+|\w|[^\w\s]")
+
+def approximate_tokenizer(text, max_piece=3):
+    """
+    Approximate a sub-word tokenizer without downloading a model vocabulary.
+
+    The count is an upper bound rather than an estimate, so chunks stay under the model
+    limit: Latin words count one token per max_piece characters (BPE tokenizers average
+    about four), and every character of other scripts, e.g. CJK, counts as one token.
+    Pass the model's own tokenizer to iter_chunks for exact counts.
+
+    :param text: The text to tokenize.
+    :param max_piece: Most characters of a Latin word counted as one token.
+    :return: An iterator of (start, end) character spans, one per token.
+    """
+    for match in _TOKEN_PATTERN.finditer(text):
+        start, end = match.span()
+        for piece in range(start, end, max_piece):
+            yield piece, min(piece + max_piece, end)
+
+def _iter_documents(documents):
+    """Accept plain strings or (doc_id, text) pairs and yield (doc_id, text)."""
+    for position, document in enumerate(documents):
+        if isinstance(document, str):
+            yield position, document
+        else:
+            yield document
+
+def iter_chunks(documents, max_tokens=512, overlap=64, tokenizer=approximate_tokenizer):
+    """
+    Split documents into overlapping chunks of at most max_tokens tokens.
+
+    :param documents: An iterable of texts or (doc_id, text) pairs. Plain texts get their position as doc_id.
+    :param max_tokens: Maximum number of tokens per chunk, e.g. WatsonxEmbeddings.max_tokens.
+    :param overlap: Number of tokens shared by consecutive chunks of a document.
+    :param tokenizer: Callable returning (start, end) character spans of the tokens of a text.
+    :return: A generator of chunk dicts with the keys "doc_id", "chunk_index", "start",
+        "end" (character offsets in the document), "tokens" and "text".
+    """
+    if not 0 <= overlap < max_tokens:
+        raise ValueError(f"overlap must be between 0 and max_tokens - 1, got {overlap}")
+    step = max_tokens - overlap
+    for doc_id, text in _iter_documents(documents):
+        spans = list(tokenizer(text))
+        chunk_index = 0
+        for first in range(0, len(spans), step):
+            last = min(first + max_tokens, len(spans)) - 1
+            start, end = spans[first][0], spans[last][1]
+            yield {
+                "doc_id": doc_id,
+                "chunk_index": chunk_index,
+                "start": start,
+                "end": end,
+                "tokens": last - first + 1,
+                "text": text[start:end],
+            }
+            chunk_index += 1
+            if last == len(spans) - 1:
+                break
+
+def embed_chunks(embedder, chunks, batch_size=100, normalize=False):
+    """
+    Embed a stream of chunks in batches.
+
+    A failure only affects the chunks it concerns: like get_embeddings_batch, every chunk
+    gets an "error" key (None on success) and the stream carries on with the next batch.
+
+    :param embedder: A WatsonxEmbeddings instance.
+    :param chunks: An iterable of chunk dicts, e.g. from iter_chunks.
+    :param batch_size: Number of chunks embedded per request.
+    :param normalize: L2-normalise the vectors.
+    :return: A generator of (chunks, matrix) pairs, where row i of the float32 matrix is the
+        embedding of chunks[i] (NaN if that chunk failed to embed). matrix is None if no
+        chunk of the batch could be embedded.
+    """
+    chunks = iter(chunks)
+    while True:
+        batch = list(islice(chunks, batch_size))
+        if not batch:
+            return
+        results = embedder.get_embeddings_batch([chunk["text"] for chunk in batch], batch_size=batch_size)
+        matrix = None
+        for row, (chunk, item) in enumerate(zip(batch, results)):
+            chunk["error"] = item["error"]
+            vector = item["embedding"]
+            if vector is None:
+                continue
+            if matrix is None:
+                matrix = np.full((len(batch), len(vector)), np.nan, dtype=np.float32)
+            matrix[row] = vector
+        if matrix is not None and normalize:
+            l2_normalize(matrix)
+        yield batch, matrix
+
+def embed_documents(embedder, documents, overlap=64, batch_size=100, normalize=False, tokenizer=approximate_tokenizer):
+    """
+    Chunk documents to fit the embedder's max_tokens and embed them, streaming.
+
+    :param embedder: A WatsonxEmbeddings instance; its max_tokens bounds the chunk size.
+    :param documents: An iterable of texts or (doc_id, text) pairs.
+    :param overlap: Number of tokens shared by consecutive chunks of a document.
+    :param batch_size: Number of chunks embedded per request.
+    :param normalize: L2-normalise the vectors.
+    :param tokenizer: Callable returning (start, end) character spans of the tokens of a text.
+    :return: A generator of (chunks, matrix) pairs, as produced by embed_chunks.
+    """
+    chunks = iter_chunks(documents, max_tokens=embedder.max_tokens, overlap=overlap, tokenizer=tokenizer)
+    return embed_chunks(embedder, chunks, batch_size=batch_size, normalize=normalize)
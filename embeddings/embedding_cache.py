@@ -0,0 +1,196 @@
+"""
+embedding_cache.py
+
+This module provides a persistent, content-addressed cache for embedding vectors.
+Entries are keyed by (model_id, max_tokens, SHA-256 of the text) and stored as packed
+float32 blobs in a SQLite database, so a warm cache file can be shared by several
+worker processes. The cache is bounded in size and evicts least recently used entries.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+
+from watsonx_agent_client import metrics
+
+class EmbeddingCache:
+    # Puts after which the stored size is recounted, to notice writes of other processes.
+    recount_interval = 1000
+
+    def __init__(self, path=".cache/embeddings.sqlite", max_bytes=512 * 1024 * 1024, touch_interval=60.0):
+        """
+        Open (or create) the embedding cache.
+
+        :param path: Location of the SQLite cache file. Processes that use the same path share entries.
+        :param max_bytes: Upper bound for the total size of the stored vectors. Least recently
+            used entries are evicted once it is exceeded.
+        :param touch_interval: Seconds within which a read does not refresh the last access time
+            of an entry again. Recency is only needed for eviction, so it can be coarse, and
+            reads of hot entries then do not write to the database.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.touch_interval = touch_interval
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Running estimate of the stored bytes; None until it is first counted.
+        self._total = None
+        self._puts = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # One connection per cache object; SQLite's file locking serialises writers across processes.
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key BLOB PRIMARY KEY,"
+            " vector BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings (last_access)")
+
+    @staticmethod
+    def make_key(model_id, max_tokens, text):
+        """
+        Build the content address for a text embedded with a given model configuration.
+
+        :return: A 32-byte SHA-256 digest.
+        """
+        digest = hashlib.sha256()
+        digest.update(f"{model_id}\x00{max_tokens}\x00".encode("utf-8"))
+        digest.update(text.encode("utf-8"))
+        return digest.digest()
+
+    def get_many(self, keys):
+        """
+        Look up several keys at once.
+
+        :param keys: Keys built with make_key.
+        :return: A list aligned with keys holding the cached vector (list of floats) or None.
+        """
+        if not keys:
+            return []
+        found = {}
+        stale = []
+        now = time.time()
+        with self._lock:
+            # SQLite limits the number of bound parameters, so look keys up in chunks.
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for key, blob, last_access in self._conn.execute(
+                    f"SELECT key, vector, last_access FROM embeddings WHERE key IN ({placeholders})", chunk
+                ):
+                    found[key] = blob
+                    if last_access < now - self.touch_interval:
+                        stale.append((now, key))
+            if stale:
+                self._conn.executemany("UPDATE embeddings SET last_access = ? WHERE key = ?", stale)
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        vectors = [array("f", found[key]).tolist() if key in found else None for key in keys]
+        metrics.record_cache("embeddings", "hit", len(found))
+        metrics.record_cache("embeddings", "miss", len(keys) - len(found))
+        return vectors
+
+    def get(self, key):
+        """Return the cached vector for key, or None on a miss."""
+        return self.get_many([key])[0]
+
+    def put_many(self, items):
+        """
+        Store several (key, vector) pairs and evict old entries if the cache grew too large.
+
+        :param items: Iterable of (key, vector) pairs; vectors are stored as float32.
+        """
+        now = time.time()
+        rows = []
+        for key, vector in items:
+            blob = array("f", vector).tobytes()
+            rows.append((key, blob, len(blob), now))
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, size, last_access) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            # Replaced keys are counted twice; the estimate only errs high, and _evict counts
+            # exactly before deleting anything.
+            self._puts += 1
+            if self._total is None or self._puts >= self.recount_interval:
+                self._total = self._stored_bytes()
+                self._puts = 0
+            else:
+                self._total += sum(row[2] for row in rows)
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def put(self, key, vector):
+        """Store a single vector."""
+        self.put_many([(key, vector)])
+
+    def _stored_bytes(self):
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+
+    def _evict(self):
+        """
+        Delete least recently used entries until the stored vectors take at most 90% of
+        max_bytes, so the next puts do not have to evict again straight away.
+        """
+        total = self._total = self._stored_bytes()
+        if total <= self.max_bytes:
+            return
+        excess = total - int(self.max_bytes * 0.9)
+        freed = 0
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM embeddings ORDER BY last_access"):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany("DELETE FROM embeddings WHERE key = ?", victims)
+        self.evictions += len(victims)
+        self._total -= freed
+
+    def stats(self):
+        """
+        Report cache counters.
+
+        :return: A dict with hits, misses, hit_rate, evictions, entries and bytes.
+        """
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM embeddings"
+            ).fetchone()
+            hits, misses, evictions = self.hits, self.misses, self.evictions
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "evictions": evictions,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def clear(self):
+        """Remove every entry and reset the counters."""
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self.hits = self.misses = self.evictions = 0
+            self._total, self._puts = 0, 0
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
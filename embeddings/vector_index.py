@@ -0,0 +1,350 @@
+"""
+vector_index.py
+
+This module provides in-process vector indexes for embeddings produced by WatsonxEmbeddings.
+
+- VectorIndex stores unit-normalised float32 vectors and answers cosine top-k queries
+  with a vectorised brute-force scan. It is exact and the right choice for small sets.
+- IVFIndex adds an inverted-file coarse quantizer (spherical k-means). Queries only scan
+  the n_probe closest clusters, which keeps latency low for millions of vectors at the
+  cost of a small loss in recall.
+
+Both indexes support incremental adds and can be saved to a directory of .npy files and
+loaded back memory-mapped, so large indexes open instantly and share pages between processes.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from embeddings.watsonx_embeddings import l2_normalize
+
+class VectorIndex:
+    kind = "flat"
+
+    def __init__(self, dim=None, initial_capacity=1024):
+        """
+        Create an empty index.
+
+        :param dim: Vector dimension. If None, it is taken from the first add.
+        :param initial_capacity: Number of rows to allocate up front; storage doubles when full.
+        """
+        self.dim = dim
+        self._capacity = initial_capacity
+        self._size = 0
+        self._vectors = None
+        self._ids = None
+        self._next_id = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def vectors(self):
+        """The stored unit-normalised vectors, shape (len(self), dim)."""
+        if self._vectors is None:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        return self._vectors[:self._size]
+
+    @property
+    def ids(self):
+        """The ids of the stored vectors, aligned with vectors."""
+        if self._ids is None:
+            return np.empty(0, dtype=np.int64)
+        return self._ids[:self._size]
+
+    def _reserve(self, extra):
+        """Make room for extra more rows, growing storage geometrically."""
+        needed = self._size + extra
+        if self._vectors is not None and needed <= len(self._vectors):
+            return
+        capacity = max(self._capacity, needed, 2 * (len(self._vectors) if self._vectors is not None else 0))
+        vectors = np.empty((capacity, self.dim), dtype=np.float32)
+        ids = np.empty(capacity, dtype=np.int64)
+        if self._vectors is not None:
+            vectors[:self._size] = self._vectors[:self._size]
+            ids[:self._size] = self._ids[:self._size]
+        self._vectors, self._ids = vectors, ids
+
+    def add(self, vectors, ids=None):
+        """
+        Add vectors to the index. Vectors are copied and normalised to unit length.
+
+        :param vectors: Array-like of shape (n, dim) or (dim,).
+        :param ids: Optional integer ids, one per vector. Defaults to consecutive integers.
+        :return: The ids assigned to the added vectors.
+        """
+        vectors = np.array(vectors, dtype=np.float32, ndmin=2)
+        if vectors.size == 0:
+            # [] becomes a (1, 0) array; it must not fix the dimension of the index.
+            return np.empty(0, dtype=np.int64)
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of dimension {self.dim}, got {vectors.shape[1]}")
+        if ids is None:
+            ids = np.arange(self._next_id, self._next_id + len(vectors), dtype=np.int64)
+        else:
+            ids = np.asarray(ids, dtype=np.int64)
+            if ids.shape != (len(vectors),):
+                raise ValueError("ids must contain exactly one id per vector")
+        if len(ids):
+            self._next_id = max(self._next_id, int(ids.max()) + 1)
+
+        self._reserve(len(vectors))
+        start, end = self._size, self._size + len(vectors)
+        self._vectors[start:end] = vectors
+        l2_normalize(self._vectors[start:end])
+        self._ids[start:end] = ids
+        self._size = end
+        self._on_add(start, end)
+        return ids
+
+    def _on_add(self, start, end):
+        """Hook for subclasses to index rows start:end after they were stored."""
+
+    def add_texts(self, embedder, texts, batch_size=100, ids=None):
+        """
+        Embed texts with a WatsonxEmbeddings instance and add the vectors.
+
+        Texts that fail to embed are skipped.
+
+        :param embedder: A WatsonxEmbeddings instance.
+        :param texts: The texts to embed and index.
+        :param batch_size: Maximum number of texts sent in one embeddings request.
+        :param ids: Optional integer ids, one per text.
+        :return: The ids of the texts that were added.
+        """
+        matrix = embedder.get_embeddings_matrix(texts, batch_size=batch_size)
+        if ids is None:
+            ids = np.arange(self._next_id, self._next_id + len(matrix), dtype=np.int64)
+        ok = ~np.isnan(matrix).any(axis=1)
+        return self.add(matrix[ok], np.asarray(ids, dtype=np.int64)[ok])
+
+    @staticmethod
+    def _prepare_queries(queries):
+        queries = np.array(queries, dtype=np.float32, ndmin=2)
+        return l2_normalize(queries)
+
+    @staticmethod
+    def _top_k(scores, k):
+        """Return the column indices of the k best scores of every row, best first."""
+        k = min(k, scores.shape[1])
+        if k == 0:
+            return np.empty((scores.shape[0], 0), dtype=np.int64)
+        if k < scores.shape[1]:
+            part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            part = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1, kind="stable")
+        return np.take_along_axis(part, order, axis=1)
+
+    def search(self, queries, k=10):
+        """
+        Find the k most cosine-similar stored vectors for each query, exactly.
+
+        :param queries: A query vector of shape (dim,) or a batch of shape (q, dim).
+        :param k: Number of neighbours to return.
+        :return: An (ids, scores) tuple of arrays of shape (q, min(k, len(self))), best first.
+        """
+        queries = self._prepare_queries(queries)
+        scores = queries @ self.vectors.T
+        top = self._top_k(scores, k)
+        return self.ids[top], np.take_along_axis(scores, top, axis=1)
+
+    def search_text(self, embedder, text, k=10):
+        """
+        Embed a query text and search for its nearest neighbours.
+
+        :return: An (ids, scores) tuple of 1-D arrays, best first.
+        """
+        query = embedder.get_embeddings_matrix([text])
+        if np.isnan(query).any():
+            raise RuntimeError("Error generating embeddings for the query text.")
+        ids, scores = self.search(query, k)
+        return ids[0], scores[0]
+
+    def _meta(self):
+        return {"kind": self.kind, "dim": self.dim, "size": self._size, "next_id": self._next_id}
+
+    def save(self, directory):
+        """
+        Write the index to a directory of .npy files that load() can memory-map.
+
+        :param directory: Target directory; created if missing.
+        """
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, "vectors.npy"), self.vectors)
+        np.save(os.path.join(directory, "ids.npy"), self.ids)
+        with open(os.path.join(directory, "index.json"), "w", encoding="utf-8") as f:
+            json.dump(self._meta(), f)
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """
+        Load an index written by save().
+
+        With mmap=True the vectors stay on disk and are paged in on demand. The first
+        add() after loading copies them into memory.
+
+        :param directory: Directory written by save().
+        :param mmap: Memory-map the arrays instead of reading them into memory.
+        :return: A VectorIndex or IVFIndex, depending on what was saved.
+        """
+        with open(os.path.join(directory, "index.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        index_cls = IVFIndex if meta["kind"] == IVFIndex.kind else VectorIndex
+        if not issubclass(index_cls, cls):
+            raise TypeError(f"{directory} holds a {meta['kind']} index, not {cls.kind}")
+        mmap_mode = "r" if mmap else None
+        index = index_cls.__new__(index_cls)
+        VectorIndex.__init__(index, dim=meta["dim"])
+        index._vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode=mmap_mode)
+        index._ids = np.load(os.path.join(directory, "ids.npy"), mmap_mode=mmap_mode)
+        index._size = meta["size"]
+        index._next_id = meta["next_id"]
+        index._load_extra(directory, meta, mmap_mode)
+        return index
+
+    def _load_extra(self, directory, meta, mmap_mode):
+        """Hook for subclasses to restore their own state in load()."""
+
+class IVFIndex(VectorIndex):
+    kind = "ivf"
+
+    def __init__(self, dim=None, n_lists=None, n_probe=8, initial_capacity=1024):
+        """
+        Create an empty approximate index.
+
+        Vectors can be added before train(); until then searches fall back to the exact scan.
+
+        :param dim: Vector dimension. If None, it is taken from the first add.
+        :param n_lists: Number of clusters. Defaults to 4 * sqrt(n) at training time.
+        :param n_probe: Number of closest clusters scanned per query. Higher is slower but more accurate.
+        :param initial_capacity: Number of rows to allocate up front.
+        """
+        super().__init__(dim=dim, initial_capacity=initial_capacity)
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.centroids = None
+        self._assignments = None
+        self._order = None
+        self._offsets = None
+
+    @property
+    def is_trained(self):
+        return self.centroids is not None
+
+    def train(self, n_iter=10, sample_size=None, seed=0):
+        """
+        Fit the coarse quantizer on the stored vectors with spherical k-means and assign every vector.
+
+        :param n_iter: Number of k-means iterations.
+        :param sample_size: Number of vectors used for fitting. Defaults to 64 per cluster.
+        :param seed: Seed for sampling and centroid initialisation.
+        """
+        if self._size == 0:
+            raise ValueError("Add vectors before training the index.")
+        rng = np.random.default_rng(seed)
+        n_lists = self.n_lists or max(1, int(4 * np.sqrt(self._size)))
+        n_lists = min(n_lists, self._size)
+        sample_size = min(self._size, sample_size or 64 * n_lists)
+        sample = self.vectors[np.sort(rng.choice(self._size, sample_size, replace=False))]
+
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(n_iter):
+            assignments = self._assign(sample, centroids)
+            counts = np.bincount(assignments, minlength=n_lists)
+            order = np.argsort(assignments, kind="stable")
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            empty = counts == 0
+            sums = np.zeros_like(centroids)
+            sums[~empty] = np.add.reduceat(sample[order], starts[~empty], axis=0)
+            # Re-seed empty clusters with random sample points so every list stays in use.
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            centroids = l2_normalize(sums)
+
+        self.n_lists = n_lists
+        self.centroids = centroids
+        self._assignments = np.empty(len(self._vectors), dtype=np.int32)
+        self._on_add(0, self._size)
+
+    @staticmethod
+    def _assign(vectors, centroids, chunk=4096):
+        """Return the index of the most similar centroid for every vector, in bounded-memory chunks."""
+        assignments = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), chunk):
+            assignments[start:start + chunk] = np.argmax(vectors[start:start + chunk] @ centroids.T, axis=1)
+        return assignments
+
+    def _on_add(self, start, end):
+        if not self.is_trained:
+            return
+        if self._assignments is None or len(self._assignments) < len(self._vectors):
+            assignments = np.empty(len(self._vectors), dtype=np.int32)
+            if self._assignments is not None:
+                assignments[:start] = self._assignments[:start]
+            self._assignments = assignments
+        self._assignments[start:end] = self._assign(self._vectors[start:end], self.centroids)
+        self._order = None
+
+    def _inverted_lists(self):
+        """Return (order, offsets): row numbers grouped by cluster, and where each cluster starts."""
+        if self._order is None:
+            assignments = self._assignments[:self._size]
+            self._order = np.argsort(assignments, kind="stable")
+            self._offsets = np.concatenate(([0], np.cumsum(np.bincount(assignments, minlength=self.n_lists))))
+        return self._order, self._offsets
+
+    def search(self, queries, k=10, n_probe=None):
+        """
+        Find approximately the k most cosine-similar vectors for each query.
+
+        :param queries: A query vector of shape (dim,) or a batch of shape (q, dim).
+        :param k: Number of neighbours to return.
+        :param n_probe: Clusters scanned per query; defaults to the index's n_probe.
+        :return: An (ids, scores) tuple of arrays of shape (q, k), best first. Rows are padded
+            with id -1 and score -inf when the probed clusters hold fewer than k vectors.
+        """
+        if not self.is_trained:
+            return super().search(queries, k)
+        queries = self._prepare_queries(queries)
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        order, offsets = self._inverted_lists()
+        probes = self._top_k(queries @ self.centroids.T, n_probe)
+
+        k = min(k, self._size)
+        result_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        result_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for q, lists in enumerate(probes):
+            rows = np.concatenate([order[offsets[c]:offsets[c + 1]] for c in lists])
+            if len(rows) == 0:
+                continue
+            scores = self._vectors[rows] @ queries[q]
+            top = self._top_k(scores[np.newaxis, :], k)[0]
+            result_ids[q, :len(top)] = self._ids[rows[top]]
+            result_scores[q, :len(top)] = scores[top]
+        return result_ids, result_scores
+
+    def _meta(self):
+        meta = super()._meta()
+        meta.update({"n_lists": self.n_lists, "n_probe": self.n_probe, "trained": self.is_trained})
+        return meta
+
+    def save(self, directory):
+        super().save(directory)
+        if self.is_trained:
+            np.save(os.path.join(directory, "centroids.npy"), self.centroids)
+            np.save(os.path.join(directory, "assignments.npy"), self._assignments[:self._size])
+
+    def _load_extra(self, directory, meta, mmap_mode):
+        self.n_lists = meta["n_lists"]
+        self.n_probe = meta["n_probe"]
+        self.centroids = None
+        self._assignments = None
+        self._order = None
+        self._offsets = None
+        if meta["trained"]:
+            self.centroids = np.load(os.path.join(directory, "centroids.npy"))
+            self._assignments = np.load(os.path.join(directory, "assignments.npy"), mmap_mode=mmap_mode)
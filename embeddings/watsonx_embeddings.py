@@ -6,62 +6,367 @@ It leverages the official IBM Watsonx AI SDK to call the embeddings endpoint.
 Ensure that you have configured your .env file with your IBM Cloud credentials.
 """
 
-import os
-from dotenv import load_dotenv
-from ibm_watsonx_ai import APIClient, Credentials
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from watsonx_agent_client import metrics
+from watsonx_agent_client.client_pool import get_client, load_credentials
+from watsonx_agent_client.scheduler import BATCH, get_scheduler, is_transient
+
+# Largest number of inputs the watsonx.ai embeddings endpoint accepts in one request.
+MAX_BATCH_SIZE = 1000
+
+def l2_normalize(matrix):
+    """
+    Scale every row of a float matrix to unit L2 norm, in place.
+
+    Rows with a zero norm are left unchanged and NaN rows stay NaN.
+
+    :param matrix: A 2-D float ndarray.
+    :return: The same matrix, for chaining.
+    """
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
 
 class WatsonxEmbeddings:
-    def __init__(self, model_id="ibm/watsonx-embedding-model", max_tokens=512):
+    def __init__(self, model_id="ibm/watsonx-embedding-model", max_tokens=512, cache=None, max_concurrency=4,
+                 scheduler=None, priority=BATCH, url=None, project_id=None, api_key=None):
         """
         Initialize the WatsonxEmbeddings instance.
 
         :param model_id: The ID of the Watsonx embeddings model.
         :param max_tokens: Maximum tokens to use for embedding generation.
+        :param cache: Optional EmbeddingCache. Texts found in it are never sent to the API.
+        :param max_concurrency: Maximum number of requests the async methods keep in flight.
+        :param scheduler: Scheduler that rate-limits and retries the requests; defaults to the
+            shared scheduler of the project.
+        :param priority: Scheduler lane of the requests, scheduler.BATCH or scheduler.INTERACTIVE.
+        :param url: The watsonx.ai service URL; defaults to IBM_CLOUD_URL.
+        :param project_id: The watsonx.ai project ID; defaults to IBM_CLOUD_PROJECT_ID.
+        :param api_key: The IBM Cloud API key; defaults to IBM_CLOUD_API_KEY.
         """
-        load_dotenv()
-        self.api_key = os.getenv("IBM_CLOUD_API_KEY")
-        self.url = os.getenv("IBM_CLOUD_URL")
-        self.project_id = os.getenv("IBM_CLOUD_PROJECT_ID")
+        env_url, env_project_id, env_api_key = load_credentials()
+        self.url = url or env_url
+        self.project_id = project_id or env_project_id
+        self.api_key = api_key or env_api_key
         self.model_id = model_id
         self.max_tokens = max_tokens
+        self.cache = cache
+        self.max_concurrency = max_concurrency
+        self.scheduler = scheduler or get_scheduler(self.project_id)
+        self.priority = priority
+        self._executor = None
         self.client = self._initialize_client()
     
     def _initialize_client(self):
         """
-        Initialize the IBM Watsonx API client using credentials from environment variables.
+        Get the shared IBM Watsonx API client for the credentials of this embedder.
+        Embedders with the same credentials reuse one authenticated client.
         """
-        credentials = Credentials(url=self.url, token=self.api_key)
-        client = APIClient(credentials, project_id=self.project_id)
-        return client
-    
-    def get_embeddings(self, text):
+        return get_client(url=self.url, project_id=self.project_id, api_key=self.api_key)
+
+    def _embed_request(self, inputs):
         """
-        Generate embeddings for the given text input.
+        Send a single embeddings request for a list of inputs.
 
-        :param text: The input text for which to generate embeddings.
-        :return: The embeddings result returned by the Watsonx API.
+        :param inputs: List of texts to embed in one round-trip.
+        :return: The raw result returned by the Watsonx API.
         """
-        inputs = [text]
         parameters = {
             "max_tokens": self.max_tokens
         }
+        # This call assumes the embeddings endpoint is available under foundation_models.
+        # Adjust the endpoint if IBM Watsonx AI provides a dedicated embeddings API.
+        return self.client.foundation_models.model(
+            model=self.model_id,
+            inputs=inputs,
+            parameters=parameters
+        ).result()
+
+    def _scheduled_request(self, inputs):
+        """Send an embeddings request through the scheduler, which retries throttled calls."""
+        with metrics.track_request("embeddings", "embed", self.model_id):
+            result = self.scheduler.call(self._embed_request, inputs, priority=self.priority)
+        if metrics.ENABLED and isinstance(result, dict):
+            items = result.get("results", [])
+            metrics.record_payload(
+                "embeddings",
+                self.model_id,
+                bytes_out=sum(len(text.encode("utf-8")) for text in inputs),
+                bytes_in=4 * sum(len(item.get("embedding") or ()) for item in items),
+                tokens_in=result.get("input_token_count"),
+            )
+        return result
+
+    @staticmethod
+    def _extract_vectors(result, count):
+        """
+        Pull the embedding vectors out of a raw API result, one per input.
+
+        :param result: The raw result returned by the Watsonx API.
+        :param count: The number of inputs that were sent.
+        :return: A list of vectors (or None where the API returned nothing), of length count.
+        """
+        items = result.get("results", []) if isinstance(result, dict) else []
+        vectors = [item.get("embedding") for item in items[:count]]
+        return vectors + [None] * (count - len(vectors))
+
+    def get_embeddings(self, text):
+        """
+        Generate embeddings for the given text input.
+
+        :param text: The input text for which to generate embeddings, or a list of texts.
+            Lists are forwarded to get_embeddings_batch.
+        :return: The embeddings result returned by the Watsonx API.
+        """
+        if isinstance(text, (list, tuple)):
+            return self.get_embeddings_batch(text)
+        key = None
+        if self.cache is not None:
+            key = self.cache.make_key(self.model_id, self.max_tokens, text)
+            vector = self.cache.get(key)
+            if vector is not None:
+                return {"model_id": self.model_id, "results": [{"embedding": vector}]}
         try:
-            # This call assumes the embeddings endpoint is available under foundation_models.
-            # Adjust the endpoint if IBM Watsonx AI provides a dedicated embeddings API.
-            result = self.client.foundation_models.model(
-                model=self.model_id,
-                inputs=inputs,
-                parameters=parameters
-            ).result()
+            result = self._scheduled_request([text])
+            if key is not None:
+                vector = self._extract_vectors(result, 1)[0]
+                if vector is not None:
+                    self.cache.put(key, vector)
             return result
         except Exception as e:
             print(f"Error generating embeddings: {e}")
             return None
 
+    def get_embeddings_batch(self, texts, batch_size=MAX_BATCH_SIZE):
+        """
+        Generate embeddings for many texts using as few API round-trips as possible.
+
+        Texts are grouped into requests of at most batch_size inputs. If a whole
+        request is rejected, its texts are retried one by one so that a single bad input
+        only fails itself; after throttling or a network failure the whole batch fails.
+
+        :param texts: The input texts for which to generate embeddings.
+        :param batch_size: Maximum number of texts sent in one request.
+        :return: A list with one entry per input text, in input order. Each entry is a
+            dict with the keys "index", "embedding" (None on failure) and "error"
+            (None on success).
+        """
+        if not 1 <= batch_size <= MAX_BATCH_SIZE:
+            raise ValueError(f"batch_size must be between 1 and {MAX_BATCH_SIZE}, got {batch_size}")
+
+        texts = list(texts)
+        if self.cache is not None:
+            return self._get_embeddings_batch_cached(texts, batch_size)
+        return self._fetch_embeddings(texts, batch_size)
+
+    def _fetch_embeddings(self, texts, batch_size):
+        """
+        Request embeddings for texts from the API in batches, bypassing the cache.
+
+        :return: A list of result dicts in the format of get_embeddings_batch.
+        """
+        results = []
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            try:
+                vectors = self._extract_vectors(self._scheduled_request(batch), len(batch))
+                errors = [None if vector is not None else "No embedding returned" for vector in vectors]
+            except Exception as e:
+                if len(batch) == 1 or is_transient(e):
+                    # A throttled or unreachable service has already been retried by the
+                    # scheduler; sending every item on its own would only add load.
+                    vectors, errors = [None] * len(batch), [str(e)] * len(batch)
+                else:
+                    print(f"Error generating embeddings for batch at {start}: {e}. Retrying items individually.")
+                    vectors, errors = self._embed_individually(batch)
+            for offset, (vector, error) in enumerate(zip(vectors, errors)):
+                results.append({"index": start + offset, "embedding": vector, "error": error})
+        return results
+
+    def get_embeddings_matrix(self, texts, batch_size=MAX_BATCH_SIZE, normalize=False):
+        """
+        Generate embeddings for many texts as one contiguous float32 matrix.
+
+        The matrix is filled batch by batch, so only one batch of Python-level vectors
+        is alive at a time. Rows of texts that failed to embed are filled with NaN.
+
+        :param texts: The input texts for which to generate embeddings.
+        :param batch_size: Maximum number of texts sent in one request.
+        :param normalize: If True, scale every row to unit L2 norm so dot products are cosine similarities.
+        :return: A C-contiguous float32 ndarray of shape (len(texts), dim).
+        :raises RuntimeError: If not a single text could be embedded.
+        """
+        texts = list(texts)
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        matrix = None
+        failed = []
+        first_error = None
+        for start in range(0, len(texts), batch_size):
+            for item in self.get_embeddings_batch(texts[start:start + batch_size], batch_size):
+                index = start + item["index"]
+                vector = item["embedding"]
+                if vector is None:
+                    failed.append(index)
+                    first_error = first_error or item["error"]
+                    continue
+                if matrix is None:
+                    matrix = np.empty((len(texts), len(vector)), dtype=np.float32)
+                matrix[index] = vector
+
+        if matrix is None:
+            raise RuntimeError(f"Error generating embeddings: {first_error}")
+        if failed:
+            matrix[failed] = np.nan
+        if normalize:
+            l2_normalize(matrix)
+        return matrix
+
+    def _get_embeddings_batch_cached(self, texts, batch_size):
+        """
+        Serve what the cache already holds and only send the misses to the API.
+
+        Duplicate texts within the call are requested once.
+        """
+        keys = [self.cache.make_key(self.model_id, self.max_tokens, text) for text in texts]
+        cached = self.cache.get_many(keys)
+        results = [{"index": i, "embedding": vector, "error": None} for i, vector in enumerate(cached)]
+
+        pending = {}
+        for i, vector in enumerate(cached):
+            if vector is None:
+                pending.setdefault(keys[i], []).append(i)
+        if not pending:
+            return results
+
+        unique_keys = list(pending)
+        fetched = self._fetch_embeddings([texts[pending[key][0]] for key in unique_keys], batch_size)
+        new_entries = []
+        for key, item in zip(unique_keys, fetched):
+            if item["embedding"] is not None:
+                new_entries.append((key, item["embedding"]))
+            for i in pending[key]:
+                results[i] = {"index": i, "embedding": item["embedding"], "error": item["error"]}
+        self.cache.put_many(new_entries)
+        return results
+
+    def _embed_individually(self, batch):
+        """
+        Embed each text of a failed batch on its own to isolate the failing inputs.
+
+        :param batch: The texts of the failed batch.
+        :return: A (vectors, errors) tuple of lists aligned with batch.
+        """
+        vectors, errors = [], []
+        for text in batch:
+            try:
+                vector = self._extract_vectors(self._scheduled_request([text]), 1)[0]
+                vectors.append(vector)
+                errors.append(None if vector is not None else "No embedding returned")
+            except Exception as e:
+                vectors.append(None)
+                errors.append(str(e))
+        return vectors, errors
+
+    def _get_executor(self):
+        """Return the thread pool that runs blocking SDK calls for the async methods."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency, thread_name_prefix="watsonx-embeddings"
+            )
+        return self._executor
+
+    async def aget_embeddings(self, text):
+        """
+        Async counterpart of get_embeddings.
+
+        :param text: The input text, or a list of texts (forwarded to aget_embeddings_batch).
+        :return: The embeddings result returned by the Watsonx API.
+        """
+        if isinstance(text, (list, tuple)):
+            return await self.aget_embeddings_batch(text)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), self.get_embeddings, text)
+
+    async def aget_embeddings_batch(self, texts, batch_size=MAX_BATCH_SIZE, max_concurrency=None):
+        """
+        Async counterpart of get_embeddings_batch that keeps several batch requests in flight.
+
+        :param texts: The input texts for which to generate embeddings.
+        :param batch_size: Maximum number of texts sent in one request.
+        :param max_concurrency: In-flight request limit; defaults to the instance's max_concurrency.
+        :return: A list of result dicts in input order, as returned by get_embeddings_batch.
+        """
+        texts = list(texts)
+        results = [None] * len(texts)
+        async for batch_results in self.aiter_embeddings_batch(texts, batch_size, max_concurrency):
+            for item in batch_results:
+                results[item["index"]] = item
+        return results
+
+    async def aiter_embeddings_batch(self, texts, batch_size=MAX_BATCH_SIZE, max_concurrency=None):
+        """
+        Stream embedding results batch by batch, in completion order.
+
+        At most max_concurrency requests run at the same time; the rest wait without
+        occupying a worker thread. Cancelling the consuming task, or leaving the
+        async for loop early, cancels every batch that has not started yet.
+
+        :param texts: The input texts for which to generate embeddings.
+        :param batch_size: Maximum number of texts sent in one request.
+        :param max_concurrency: In-flight request limit; defaults to the instance's max_concurrency.
+        :return: An async iterator of lists of result dicts. Each dict's "index" refers to texts.
+        """
+        if not 1 <= batch_size <= MAX_BATCH_SIZE:
+            raise ValueError(f"batch_size must be between 1 and {MAX_BATCH_SIZE}, got {batch_size}")
+        texts = texts if isinstance(texts, (list, tuple)) else list(texts)
+        limit = max_concurrency or self.max_concurrency
+        if limit > self.max_concurrency:
+            raise ValueError(f"max_concurrency cannot exceed the instance limit of {self.max_concurrency}")
+        semaphore = asyncio.Semaphore(limit)
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+
+        async def run_batch(start):
+            async with semaphore:
+                batch = texts[start:start + batch_size]
+                batch_results = await loop.run_in_executor(executor, self.get_embeddings_batch, batch, batch_size)
+            for item in batch_results:
+                item["index"] += start
+            return batch_results
+
+        tasks = [asyncio.ensure_future(run_batch(start)) for start in range(0, len(texts), batch_size)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def close(self):
+        """Shut down the worker threads used by the async methods."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
 # Example usage
 if __name__ == "__main__":
+    # Run from the repository root with: python -m embeddings.watsonx_embeddings
+    from embeddings.embedding_cache import EmbeddingCache
+
     sample_text = "This is a test sentence for embedding generation."
-    embedder = WatsonxEmbeddings()
+    embedder = WatsonxEmbeddings(cache=EmbeddingCache())
     embeddings = embedder.get_embeddings(sample_text)
     print("Embeddings result:")
     print(embeddings)
+
+    batch_results = embedder.get_embeddings_batch([sample_text, "A second sentence to embed."])
+    print("Batch embeddings result:")
+    for item in batch_results:
+        print(item["index"], "error" if item["error"] else "ok", item["error"] or len(item["embedding"]))
+    print("Cache stats:", embedder.cache.stats())
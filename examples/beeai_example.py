@@ -1,6 +1,9 @@
+import argparse
 import asyncio
 import sys
+import time
 import traceback
+from pathlib import Path
 
 from beeai_framework.backend.chat import ChatModel
 from beeai_framework.backend.message import UserMessage
@@ -9,42 +12,82 @@ from beeai_framework.tools.weather.openmeteo import OpenMeteoTool
 from beeai_framework.workflows.agent import AgentWorkflow, AgentWorkflowInput
 from beeai_framework.errors import FrameworkError
 
-async def main() -> None:
-    # Initialize the Watsonx LLM using the provider's model identifier.
-    # Note: The response_format parameter is not accepted, so it has been removed.
-    llm = ChatModel.from_name("watsonx:granite-13b-instruct-v2")
+# Make the repository's shared helpers importable when run as examples/beeai_example.py.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from watsonx_agent_client.dependency_runner import Step, run_steps
 
-    # Create a multi-agent workflow named "Smart Assistant".
-    workflow = AgentWorkflow(name="Smart Assistant")
+# Define a location to use as context.
+location = "Saint-Tropez"
 
-    # Add a Researcher agent to look up and provide information about a topic.
-    workflow.add_agent(
-        name="Researcher",
-        role="A diligent researcher.",
-        instructions="You look up and provide information about a specific topic.",
-        tools=[WikipediaTool()],
-        llm=llm,
-    )
+def add_agents(workflow, llm, names):
+    """Add the named agents of the example to a workflow."""
+    if "Researcher" in names:
+        # Add a Researcher agent to look up and provide information about a topic.
+        workflow.add_agent(
+            name="Researcher",
+            role="A diligent researcher.",
+            instructions="You look up and provide information about a specific topic.",
+            tools=[WikipediaTool()],
+            llm=llm,
+        )
+    if "WeatherForecaster" in names:
+        # Add a WeatherForecaster agent to provide detailed weather reports.
+        workflow.add_agent(
+            name="WeatherForecaster",
+            role="A weather reporter.",
+            instructions="You provide detailed weather reports.",
+            tools=[OpenMeteoTool()],
+            llm=llm,
+        )
+    if "DataSynthesizer" in names:
+        # Add a DataSynthesizer agent to combine disparate information into a coherent summary.
+        workflow.add_agent(
+            name="DataSynthesizer",
+            role="A meticulous and creative data synthesizer",
+            instructions="You can combine disparate information into a final coherent summary.",
+            llm=llm,
+        )
 
-    # Add a WeatherForecaster agent to provide detailed weather reports.
-    workflow.add_agent(
-        name="WeatherForecaster",
-        role="A weather reporter.",
-        instructions="You provide detailed weather reports.",
-        tools=[OpenMeteoTool()],
-        llm=llm,
-    )
+async def run_agent(llm, name, workflow_input):
+    """Run one agent on its own and return its final answer."""
+    workflow = AgentWorkflow(name=name)
+    add_agents(workflow, llm, [name])
+    response = await workflow.run(inputs=[workflow_input])
+    print(f"\n-> Step '{name}' has been completed with the following outcome.\n\n{response.result.final_answer}")
+    return response.result.final_answer
 
-    # Add a DataSynthesizer agent to combine disparate information into a coherent summary.
-    workflow.add_agent(
-        name="DataSynthesizer",
-        role="A meticulous and creative data synthesizer",
-        instructions="You can combine disparate information into a final coherent summary.",
-        llm=llm,
-    )
+async def run_concurrent(llm) -> None:
+    # The Researcher and the WeatherForecaster do not depend on each other, so they run
+    # concurrently; the DataSynthesizer starts once both have answered.
+    steps = [
+        Step("Researcher", lambda inputs: run_agent(llm, "Researcher", AgentWorkflowInput(
+            prompt=f"Provide a short history of {location}.",
+        ))),
+        Step("WeatherForecaster", lambda inputs: run_agent(llm, "WeatherForecaster", AgentWorkflowInput(
+            prompt=f"Provide a comprehensive weather summary for {location} today.",
+            expected_output="Essential weather details such as chance of rain, temperature and wind. Only report information that is available.",
+        ))),
+        Step("DataSynthesizer", lambda inputs: run_agent(llm, "DataSynthesizer", AgentWorkflowInput(
+            prompt=(
+                f"Summarize the historical and weather data for {location}.\n\n"
+                f"History:\n{inputs['Researcher']}\n\nWeather:\n{inputs['WeatherForecaster']}"
+            ),
+            expected_output=f"A paragraph that describes the history of {location}, followed by the current weather conditions.",
+        )), depends_on=["Researcher", "WeatherForecaster"]),
+    ]
+    report = await run_steps(steps)
 
-    # Define a location to use as context.
-    location = "Saint-Tropez"
+    # Print the final answer and the per-step timings (* marks the critical path).
+    print("==== Final Answer ====")
+    print(report.results["DataSynthesizer"])
+    print("\n==== Step Timings ====")
+    print(report.format())
+
+async def run_sequential(llm) -> None:
+    # Create a multi-agent workflow named "Smart Assistant".
+    workflow = AgentWorkflow(name="Smart Assistant")
+    add_agents(workflow, llm, ["Researcher", "WeatherForecaster", "DataSynthesizer"])
+    start = time.perf_counter()
 
     # Run the workflow with sequential inputs:
     # 1. Provide a short history of the location.
@@ -74,10 +117,21 @@ async def main() -> None:
     # Print the final answer from the workflow.
     print("==== Final Answer ====")
     print(response.result.final_answer)
+    print(f"\nWall time {time.perf_counter() - start:.2f}s")
+
+async def main(sequential=False) -> None:
+    # Initialize the Watsonx LLM using the provider's model identifier.
+    # Note: The response_format parameter is not accepted, so it has been removed.
+    llm = ChatModel.from_name("watsonx:granite-13b-instruct-v2")
+    await (run_sequential(llm) if sequential else run_concurrent(llm))
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Research, weather and synthesis agents on watsonx.ai.")
+    parser.add_argument("--sequential", action="store_true",
+                        help="Run the three steps one after the other in a single AgentWorkflow, for comparison.")
+    args = parser.parse_args()
     try:
-        asyncio.run(main())
+        asyncio.run(main(args.sequential))
     except FrameworkError as e:
         traceback.print_exc()
         sys.exit(e.explain())
@@ -1,8 +1,17 @@
 import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
 from langchain_ibm import WatsonxLLM  # Import from langchain_ibm
 from langgraph.graph import StateGraph, END
-from langchain.schema import HumanMessage
+from langchain.schema import AIMessage, HumanMessage
+
+# Make the repository's shared helpers importable when run as examples/langraph_example.py.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from watsonx_agent_client.graph_state import (
+    ConversationMemory, FileCheckpointer, MessageLog, message_content, message_node, message_role,
+)
+from watsonx_agent_client.response_cache import ResponseCache
 
 # Load environment variables from .env file
 load_dotenv()
@@ -15,36 +24,63 @@ project_id = os.getenv("PROJECT_ID")
 # Specify the model ID
 model_id = "ibm/granite-13b-instruct-v2"
 
+# Define the model parameters (greedy decoding, so responses can be cached)
+parameters = {
+    "decoding_method": "greedy",
+    "max_new_tokens": 200
+}
+
 # Initialize the WatsonxLLM with the correct parameter names
 watsonx_llm = WatsonxLLM(
     model_id=model_id,
     url=url,
     apikey=api_key,
     project_id=project_id,
-    params={
-        "decoding_method": "greedy",
-        "max_new_tokens": 200
-    }
+    params=parameters
 )
 
-# Define a node in the graph that uses the Watsonx model
-def generate_response(state):
-    messages = state["messages"]
-    response = watsonx_llm.invoke(messages)
-    return {"messages": messages + [response]}
+# Reuse responses across runs when WATSONX_RESPONSE_CACHE is set
+response_cache = ResponseCache.from_env()
+
+def summarize(previous_summary, messages):
+    """Fold messages that left the history window into the running summary."""
+    transcript = "\n".join(f"{message_role(message)}: {message_content(message)}" for message in messages)
+    return watsonx_llm.invoke(
+        f"Summary so far: {previous_summary or 'none'}\n\nNew messages:\n{transcript}\n\n"
+        "Write an updated summary of the conversation in a few sentences:"
+    )
+
+# Send at most the last 12 messages plus a summary of the older ones, so long conversations
+# do not grow the prompt on every turn. When the window overflows, the oldest messages are
+# summarized down to 6, so the summary call only happens every few turns.
+memory = ConversationMemory(max_messages=12, summarize=summarize)
+# Conversations with a thread_id are saved under ~/.cache/watsonx_agent_client/graph_state.
+checkpointer = FileCheckpointer()
+
+# Define a node in the graph that uses the Watsonx model. It returns only the new message;
+# message_node appends it to the message log without copying the history.
+def generate_response(messages, state):
+    if response_cache is not None:
+        prompt = [message_content(message) for message in messages]
+        text = response_cache.cached_call(model_id, parameters, prompt, lambda: watsonx_llm.invoke(messages))
+    else:
+        text = watsonx_llm.invoke(messages)
+    return AIMessage(content=text)
 
 # Create a new graph and add the node
 workflow = StateGraph(dict)
-workflow.add_node("generate", generate_response)
+workflow.add_node("generate", message_node(generate_response, memory, checkpointer))
 workflow.set_entry_point("generate")
 workflow.add_edge("generate", END)
 app = workflow.compile()
 
-# Example usage
-inputs = {"messages": [HumanMessage(content="Tell me a joke.")]}
+# Example usage. Set LANGGRAPH_THREAD_ID to continue a saved conversation across runs.
+thread_id = os.getenv("LANGGRAPH_THREAD_ID")
+history = checkpointer.load(thread_id) if thread_id else MessageLog()
+inputs = {"messages": history.append(HumanMessage(content="Tell me a joke.")), "thread_id": thread_id}
 
 result = app.invoke(inputs)
 
-# Print only the answer (assumed to be the last element in the messages list)
+# Print only the answer (the last element in the message log)
 answer = result["messages"][-1]
-print(answer)
+print(answer.content)
@@ -1,19 +1,275 @@
 from langflow.base.models.model import LCModelComponent
 from langflow.field_typing import LanguageModel
-from langchain_ibm import ChatWatsonx
-from pydantic.v1 import SecretStr
-from typing import Any
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Iterable, Iterator
+
+import asyncio
+import contextlib
+import functools
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
 
-import requests
 from langflow.inputs import DropdownInput, IntInput, SecretStrInput, StrInput, BoolInput, SliderInput
 from langflow.field_typing.range_spec import RangeSpec
 from langflow.schema.dotdict import dotdict
 
 import logging
 
+if TYPE_CHECKING:
+    # langchain_ibm, pydantic.v1 and requests are imported where they are first needed,
+    # so loading this component does not pay for them.
+    import requests
+    from langchain_ibm import ChatWatsonx
+
+# The shared helpers in watsonx_agent_client/ live at the repository root, two levels up.
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
+
+try:
+    from watsonx_agent_client import metrics as watsonx_metrics
+    from watsonx_agent_client.model_catalog import get_catalog, get_model_router
+    from watsonx_agent_client.region_router import get_router
+    from watsonx_agent_client.response_cache import ResponseCache
+    from watsonx_agent_client.scheduler import BATCH, INTERACTIVE, get_scheduler
+except ImportError:  # Loaded on its own, e.g. copied into a Langflow components folder.
+    ResponseCache = get_scheduler = get_router = watsonx_metrics = get_catalog = get_model_router = None
+    INTERACTIVE, BATCH = 0, 1
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+WATSONX_REGION_URLS = [
+    "https://us-south.ml.cloud.ibm.com",
+    "https://eu-de.ml.cloud.ibm.com",
+    "https://eu-gb.ml.cloud.ibm.com",
+    "https://au-syd.ml.cloud.ibm.com",
+    "https://jp-tok.ml.cloud.ibm.com",
+    "https://ca-tor.ml.cloud.ibm.com",
+]
+
+
+class ModelListCache:
+    """
+    Caches the model list of each watsonx.ai base URL in memory and on disk.
+
+    Fresh entries (younger than ttl) are served directly. Stale entries (up to ttl + stale_ttl)
+    are served immediately while a background thread revalidates them. Revalidation is a
+    conditional request (If-None-Match / If-Modified-Since), so an unchanged list costs a 304.
+    All requests share one requests.Session to reuse connections.
+    """
+
+    endpoint = "/ml/v1/foundation_model_specs"
+    params = {"version": "2024-09-16", "filters": "function_text_chat,!lifecycle_withdrawn"}
+
+    def __init__(self, path: str | None = None, ttl: float = 3600, stale_ttl: float = 86400, timeout: float = 10):
+        self.path = path or os.getenv(
+            "WATSONX_MODEL_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "watsonx_agent_client", "model_specs.json")
+        )
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.timeout = timeout
+        self._session: "requests.Session | None" = None
+        self._entries: dict[str, dict] = {}
+        self._refreshing: set[str] = set()
+        self._lock = threading.Lock()
+        self._load()
+
+    @property
+    def session(self) -> "requests.Session":
+        if self._session is None:
+            import requests
+
+            self._session = requests.Session()
+        return self._session
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def _save(self) -> None:
+        """Write the cache atomically so concurrent readers never see a partial file."""
+        try:
+            directory = os.path.dirname(self.path)
+            os.makedirs(directory, exist_ok=True)
+            with self._lock:
+                data = json.dumps(self._entries)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            logger.warning("Could not write the model cache to %s", self.path)
+
+    def get(self, base_url: str) -> list[str]:
+        """Return the model ids for base_url, fetching or revalidating as needed."""
+        with self._lock:
+            entry = self._entries.get(base_url)
+        age = time.time() - entry["fetched_at"] if entry else None
+        if entry and age < self.ttl:
+            return entry["models"]
+        if entry and age < self.ttl + self.stale_ttl:
+            self._refresh_in_background(base_url)
+            return entry["models"]
+        try:
+            return self.refresh(base_url)
+        except Exception:
+            if entry:
+                logger.warning("Could not refresh models for %s; serving the cached list.", base_url)
+                return entry["models"]
+            raise
+
+    def refresh(self, base_url: str) -> list[str]:
+        """Revalidate the cached list for base_url with a conditional request and return it."""
+        with self._lock:
+            entry = dict(self._entries.get(base_url) or {})
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        response = self.session.get(f"{base_url}{self.endpoint}", params=self.params, headers=headers, timeout=self.timeout)
+        # An empty list is a valid cached answer too; a 304 has no body to parse.
+        if response.status_code == 304 and "models" in entry:
+            entry["fetched_at"] = time.time()
+        else:
+            response.raise_for_status()
+            data = response.json()
+            entry = {
+                "models": sorted(model["model_id"] for model in data.get("resources", [])),
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "fetched_at": time.time(),
+            }
+        with self._lock:
+            self._entries[base_url] = entry
+        self._save()
+        return entry["models"]
+
+    def _refresh_in_background(self, base_url: str) -> None:
+        with self._lock:
+            if base_url in self._refreshing:
+                return
+            self._refreshing.add(base_url)
+
+        def run() -> None:
+            try:
+                self.refresh(base_url)
+            except Exception:
+                logger.warning("Background refresh of models for %s failed.", base_url)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(base_url)
+
+        threading.Thread(target=run, name="watsonx-model-refresh", daemon=True).start()
+
+
+_model_list_cache: ModelListCache | None = None
+_model_list_cache_lock = threading.Lock()
+
+
+def _get_model_list_cache() -> ModelListCache:
+    """The shared ModelListCache, created on first use so importing the component does no disk I/O."""
+    global _model_list_cache
+    with _model_list_cache_lock:
+        if _model_list_cache is None:
+            _model_list_cache = ModelListCache()
+        return _model_list_cache
+
+
+_env_response_cache: Any = None
+_env_response_cache_loaded = False
+_env_response_cache_lock = threading.Lock()
+
+
+def _get_env_response_cache() -> Any:
+    """The ResponseCache configured by WATSONX_RESPONSE_CACHE, created on first use so importing does no disk I/O."""
+    global _env_response_cache, _env_response_cache_loaded
+    with _env_response_cache_lock:
+        if not _env_response_cache_loaded:
+            _env_response_cache = ResponseCache.from_env() if ResponseCache is not None else None
+            _env_response_cache_loaded = True
+        return _env_response_cache
+
+
+@dataclass
+class StreamMetrics:
+    """Timing of one streamed generation. Times are in seconds."""
+
+    model_id: str | None = None
+    url: str | None = None
+    started: float = field(default_factory=time.perf_counter)
+    time_to_first_token: float | None = None
+    total_time: float | None = None
+    chunks: int = 0
+    output_tokens: int | None = None
+    inter_token_latencies: list[float] = field(default_factory=list)
+    error: str | None = None
+    _last: float | None = field(default=None, repr=False)
+
+    def record(self, chunk: Any, text: str) -> None:
+        # Usage arrives on a chunk of its own; only chunks with text count towards the timings.
+        usage = getattr(chunk, "usage_metadata", None)
+        if usage and usage.get("output_tokens"):
+            self.output_tokens = usage["output_tokens"]
+        if not text:
+            return
+        now = time.perf_counter()
+        if self._last is None:
+            self.time_to_first_token = now - self.started
+        else:
+            self.inter_token_latencies.append(now - self._last)
+        self._last = now
+        self.chunks += 1
+
+    def finish(self, error: BaseException | None = None) -> None:
+        self.total_time = time.perf_counter() - self.started
+        if error is not None:
+            self.error = repr(error)
+
+    @property
+    def tokens(self) -> int:
+        # The service reports usage on the last chunk; otherwise count chunks, which carry about one token each.
+        return self.output_tokens or self.chunks
+
+    @property
+    def tokens_per_second(self) -> float | None:
+        if not self.total_time or not self.tokens:
+            return None
+        return self.tokens / self.total_time
+
+    @property
+    def mean_inter_token_latency(self) -> float | None:
+        if not self.inter_token_latencies:
+            return None
+        return sum(self.inter_token_latencies) / len(self.inter_token_latencies)
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data.pop("_last")
+        data.pop("started")
+        data["tokens"] = self.tokens
+        data["tokens_per_second"] = self.tokens_per_second
+        data["mean_inter_token_latency"] = self.mean_inter_token_latency
+        return data
+
+
+def _chunk_text(chunk: Any) -> str:
+    content = getattr(chunk, "content", chunk)
+    if isinstance(content, list):
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return content if isinstance(content, str) else str(content)
+
 
 class WatsonxLLM(LCModelComponent):
     display_name = "IBM watsonx.ai"
@@ -22,6 +278,21 @@ class WatsonxLLM(LCModelComponent):
 
     _default_models = ["ibm/granite-3-2b-instruct", "ibm/granite-3-8b-instruct", "ibm/granite-13b-instruct-v2"]
 
+    # Built ChatWatsonx instances keyed by their effective configuration, shared by all components.
+    _model_instances: "OrderedDict[tuple, ChatWatsonx]" = OrderedDict()
+    _model_instances_lock = threading.Lock()
+    _max_model_instances = 16
+
+    # Opt-in exact-match cache for deterministic generations (see WATSONX_RESPONSE_CACHE, read
+    # on first use); assign a ResponseCache to enable it for all components or for one instance.
+    response_cache = None
+    # Opt-in cache that also answers paraphrased prompts (see WATSONX_SEMANTIC_CACHE); it is
+    # consulted after response_cache misses. Assign a SemanticCache to use that one instead of
+    # the per-credentials caches created on first use by _get_semantic_cache.
+    semantic_cache = None
+    _semantic_caches: dict[tuple, Any] = {}
+    _semantic_caches_lock = threading.Lock()
+
     inputs = [
         *LCModelComponent._base_inputs,
         DropdownInput(
@@ -29,16 +300,23 @@ class WatsonxLLM(LCModelComponent):
             display_name="watsonx API Endpoint",
             info="The base URL of the API.",
             value=None,
-            options=[
-                "https://us-south.ml.cloud.ibm.com",
-                "https://eu-de.ml.cloud.ibm.com",
-                "https://eu-gb.ml.cloud.ibm.com",
-                "https://au-syd.ml.cloud.ibm.com",
-                "https://jp-tok.ml.cloud.ibm.com",
-                "https://ca-tor.ml.cloud.ibm.com",
-            ],
+            options=WATSONX_REGION_URLS,
             real_time_refresh=True,
         ),
+        BoolInput(
+            name="region_routing",
+            display_name="Route to Fastest Region",
+            advanced=True,
+            info="Probe all endpoints in the background and send each call to the fastest healthy one.",
+            value=False,
+        ),
+        BoolInput(
+            name="hedge_requests",
+            display_name="Hedge Slow Requests",
+            advanced=True,
+            info="With region routing, repeat a slow call in the second-fastest region and keep the first answer.",
+            value=False,
+        ),
         StrInput(
             name="project_id",
             display_name="watsonx Project ID",
@@ -130,18 +408,20 @@ class WatsonxLLM(LCModelComponent):
 
     @staticmethod
     def fetch_models(base_url: str) -> list[str]:
-        """Fetch available models from the watsonx.ai API."""
+        """
+        Fetch available models from the watsonx.ai API, cached per base URL (see ModelListCache).
+        The ids are also recorded in the model catalog as available in that region.
+        """
         try:
-            endpoint = f"{base_url}/ml/v1/foundation_model_specs"
-            params = {"version": "2024-09-16", "filters": "function_text_chat,!lifecycle_withdrawn"}
-            response = requests.get(endpoint, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            models = [model["model_id"] for model in data.get("resources", [])]
-            return sorted(models)
+            models = list(_get_model_list_cache().get(base_url))
         except Exception:
-            logger.exception("Error fetching models. Using default models.")
-            return WatsonxLLM._default_models
+            logger.exception("Error fetching models. Using the chat models of the catalog.")
+            if get_catalog is None:
+                return WatsonxLLM._default_models
+            return [entry.model_id for entry in get_catalog().find("text_chat")] or WatsonxLLM._default_models
+        if get_catalog is not None:
+            get_catalog().update(models, region=base_url)
+        return models
 
     def update_build_config(self, build_config: dotdict, field_value: Any, field_name: str | None = None):
         """Update model options when URL or API key changes."""
@@ -158,8 +438,8 @@ class WatsonxLLM(LCModelComponent):
             except Exception:
                 logger.exception("Error updating model options.")
 
-    def build_model(self) -> LanguageModel:
-        chat_params = {
+    def _chat_params(self) -> dict:
+        return {
             "max_tokens": getattr(self, "max_tokens", None),
             "temperature": getattr(self, "temperature", None),
             "top_p": getattr(self, "top_p", None),
@@ -173,34 +453,404 @@ class WatsonxLLM(LCModelComponent):
             "time_limit": 600000,
             "logit_bias": {"1003": -100, "1004": -100},
         }
+
+    def _bearer_token(self) -> str:
         # Force the API key to use a Bearer token.
+        from pydantic.v1 import SecretStr
+
         raw_key = SecretStr(self.api_key).get_secret_value().strip()
         if not raw_key.startswith("Bearer "):
-            token = "Bearer " + raw_key
-        else:
-            token = raw_key
+            return "Bearer " + raw_key
+        return raw_key
+
+    def _model_cache_key(self, url: str, token: str, chat_params: dict) -> tuple:
+        """Key identifying a ChatWatsonx configuration; only a digest of the token is kept."""
+        return (
+            url,
+            self.project_id,
+            self.model_name,
+            json.dumps(chat_params, sort_keys=True, default=str),
+            bool(self.stream),
+            hashlib.sha256(token.encode("utf-8")).hexdigest(),
+        )
 
-        return ChatWatsonx(
+    def build_model(self, url: str | None = None) -> LanguageModel:
+        """
+        Return a ChatWatsonx for the current inputs, reusing an already built instance when
+        url, project, model, parameters, streaming and API key are all unchanged.
+
+        url overrides the configured endpoint; region routing uses it to address other regions.
+        """
+        url = url or self.url
+        chat_params = self._chat_params()
+        token = self._bearer_token()
+        key = self._model_cache_key(url, token, chat_params)
+        cls = type(self)
+        with cls._model_instances_lock:
+            model = cls._model_instances.get(key)
+            if model is not None:
+                cls._model_instances.move_to_end(key)
+                return model
+
+        from langchain_ibm import ChatWatsonx
+
+        # Build outside the lock: construction authenticates and may take a while.
+        model = ChatWatsonx(
             apikey=token,
-            url=self.url,
+            url=url,
             project_id=self.project_id,
             model_id=self.model_name,
             params=chat_params,
             streaming=self.stream,
         )
+        with cls._model_instances_lock:
+            # Another thread may have built the same configuration meanwhile; keep the first one.
+            model = cls._model_instances.setdefault(key, model)
+            cls._model_instances.move_to_end(key)
+            while len(cls._model_instances) > cls._max_model_instances:
+                cls._model_instances.popitem(last=False)
+        return model
+
+    @classmethod
+    def clear_model_cache(cls) -> None:
+        """Drop every cached ChatWatsonx instance, e.g. after rotating API keys."""
+        with cls._model_instances_lock:
+            cls._model_instances.clear()
 
     def generate_text(self, prompt: str) -> str:
         """
-        Generate text using the built model.
+        Generate text using the built model. Deterministic requests are served from
+        response_cache, and prompts similar to earlier ones from semantic_cache, when set.
         """
         try:
             llm_instance = self.build_model()
-            # Assuming ChatWatsonx instance is callable with a prompt.
-            response = llm_instance(prompt)
-            return response
+            return self._cached_generate(prompt, lambda: _chunk_text(self._invoke(llm_instance, prompt, INTERACTIVE)))
         except Exception as e:
             return f"Error generating text: {e}"
 
+    def _get_response_cache(self) -> Any:
+        """The assigned response_cache, or the one configured by WATSONX_RESPONSE_CACHE."""
+        if self.response_cache is not None:
+            return self.response_cache
+        return _get_env_response_cache()
+
+    def _get_semantic_cache(self) -> Any:
+        """
+        The assigned semantic_cache, or the one configured by WATSONX_SEMANTIC_CACHE for the
+        url, project and API key of this component. It is created on the first call that needs
+        it, so loading the component neither authenticates nor imports numpy.
+        """
+        if self.semantic_cache is not None or ResponseCache is None or not os.getenv("WATSONX_SEMANTIC_CACHE"):
+            return self.semantic_cache
+        from pydantic.v1 import SecretStr
+
+        api_key = SecretStr(self.api_key).get_secret_value().strip()
+        key = (self.url, self.project_id, hashlib.sha256(api_key.encode("utf-8")).hexdigest())
+        cls = type(self)
+        with cls._semantic_caches_lock:
+            cache = cls._semantic_caches.get(key)
+        if cache is not None:
+            return cache
+
+        from embeddings.watsonx_embeddings import WatsonxEmbeddings
+        from watsonx_agent_client.semantic_cache import SemanticCache
+
+        try:
+            # The lookup sits on the request path, so it must not queue behind batch jobs.
+            embedder = WatsonxEmbeddings(priority=INTERACTIVE, url=self.url, project_id=self.project_id, api_key=api_key)
+        except Exception as e:
+            logger.warning("Semantic cache disabled for this call, the embedder could not be created: %s", e)
+            return None
+        with cls._semantic_caches_lock:
+            return cls._semantic_caches.setdefault(key, SemanticCache.from_env(embedder))
+
+    def _scheduler(self) -> Any:
+        # One scheduler per project, shared with WatsonxEmbeddings and the SDK examples.
+        return get_scheduler(self.project_id) if get_scheduler is not None else None
+
+    def _router(self) -> Any:
+        if not getattr(self, "region_routing", False) or get_router is None:
+            return None
+        return get_router(WATSONX_REGION_URLS)
+
+    def _routed_url(self) -> str:
+        """The fastest healthy region when region routing is on, else the configured URL."""
+        router = self._router()
+        return router.best(preferred=self.url) if router is not None else self.url
+
+    def _record_call(self, operation: str, prompt: str, response: Any, seconds: float) -> None:
+        """
+        Export duration, outcome, payload bytes and token usage of one call (see watsonx_agent_client.metrics),
+        and feed latency and throughput to the model router.
+        """
+        usage = (getattr(response, "usage_metadata", None) or {}) if response is not None else {}
+        if get_model_router is not None:
+            get_model_router().record(self.model_name, seconds, output_tokens=usage.get("output_tokens"), ok=response is not None)
+        if watsonx_metrics is None or not watsonx_metrics.ENABLED:
+            return
+        watsonx_metrics.record_request("llm", operation, self.model_name, seconds, response is not None)
+        if response is not None:
+            watsonx_metrics.record_payload(
+                "llm",
+                self.model_name,
+                bytes_out=len(prompt.encode("utf-8")),
+                bytes_in=len(_chunk_text(response).encode("utf-8")),
+                tokens_in=usage.get("input_tokens"),
+                tokens_out=usage.get("output_tokens"),
+            )
+
+    def _record_stream(self, prompt: str, stream: StreamMetrics) -> None:
+        router = self._router()
+        if router is not None:
+            # Like a routed call, so slow or failing regions are also noticed from streams.
+            router.record(stream.url, stream.total_time, stream.error is None, call=True)
+        if get_model_router is not None:
+            get_model_router().record(
+                self.model_name,
+                stream.total_time,
+                output_tokens=stream.tokens,
+                time_to_first_token=stream.time_to_first_token,
+                ok=stream.error is None,
+            )
+        if watsonx_metrics is None or not watsonx_metrics.ENABLED:
+            return
+        watsonx_metrics.record_request("llm", "stream", self.model_name, stream.total_time, stream.error is None)
+        if stream.time_to_first_token is not None:
+            watsonx_metrics.TIME_TO_FIRST_TOKEN.observe(stream.time_to_first_token, model=self.model_name)
+        watsonx_metrics.record_payload(
+            "llm", self.model_name, bytes_out=len(prompt.encode("utf-8")), tokens_out=stream.output_tokens
+        )
+
+    def _invoke(self, model: Any, prompt: str, priority: int) -> Any:
+        start = time.perf_counter()
+        response = None
+        try:
+            response = self._dispatch(model, prompt, priority)
+            return response
+        finally:
+            self._record_call("generate", prompt, response, time.perf_counter() - start)
+
+    async def _ainvoke(self, model: Any, prompt: str, priority: int) -> Any:
+        start = time.perf_counter()
+        response = None
+        try:
+            response = await self._adispatch(model, prompt, priority)
+            return response
+        finally:
+            self._record_call("generate", prompt, response, time.perf_counter() - start)
+
+    def _dispatch(self, model: Any, prompt: str, priority: int) -> Any:
+        """
+        Invoke the model through the project's scheduler (rate limit, adaptive concurrency, retries).
+        With region routing, the call goes to the fastest region instead and may be hedged.
+        """
+        router = self._router()
+        if router is not None:
+            return router.call(
+                lambda url: self._invoke_at(self.build_model(url), prompt, priority),
+                hedge=getattr(self, "hedge_requests", False),
+                preferred=self.url,
+            )
+        return self._invoke_at(model, prompt, priority)
+
+    def _invoke_at(self, model: Any, prompt: str, priority: int) -> Any:
+        scheduler = self._scheduler()
+        if scheduler is None:
+            return model.invoke(prompt)
+        return scheduler.call(model.invoke, prompt, priority=priority)
+
+    async def _adispatch(self, model: Any, prompt: str, priority: int) -> Any:
+        router = self._router()
+        if router is not None:
+            return await router.acall(
+                lambda url: self._ainvoke_at(self.build_model(url), prompt, priority),
+                hedge=getattr(self, "hedge_requests", False),
+                preferred=self.url,
+            )
+        return await self._ainvoke_at(model, prompt, priority)
+
+    async def _ainvoke_at(self, model: Any, prompt: str, priority: int) -> Any:
+        scheduler = self._scheduler()
+        if scheduler is None:
+            return await model.ainvoke(prompt)
+        return await scheduler.acall(model.ainvoke, prompt, priority=priority)
+
+    def _cached_generate(self, prompt: str, generate: Callable[[], str]) -> str:
+        chat_params = self._chat_params()
+        semantic_cache = self._get_semantic_cache()
+        if semantic_cache is not None:
+            generate = functools.partial(semantic_cache.cached_call, self.model_name, chat_params, prompt, generate)
+        response_cache = self._get_response_cache()
+        if response_cache is None:
+            return generate()
+        return response_cache.cached_call(self.model_name, chat_params, prompt, generate)
+
+    async def _acached_generate(self, prompt: str, agenerate: Callable[[], Awaitable[str]]) -> str:
+        """Async counterpart of _cached_generate; agenerate is a zero-argument coroutine function."""
+        chat_params = self._chat_params()
+        # Creating the semantic cache authenticates its embedder, so keep it off the event loop.
+        semantic_cache = await asyncio.to_thread(self._get_semantic_cache)
+        if semantic_cache is not None:
+            agenerate = functools.partial(semantic_cache.acached_call, self.model_name, chat_params, prompt, agenerate)
+        # Opening a SQLite cache file is disk I/O, so keep it off the event loop too.
+        response_cache = await asyncio.to_thread(self._get_response_cache)
+        if response_cache is None:
+            return await agenerate()
+        return await response_cache.acached_call(self.model_name, chat_params, prompt, agenerate)
+
+    @staticmethod
+    def _batch_item(index: int, text: str | None = None, error: str | None = None) -> dict:
+        return {"index": index, "text": text, "error": error}
+
+    def _invoke_item(self, model: Any, index: int, prompt: str, cancel_event: Any) -> dict:
+        if cancel_event is not None and cancel_event.is_set():
+            return self._batch_item(index, error="cancelled")
+        try:
+            return self._batch_item(index, text=self._cached_generate(prompt, lambda: _chunk_text(self._invoke(model, prompt, BATCH))))
+        except Exception as e:
+            return self._batch_item(index, error=f"Error generating text: {e}")
+
+    def generate_batch(
+        self,
+        prompts: Iterable[str],
+        max_concurrency: int = 8,
+        on_progress: Callable[[int, int, dict], None] | None = None,
+        cancel_event: threading.Event | None = None,
+    ) -> list[dict]:
+        """
+        Generate text for many prompts concurrently on a thread pool.
+
+        :param prompts: The prompts to send.
+        :param max_concurrency: Maximum number of requests in flight.
+        :param on_progress: Called as on_progress(done, total, result) after every finished prompt.
+        :param cancel_event: Set it to stop early; prompts that have not started are reported as cancelled.
+        :return: One dict per prompt, in input order, with the keys "index", "text" (None on
+            failure) and "error" (None on success). A failing prompt does not affect the others.
+        """
+        prompts = list(prompts)
+        results = [self._batch_item(i, error="cancelled") for i in range(len(prompts))]
+        if not prompts:
+            return results
+        model = self.build_model()
+        done = 0
+        with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="watsonx-generate") as executor:
+            futures = [executor.submit(self._invoke_item, model, i, prompt, cancel_event) for i, prompt in enumerate(prompts)]
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                result = future.result()
+                results[result["index"]] = result
+                done += 1
+                if on_progress is not None:
+                    on_progress(done, len(prompts), result)
+                if cancel_event is not None and cancel_event.is_set():
+                    for pending in futures:
+                        pending.cancel()
+        return results
+
+    async def agenerate_batch(
+        self,
+        prompts: Iterable[str],
+        max_concurrency: int = 8,
+        on_progress: Callable[[int, int, dict], None] | None = None,
+        cancel_event: asyncio.Event | threading.Event | None = None,
+    ) -> list[dict]:
+        """
+        Async counterpart of generate_batch, bounded by an asyncio.Semaphore.
+
+        Cancelling the calling task cancels every outstanding request. Setting cancel_event
+        stops early and returns the results gathered so far, the rest marked as cancelled.
+        """
+        prompts = list(prompts)
+        results = [self._batch_item(i, error="cancelled") for i in range(len(prompts))]
+        if not prompts:
+            return results
+        model = self.build_model()
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def generate(prompt: str) -> str:
+            return _chunk_text(await self._ainvoke(model, prompt, BATCH))
+
+        async def run(index: int, prompt: str) -> dict:
+            async with semaphore:
+                if cancel_event is not None and cancel_event.is_set():
+                    return self._batch_item(index, error="cancelled")
+                try:
+                    text = await self._acached_generate(prompt, functools.partial(generate, prompt))
+                    return self._batch_item(index, text=text)
+                except Exception as e:
+                    return self._batch_item(index, error=f"Error generating text: {e}")
+
+        tasks = [asyncio.ensure_future(run(i, prompt)) for i, prompt in enumerate(prompts)]
+        try:
+            for done, next_done in enumerate(asyncio.as_completed(tasks), start=1):
+                result = await next_done
+                results[result["index"]] = result
+                if on_progress is not None:
+                    on_progress(done, len(prompts), result)
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+        return results
+
+    def _start_stream_metrics(self) -> StreamMetrics:
+        if not hasattr(self, "stream_metrics"):
+            # Metrics of the most recent streamed calls, newest last.
+            self.stream_metrics: deque[StreamMetrics] = deque(maxlen=100)
+        metrics = StreamMetrics(model_id=self.model_name, url=self._routed_url())
+        self.stream_metrics.append(metrics)
+        return metrics
+
+    def stream_text(self, prompt: str) -> Iterator[str]:
+        """
+        Yield the generated text piece by piece as the service produces it.
+
+        Time to first token, inter-token latency and tokens per second of the call are
+        recorded in self.stream_metrics[-1] (a StreamMetrics) as the stream progresses.
+        """
+        metrics = self._start_stream_metrics()
+        error = None
+        scheduler = self._scheduler()
+        try:
+            # The stream holds a scheduler slot until it ends; it is not retried once started.
+            with scheduler.slot(INTERACTIVE) if scheduler is not None else contextlib.nullcontext():
+                for chunk in self.build_model(metrics.url).stream(prompt):
+                    text = _chunk_text(chunk)
+                    metrics.record(chunk, text)
+                    if text:
+                        yield text
+        except Exception as e:
+            error = e
+            logger.exception("Error streaming text.")
+            raise
+        finally:
+            # Also runs when the caller stops iterating early.
+            metrics.finish(error)
+            self._record_stream(prompt, metrics)
+
+    async def astream_text(self, prompt: str) -> AsyncIterator[str]:
+        """Async counterpart of stream_text."""
+        metrics = self._start_stream_metrics()
+        error = None
+        scheduler = self._scheduler()
+        try:
+            async with scheduler.aslot(INTERACTIVE) if scheduler is not None else contextlib.nullcontext():
+                async for chunk in self.build_model(metrics.url).astream(prompt):
+                    text = _chunk_text(chunk)
+                    metrics.record(chunk, text)
+                    if text:
+                        yield text
+        except Exception as e:
+            error = e
+            logger.exception("Error streaming text.")
+            raise
+        finally:
+            # Also runs when the caller stops iterating early.
+            metrics.finish(error)
+            self._record_stream(prompt, metrics)
+
 
 # Standalone usage example
 if __name__ == "__main__":
@@ -234,5 +884,11 @@ if __name__ == "__main__":
     response = llm.generate_text(sample_prompt)
     print("Generated Text:")
     print(response)
+
+    print("Streamed Text:")
+    for piece in llm.stream_text(sample_prompt):
+        print(piece, end="", flush=True)
+    print()
+    print("Stream metrics:", llm.stream_metrics[-1].as_dict())
 # This code is designed to be run as a standalone script for testing purposes.
 # In a production environment, you would typically integrate this class into a larger application.
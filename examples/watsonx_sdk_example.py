@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -6,6 +7,12 @@ from ibm_watsonx_ai import APIClient, Credentials
 from ibm_watsonx_ai.foundation_models import ModelInference
 from ibm_watsonx_ai.metanames import GenTextParamsMetaNames as GenParams
 
+# Make the repository's shared helpers importable when run as examples/watsonx_sdk_example.py.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from watsonx_agent_client.model_catalog import get_model_router
+from watsonx_agent_client.response_cache import ResponseCache
+from watsonx_agent_client.scheduler import get_scheduler
+
 # Load .env
 load_dotenv()
 
@@ -31,8 +38,10 @@ credentials = Credentials(
 # Optional: create and reuse client
 client = APIClient(credentials=credentials, project_id=project_id)
 
-# Set model and prompt
-model_id = "ibm/granite-13b-instruct-v2"
+# Set model and prompt: WATSONX_MODEL_ID, or a text generation model picked from the model catalog
+model_id = os.getenv("WATSONX_MODEL_ID") or get_model_router().choose(
+    "text_generation", output_tokens=200, preferred=["ibm/granite-13b-instruct-v2"]
+)
 prompt = "Write a short story about a robot who wants to be a painter."
 
 # Define parameters using MetaNames
@@ -48,11 +57,22 @@ model = ModelInference(
     project_id=project_id
 )
 
-# Run inference
-response = model.generate_text(
-    prompt=prompt,
-    params=parameters
-)
+# Run inference, reusing a cached response when WATSONX_RESPONSE_CACHE is set
+# (greedy decoding is deterministic, so repeated runs get the same text).
+response_cache = ResponseCache.from_env()
+
+def generate():
+    # The project's scheduler rate-limits the call and retries it when watsonx.ai throttles (429).
+    return get_scheduler(project_id).call(
+        model.generate_text,
+        prompt=prompt,
+        params=parameters
+    )
+
+if response_cache is not None:
+    response = response_cache.cached_call(model_id, parameters, prompt, generate)
+else:
+    response = generate()
 
 # Output
 print("Model response:", response)
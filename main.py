@@ -1,8 +1,13 @@
+import json
 import os
-import subprocess
-from flask import Flask, render_template_string, request, redirect, url_for
+import threading
+from flask import Flask, Response, jsonify, render_template_string, request, redirect, url_for
 from jinja2 import DictLoader
 
+from watsonx_agent_client import metrics
+from watsonx_agent_client.interpreter_pool import InterpreterPool
+from watsonx_agent_client.run_manager import RunManager, TooManyRuns
+
 # Create Flask app and use "assets" as the static folder for background image.
 app = Flask(__name__, static_folder="assets")
 
@@ -117,6 +122,25 @@ def select_venv(filename):
     # Default to base environment if no framework-specific keyword is found.
     return os.path.join(os.getcwd(), ".venv", "bin", "python")
 
+# Pre-warmed worker processes per virtualenv, so running an example skips the interpreter
+# start-up and framework imports.
+interpreter_pool = InterpreterPool()
+
+def record_stream_run(path, summary):
+    """Export the outcome and duration of a streamed run."""
+    if summary["cancelled"]:
+        outcome = "cancelled"
+    elif summary["timed_out"]:
+        outcome = "timeout"
+    else:
+        outcome = "ok" if summary["returncode"] == 0 else "failed"
+    example = os.path.basename(path)
+    metrics.EXAMPLE_RUNS.inc(example=example, mode="stream", outcome=outcome)
+    metrics.EXAMPLE_RUN_SECONDS.observe(summary["duration"], example=example, mode="stream")
+
+# Background runs whose output is streamed to the browser; at most 4 run at the same time.
+run_manager = RunManager(max_concurrent_runs=4, timeout=30, on_exit=record_stream_run)
+
 @app.route("/")
 def index():
     files = get_example_files()
@@ -144,27 +168,30 @@ def view_example(filename):
         return f"File {filename} not found.", 404
 
     if request.method == "POST":
+        timing = None
         try:
             python_executable = select_venv(filename)
-            result = subprocess.run(
-                [python_executable, filepath],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            output = result.stdout if result.returncode == 0 else result.stderr
+            result = interpreter_pool.run(python_executable, filepath, timeout=30)
+            output = result["stdout"] if result["returncode"] == 0 else result["stderr"]
+            timing = f"Queue wait: {result['queue_wait']:.2f}s, execution: {result['exec_time']:.2f}s"
+            outcome = "ok" if result["returncode"] == 0 else "failed"
+            metrics.EXAMPLE_RUN_SECONDS.observe(result["exec_time"], example=filename, mode="pool")
+            metrics.EXAMPLE_QUEUE_SECONDS.observe(result["queue_wait"], example=filename)
         except Exception as e:
             output = f"Error running the example: {e}"
+            outcome = "error"
+        metrics.EXAMPLE_RUNS.inc(example=filename, mode="pool", outcome=outcome)
         run_template = """
         {% extends "base.html" %}
         {% block content %}
           <h2>{{ filename.replace('_example.py','').replace('_', ' ') | title }} - Output</h2>
+          {% if timing %}<p>{{ timing }}</p>{% endif %}
           <div class="output">{{ output }}</div>
           <br>
           <a href="{{ url_for('index') }}">Back to examples</a>
         {% endblock %}
         """
-        return render_template_string(run_template, filename=filename, output=output)
+        return render_template_string(run_template, filename=filename, output=output, timing=timing)
 
     with open(filepath, "r", encoding="utf-8") as f:
         code = f.read()
@@ -176,12 +203,125 @@ def view_example(filename):
       <pre>{{ code }}</pre>
       <form method="post">
          <button type="submit">Run Example</button>
+         <button type="button" id="stream-button">Stream Example</button>
+         <button type="button" id="cancel-button" disabled>Cancel</button>
       </form>
+      <div class="output" id="stream-output" style="display: none"></div>
       <br>
       <a href="{{ url_for('index') }}">Back to examples</a>
+      <script>
+        const output = document.getElementById("stream-output");
+        const streamButton = document.getElementById("stream-button");
+        const cancelButton = document.getElementById("cancel-button");
+        let cancelUrl = null;
+
+        function append(text) {
+          output.textContent += text + "\n";
+        }
+
+        function finish() {
+          streamButton.disabled = false;
+          cancelButton.disabled = true;
+        }
+
+        streamButton.addEventListener("click", async () => {
+          output.style.display = "block";
+          output.textContent = "";
+          streamButton.disabled = true;
+          const response = await fetch("{{ url_for('start_run', filename=filename) }}", {method: "POST"});
+          const run = await response.json();
+          if (!response.ok) {
+            append(run.error);
+            finish();
+            return;
+          }
+          cancelUrl = run.cancel_url;
+          cancelButton.disabled = false;
+          const source = new EventSource(run.stream_url);
+          source.addEventListener("stdout", (event) => append(event.data));
+          source.addEventListener("stderr", (event) => append(event.data));
+          source.addEventListener("exit", (event) => {
+            const summary = JSON.parse(event.data);
+            const status = summary.cancelled ? "cancelled" : summary.timed_out ? "timed out" : "exit code " + summary.returncode;
+            append("[" + status + " after " + summary.duration.toFixed(2) + "s]");
+            source.close();
+            finish();
+          });
+          source.onerror = () => {
+            source.close();
+            finish();
+          };
+        });
+
+        cancelButton.addEventListener("click", () => {
+          if (cancelUrl) {
+            fetch(cancelUrl, {method: "POST"});
+          }
+        });
+      </script>
     {% endblock %}
     """
     return render_template_string(view_template, filename=filename, code=code)
 
+@app.route("/run/<filename>", methods=["POST"])
+def start_run(filename):
+    """Start an example in the background and return the URLs to stream or cancel it."""
+    filepath = os.path.join(EXAMPLES_DIR, filename)
+    if not os.path.exists(filepath):
+        return jsonify(error=f"File {filename} not found."), 404
+    try:
+        run_id = run_manager.start(select_venv(filename), filepath)
+    except TooManyRuns as e:
+        return jsonify(error=f"{e}, try again shortly."), 429
+    except Exception as e:
+        return jsonify(error=f"Error running the example: {e}"), 500
+    return jsonify(
+        run_id=run_id,
+        stream_url=url_for("stream_run", run_id=run_id),
+        cancel_url=url_for("cancel_run", run_id=run_id),
+    )
+
+@app.route("/stream/<run_id>")
+def stream_run(run_id):
+    """Forward the output of a run as server-sent events while the example produces it."""
+    if run_manager.describe(run_id) is None:
+        return f"Run {run_id} not found.", 404
+
+    def generate():
+        finished = False
+        try:
+            for event, data in run_manager.events(run_id):
+                if event == "keepalive":
+                    yield ": keepalive\n\n"
+                    continue
+                if event == "exit":
+                    finished = True
+                    data = json.dumps(data)
+                yield f"event: {event}\ndata: {data}\n\n"
+        finally:
+            # The browser went away before the example finished: stop it.
+            if not finished:
+                run_manager.cancel(run_id)
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.route("/cancel/<run_id>", methods=["POST"])
+def cancel_run(run_id):
+    """Cancel a running example."""
+    return jsonify(cancelled=run_manager.cancel(run_id))
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """Expose runner and model-call metrics of this process in the Prometheus text format."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
+    # The debug reloader runs this file twice; only warm workers in the serving process.
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        venvs = sorted({select_venv(file) for file in get_example_files()})
+        threading.Thread(target=interpreter_pool.warm, args=(venvs,), daemon=True).start()
     app.run(debug=True)
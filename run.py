@@ -1,6 +1,14 @@
+import argparse
+import json
 import os
 import subprocess
 import logging
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 
 # Configure logging to output info and errors with timestamps.
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s]: %(message)s')
@@ -41,41 +49,257 @@ def select_venv(filename):
             return os.path.join(os.getcwd(), venv, "bin", "python")
     return os.path.join(os.getcwd(), ".venv", "bin", "python")
 
-def run_example(example_file):
+def _parse_import_time(stderr):
     """
-    Run the provided example using the appropriate virtual environment.
-    Logs the output or errors accordingly.
+    Split "-X importtime" lines out of a script's stderr.
+
+    Returns:
+      A (total_import_seconds, remaining_stderr) tuple. The total is the sum of the
+      cumulative times of the top-level imports.
+    """
+    total_us = 0
+    remaining = []
+    for line in stderr.splitlines(keepends=True):
+        if not line.startswith("import time:"):
+            remaining.append(line)
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        # Top-level imports are indented by exactly one space; nested ones by more.
+        if parts[2].startswith(" ") and not parts[2].startswith("  "):
+            total_us += int(parts[1])
+    return total_us / 1e6, "".join(remaining)
+
+def _wait_with_rusage(process, timeout):
+    """
+    Wait for a child process and return its resource usage.
+
+    Returns:
+      A (rusage, timed_out) tuple. The process is killed if it runs longer than timeout.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        pid, status, rusage = os.wait4(process.pid, os.WNOHANG)
+        if pid:
+            process.returncode = os.waitstatus_to_exitcode(status)
+            return rusage, False
+        if time.monotonic() >= deadline:
+            process.kill()
+            _, status, rusage = os.wait4(process.pid, 0)
+            process.returncode = os.waitstatus_to_exitcode(status)
+            return rusage, True
+        time.sleep(0.02)
+
+def measure_example(example_file, timeout=30):
+    """
+    Run an example in its virtual environment and measure it.
+
+    Returns:
+      A dict with the example name, status ("passed", "failed", "timeout" or "error"),
+      return code, wall time, CPU time, peak RSS, import time, stdout and stderr.
     """
     interpreter = select_venv(example_file)
     full_path = os.path.join(os.getcwd(), EXAMPLES_DIR, example_file)
-    logging.info("Running '%s' using interpreter: %s", full_path, interpreter)
-
+    result = {
+        "example": example_file,
+        "interpreter": interpreter,
+        "status": "error",
+        "returncode": None,
+        "wall_time": 0.0,
+        "cpu_time": 0.0,
+        "peak_rss_mb": 0.0,
+        "import_time": 0.0,
+        "stdout": "",
+        "stderr": "",
+    }
+    start = time.perf_counter()
     try:
-        result = subprocess.run(
-            [interpreter, full_path],
-            capture_output=True,
+        process = subprocess.Popen(
+            [interpreter, "-X", "importtime", full_path],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
             text=True,
-            timeout=30
         )
-        if result.returncode == 0:
-            logging.info("SUCCESS: '%s' executed successfully.", full_path)
-            logging.info("Output:\n%s", result.stdout)
-        else:
-            logging.error("ERROR: '%s' encountered an error (return code %s).", full_path, result.returncode)
-            logging.error("Error output:\n%s", result.stderr)
-    except subprocess.TimeoutExpired:
-        logging.error("TIMEOUT: '%s' did not complete within the timeout period.", full_path)
     except Exception as e:
-        logging.exception("EXCEPTION: An error occurred while running '%s': %s", full_path, str(e))
+        result["stderr"] = str(e)
+        return result
+
+    # Drain both pipes in threads so a chatty example cannot block on a full pipe.
+    output = {}
+    readers = [
+        threading.Thread(target=lambda name, stream: output.__setitem__(name, stream.read()), args=(name, stream))
+        for name, stream in (("stdout", process.stdout), ("stderr", process.stderr))
+    ]
+    for reader in readers:
+        reader.start()
+    rusage, timed_out = _wait_with_rusage(process, timeout)
+    for reader in readers:
+        reader.join()
+    result["wall_time"] = time.perf_counter() - start
+
+    # ru_maxrss is in KiB on Linux and in bytes on macOS.
+    rss_unit = 1 if sys.platform == "darwin" else 1024
+    result["cpu_time"] = rusage.ru_utime + rusage.ru_stime
+    result["peak_rss_mb"] = rusage.ru_maxrss * rss_unit / (1024 * 1024)
+    result["import_time"], result["stderr"] = _parse_import_time(output.get("stderr", ""))
+    result["stdout"] = output.get("stdout", "")
+    result["returncode"] = process.returncode
+    if timed_out:
+        result["status"] = "timeout"
+    else:
+        result["status"] = "passed" if process.returncode == 0 else "failed"
+    return result
+
+def run_example(example_file, timeout=30):
+    """
+    Run the provided example using the appropriate virtual environment.
+    Logs the output or errors accordingly.
+
+    Returns:
+      The measurement dict produced by measure_example.
+    """
+    full_path = os.path.join(os.getcwd(), EXAMPLES_DIR, example_file)
+    logging.info("Running '%s' using interpreter: %s", full_path, select_venv(example_file))
+
+    result = measure_example(example_file, timeout)
+    if result["status"] == "passed":
+        logging.info("SUCCESS: '%s' executed successfully.", full_path)
+        logging.info("Output:\n%s", result["stdout"])
+    elif result["status"] == "failed":
+        logging.error("ERROR: '%s' encountered an error (return code %s).", full_path, result["returncode"])
+        logging.error("Error output:\n%s", result["stderr"])
+    elif result["status"] == "timeout":
+        logging.error("TIMEOUT: '%s' did not complete within the timeout period.", full_path)
+    else:
+        logging.error("EXCEPTION: An error occurred while running '%s': %s", full_path, result["stderr"])
+    logging.info(
+        "TIMING: '%s' wall %.2fs, cpu %.2fs, peak rss %.1f MB, imports %.2fs",
+        example_file, result["wall_time"], result["cpu_time"], result["peak_rss_mb"], result["import_time"],
+    )
+    return result
+
+def write_json_report(path, report):
+    """Write the run report as JSON."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    logging.info("JSON report written to %s", path)
+
+def write_junit_report(path, report):
+    """Write the run report as a JUnit XML test suite, one test case per example."""
+    results = report["results"]
+    suite = ET.Element(
+        "testsuite",
+        name="examples",
+        tests=str(len(results)),
+        failures=str(sum(r["status"] == "failed" for r in results)),
+        errors=str(sum(r["status"] in ("timeout", "error") for r in results)),
+        skipped=str(sum(r["status"] == "skipped" for r in results)),
+        time=f"{report['total_wall_time']:.3f}",
+        timestamp=report["started"],
+    )
+    for r in results:
+        case = ET.SubElement(suite, "testcase", classname="examples", name=r["example"], time=f"{r['wall_time']:.3f}")
+        properties = ET.SubElement(case, "properties")
+        for key in ("cpu_time", "peak_rss_mb", "import_time"):
+            ET.SubElement(properties, "property", name=key, value=f"{r[key]:.3f}")
+        if r["status"] == "failed":
+            ET.SubElement(case, "failure", message=f"return code {r['returncode']}").text = r["stderr"]
+        elif r["status"] == "timeout":
+            ET.SubElement(case, "error", message="timeout").text = r["stderr"]
+        elif r["status"] == "error":
+            ET.SubElement(case, "error", message="could not start").text = r["stderr"]
+        elif r["status"] == "skipped":
+            ET.SubElement(case, "skipped", message="file not found")
+        if r["stdout"]:
+            ET.SubElement(case, "system-out").text = r["stdout"]
+    ET.ElementTree(suite).write(path, encoding="utf-8", xml_declaration=True)
+    logging.info("JUnit report written to %s", path)
+
+# Absolute growth below which a relative change is treated as noise (seconds, or MB for RSS).
+REGRESSION_NOISE_FLOOR = {"wall_time": 0.5, "cpu_time": 0.5, "peak_rss_mb": 10.0}
+
+def compare_reports(previous_path, report, threshold=0.2):
+    """
+    Log per-example changes against a previous JSON report and flag regressions.
+
+    An example regresses when it stopped passing, or its wall time, CPU time or peak RSS
+    grew by more than threshold (20% by default) and by more than the noise floor in
+    REGRESSION_NOISE_FLOOR.
+
+    Returns:
+      The list of regressed example names.
+    """
+    with open(previous_path, encoding="utf-8") as f:
+        previous = {r["example"]: r for r in json.load(f)["results"]}
+    regressions = []
+    for r in report["results"]:
+        old = previous.get(r["example"])
+        if old is None:
+            continue
+        changes = []
+        regressed = old["status"] == "passed" and r["status"] != "passed"
+        for key in ("wall_time", "cpu_time", "peak_rss_mb", "import_time"):
+            if old[key] > 0:
+                delta = (r[key] - old[key]) / old[key]
+                changes.append(f"{key} {delta:+.0%}")
+                floor = REGRESSION_NOISE_FLOOR.get(key)
+                regressed = regressed or (floor is not None and delta > threshold and r[key] - old[key] > floor)
+        level = logging.WARNING if regressed else logging.INFO
+        logging.log(level, "COMPARE: '%s' %s -> %s, %s", r["example"], old["status"], r["status"], ", ".join(changes))
+        if regressed:
+            regressions.append(r["example"])
+    return regressions
 
 def main():
-    # Loop through each example file and run it.
+    parser = argparse.ArgumentParser(description="Run the framework examples and report how they perform.")
+    parser.add_argument("--parallel", action="store_true", help="Run the examples at the same time.")
+    parser.add_argument("--workers", type=int, default=len(example_files), help="Examples run at once with --parallel.")
+    parser.add_argument("--timeout", type=int, default=30, help="Seconds each example may run.")
+    parser.add_argument("--report-json", help="Write a JSON report to this path.")
+    parser.add_argument("--report-junit", help="Write a JUnit XML report to this path.")
+    parser.add_argument("--compare", help="Previous JSON report to compare this run against.")
+    args = parser.parse_args()
+
+    runnable, results = [], []
     for file in example_files:
         full_path = os.path.join(os.getcwd(), EXAMPLES_DIR, file)
         if os.path.exists(full_path):
-            run_example(file)
+            runnable.append(file)
         else:
             logging.warning("File '%s' does not exist in '%s'. Skipping.", file, EXAMPLES_DIR)
+            results.append({
+                "example": file, "interpreter": select_venv(file), "status": "skipped", "returncode": None,
+                "wall_time": 0.0, "cpu_time": 0.0, "peak_rss_mb": 0.0, "import_time": 0.0, "stdout": "", "stderr": "",
+            })
+
+    started = datetime.now(timezone.utc).isoformat()
+    start = time.perf_counter()
+    if args.parallel:
+        # Each example is its own process in its own venv; the threads only wait on them.
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+            results.extend(executor.map(lambda file: run_example(file, args.timeout), runnable))
+    else:
+        # Loop through each example file and run it.
+        for file in runnable:
+            results.append(run_example(file, args.timeout))
+    total_wall_time = time.perf_counter() - start
+
+    results.sort(key=lambda r: example_files.index(r["example"]))
+    report = {
+        "started": started,
+        "parallel": args.parallel,
+        "workers": args.workers if args.parallel else 1,
+        "total_wall_time": total_wall_time,
+        "results": results,
+    }
+    logging.info("Finished %s examples in %.2fs", len(runnable), total_wall_time)
+    if args.report_json:
+        write_json_report(args.report_json, report)
+    if args.report_junit:
+        write_junit_report(args.report_junit, report)
+    if args.compare and compare_reports(args.compare, report):
+        sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
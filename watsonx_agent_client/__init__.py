@@ -0,0 +1,66 @@
+"""
+watsonx_agent_client
+
+Shared helpers used by the examples, the embeddings module and the check scripts.
+
+Importing the package is cheap: the names below are resolved on first access, so the SDK,
+numpy and the framework modules are only imported when a helper that needs them is used.
+
+    from watsonx_agent_client import get_client, WatsonxEmbeddings
+
+Use python -m benchmarks.bench_import_time to measure the start-up cost of the entry points.
+"""
+
+import importlib
+
+# Public name -> module that defines it.
+_LAZY_ATTRIBUTES = {
+    "ClientPool": "watsonx_agent_client.client_pool",
+    "get_client": "watsonx_agent_client.client_pool",
+    "get_token": "watsonx_agent_client.client_pool",
+    "load_credentials": "watsonx_agent_client.client_pool",
+    "ResponseCache": "watsonx_agent_client.response_cache",
+    "SemanticCache": "watsonx_agent_client.semantic_cache",
+    "Scheduler": "watsonx_agent_client.scheduler",
+    "get_scheduler": "watsonx_agent_client.scheduler",
+    "INTERACTIVE": "watsonx_agent_client.scheduler",
+    "BATCH": "watsonx_agent_client.scheduler",
+    "ModelCatalog": "watsonx_agent_client.model_catalog",
+    "ModelRouter": "watsonx_agent_client.model_catalog",
+    "get_catalog": "watsonx_agent_client.model_catalog",
+    "get_model_router": "watsonx_agent_client.model_catalog",
+    "RegionRouter": "watsonx_agent_client.region_router",
+    "get_router": "watsonx_agent_client.region_router",
+    "MessageLog": "watsonx_agent_client.graph_state",
+    "ConversationMemory": "watsonx_agent_client.graph_state",
+    "FileCheckpointer": "watsonx_agent_client.graph_state",
+    "Step": "watsonx_agent_client.dependency_runner",
+    "run_steps": "watsonx_agent_client.dependency_runner",
+    "InterpreterPool": "watsonx_agent_client.interpreter_pool",
+    "RunManager": "watsonx_agent_client.run_manager",
+    "MockWatsonxServer": "watsonx_agent_client.mock_server",
+    "WatsonxEmbeddings": "embeddings.watsonx_embeddings",
+    "EmbeddingCache": "embeddings.embedding_cache",
+    "VectorIndex": "embeddings.vector_index",
+}
+
+# Spelled out so linters and IDEs can read it; keep it in sync with _LAZY_ATTRIBUTES.
+__all__ = [
+    "ClientPool", "get_client", "get_token", "load_credentials", "ResponseCache", "SemanticCache",
+    "Scheduler", "get_scheduler", "INTERACTIVE", "BATCH", "ModelCatalog", "ModelRouter",
+    "get_catalog", "get_model_router", "RegionRouter", "get_router", "MessageLog",
+    "ConversationMemory", "FileCheckpointer", "Step", "run_steps", "InterpreterPool", "RunManager",
+    "MockWatsonxServer", "WatsonxEmbeddings", "EmbeddingCache", "VectorIndex",
+]
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    # Cache it so later lookups skip __getattr__.
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
@@ -0,0 +1,202 @@
+"""
+client_pool.py
+
+This module provides a process-wide registry of authenticated IBM Watsonx API clients.
+Clients are keyed by (url, project_id, credentials), so every embedder, check or example
+that talks to the same project reuses one APIClient and its keep-alive connections instead
+of building a new one. The IAM bearer token of each client is exchanged once and refreshed
+by a background thread shortly before it expires.
+
+ibm_watsonx_ai and requests are imported on first use, so importing this module (e.g. only
+for load_credentials) does not pay for the SDK.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+IAM_TOKEN_URL = "https://iam.cloud.ibm.com/identity/token"
+
+# Refresh a token when this fraction of its lifetime is left (but never later than 60 seconds before expiry).
+REFRESH_MARGIN_RATIO = 0.1
+MIN_REFRESH_MARGIN = 60
+
+_env_lock = threading.Lock()
+_env_loaded = False
+
+def load_credentials():
+    """
+    Load the .env file once per process and return the configured credentials.
+
+    :return: A (url, project_id, api_key) tuple read from IBM_CLOUD_URL,
+        IBM_CLOUD_PROJECT_ID and IBM_CLOUD_API_KEY.
+    """
+    global _env_loaded
+    with _env_lock:
+        if not _env_loaded:
+            load_dotenv()
+            _env_loaded = True
+    return os.getenv("IBM_CLOUD_URL"), os.getenv("IBM_CLOUD_PROJECT_ID"), os.getenv("IBM_CLOUD_API_KEY")
+
+class _PoolEntry:
+    """Holds one shared client together with the state of its bearer token."""
+
+    def __init__(self, url, project_id, api_key):
+        self.url = url
+        self.project_id = project_id
+        self.api_key = api_key
+        self.client = None
+        self.token = None
+        self.expires_at = 0.0
+        self.refresh_at = 0.0
+        self.lock = threading.Lock()
+
+class ClientPool:
+    def __init__(self, iam_url=None, session=None):
+        """
+        Create an empty client pool.
+
+        :param iam_url: IAM token endpoint. Defaults to IBM_CLOUD_IAM_URL or the public IBM Cloud IAM.
+        :param session: Optional requests.Session used for token exchanges.
+        """
+        self.iam_url = iam_url or os.getenv("IBM_CLOUD_IAM_URL", IAM_TOKEN_URL)
+        self._session = session
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._refresher = None
+
+    @property
+    def session(self):
+        """The requests.Session used for token exchanges, created on first use."""
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        return self._session
+
+    @staticmethod
+    def _make_key(url, project_id, api_key):
+        # Only a digest of the API key is kept in the registry key.
+        digest = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()
+        return (url, project_id, digest)
+
+    def get_client(self, url=None, project_id=None, api_key=None):
+        """
+        Return the shared APIClient for the given credentials, creating it on first use.
+
+        Missing arguments fall back to the values from the .env file.
+
+        :param url: The watsonx.ai service URL.
+        :param project_id: The watsonx.ai project ID.
+        :param api_key: The IBM Cloud API key.
+        :return: An authenticated APIClient shared by every caller with the same credentials.
+        """
+        entry = self._get_entry(url, project_id, api_key)
+        with entry.lock:
+            if entry.client is None:
+                from ibm_watsonx_ai import APIClient, Credentials
+
+                self._refresh_token(entry)
+                # IBM_CLOUD_PLATFORM_URL marks a URL the SDK does not know (e.g. the mock server) as IBM Cloud.
+                platform_url = os.getenv("IBM_CLOUD_PLATFORM_URL")
+                if platform_url:
+                    credentials = Credentials(url=entry.url, token=entry.token, platform_url=platform_url)
+                else:
+                    credentials = Credentials(url=entry.url, token=entry.token)
+                entry.client = APIClient(credentials, project_id=entry.project_id)
+        return entry.client
+
+    def get_token(self, url=None, project_id=None, api_key=None):
+        """
+        Return a valid IAM bearer token for the given credentials, exchanging the API key if needed.
+
+        :return: The raw access token (without the "Bearer " prefix).
+        """
+        entry = self._get_entry(url, project_id, api_key)
+        with entry.lock:
+            if entry.token is None or time.time() >= entry.expires_at:
+                self._refresh_token(entry)
+            return entry.token
+
+    def _get_entry(self, url, project_id, api_key):
+        env_url, env_project_id, env_api_key = load_credentials()
+        url = url or env_url
+        project_id = project_id or env_project_id
+        api_key = api_key or env_api_key
+        key = self._make_key(url, project_id, api_key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _PoolEntry(url, project_id, api_key)
+                self._entries[key] = entry
+                self._ensure_refresher()
+            return entry
+
+    def _refresh_token(self, entry):
+        """Exchange the API key for a new bearer token. Must be called with entry.lock held."""
+        response = self.session.post(
+            self.iam_url,
+            data={"grant_type": "urn:ibm:params:oauth:grant-type:apikey", "apikey": entry.api_key},
+            headers={"Accept": "application/json"},
+            timeout=30,
+        )
+        response.raise_for_status()
+        data = response.json()
+        now = time.time()
+        lifetime = float(data.get("expires_in", 3600))
+        margin = max(MIN_REFRESH_MARGIN, lifetime * REFRESH_MARGIN_RATIO)
+        entry.token = data["access_token"]
+        entry.expires_at = float(data.get("expiration", now + lifetime))
+        entry.refresh_at = max(now, entry.expires_at - margin)
+        if entry.client is not None:
+            entry.client.set_token(entry.token)
+        with self._wakeup:
+            self._wakeup.notify()
+
+    def _ensure_refresher(self):
+        """Start the background refresh thread. Must be called with self._lock held."""
+        if self._refresher is None or not self._refresher.is_alive():
+            self._refresher = threading.Thread(target=self._refresh_loop, name="watsonx-token-refresher", daemon=True)
+            self._refresher.start()
+
+    def _refresh_loop(self):
+        """Refresh every token that is about to expire, then sleep until the next one is due."""
+        while True:
+            with self._wakeup:
+                entries = list(self._entries.values())
+                due = [entry.refresh_at for entry in entries if entry.token is not None]
+                delay = min(due) - time.time() if due else None
+                if delay is None or delay > 0:
+                    self._wakeup.wait(timeout=delay)
+                    continue
+            for entry in entries:
+                if entry.token is None or time.time() < entry.refresh_at:
+                    continue
+                with entry.lock:
+                    try:
+                        self._refresh_token(entry)
+                    except Exception:
+                        # Retry shortly; the current token stays valid until expires_at.
+                        logger.exception("Background token refresh failed for %s", entry.url)
+                        entry.refresh_at = time.time() + 30
+
+    def clear(self):
+        """Drop every cached client, e.g. after credentials were rotated."""
+        with self._lock:
+            self._entries.clear()
+
+_default_pool = ClientPool()
+
+def get_client(url=None, project_id=None, api_key=None):
+    """Return the shared APIClient from the process-wide pool. See ClientPool.get_client."""
+    return _default_pool.get_client(url=url, project_id=project_id, api_key=api_key)
+
+def get_token(url=None, project_id=None, api_key=None):
+    """Return a valid bearer token from the process-wide pool. See ClientPool.get_token."""
+    return _default_pool.get_token(url=url, project_id=project_id, api_key=api_key)
@@ -0,0 +1,284 @@
+"""
+graph_state.py
+
+Conversation state for long-running LangGraph workflows whose cost per turn has to stay
+bounded.
+
+- MessageLog is an append-only message list. Appending to the latest version shares the
+  underlying storage instead of copying it, so a node returning its new messages costs
+  O(new messages) rather than O(history). append_messages is the matching reducer.
+- ConversationMemory decides what is sent to the model: the last messages that fit a message
+  and character budget, preceded by a running summary of everything older. Messages are
+  summarized in blocks: only when the window overflows, and then down to half of it, so
+  the summarizer runs about once every max_messages / 2 turns instead of on every turn.
+- FileCheckpointer persists each thread to a JSON Lines file in local storage, appending only
+  the messages added since the last save.
+- message_node wraps a node function for the StateGraph(dict) workflow of the examples.
+
+It only uses the standard library; messages can be LangChain message objects, (role,
+content) tuples or plain strings.
+
+    memory = ConversationMemory(max_messages=12, summarize=summarize)
+    workflow.add_node("generate", message_node(lambda messages, state: llm.invoke(messages), memory, checkpointer))
+"""
+
+import json
+import os
+import re
+import threading
+
+class _Store:
+    """The shared backing list of the MessageLog versions of one conversation."""
+
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.lock = threading.Lock()
+
+class MessageLog:
+    def __init__(self, messages=(), summary=None, summarized=0):
+        """
+        Create a message log.
+
+        :param messages: Initial messages.
+        :param summary: Summary of the first `summarized` messages, maintained by ConversationMemory.
+        :param summarized: Number of leading messages covered by summary.
+        """
+        self._store = _Store(messages)
+        self._length = len(self._store.messages)
+        self.summary = summary
+        self.summarized = summarized
+
+    @classmethod
+    def _view(cls, store, length, summary, summarized):
+        log = cls.__new__(cls)
+        log._store = store
+        log._length = length
+        log.summary = summary
+        log.summarized = summarized
+        return log
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        store = self._store.messages
+        return (store[i] for i in range(self._length))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            return self._store.messages[start:stop:step]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("MessageLog index out of range")
+        return self._store.messages[index]
+
+    def __reduce__(self):
+        # Pickle (e.g. by a LangGraph checkpointer) the visible messages only, without the lock.
+        return (MessageLog, (self[:], self.summary, self.summarized))
+
+    def __repr__(self):
+        return f"MessageLog({len(self)} messages, {self.summarized} summarized)"
+
+    def append(self, *messages):
+        """Return a new version of the log with messages added; this version is unchanged."""
+        return self.extend(messages)
+
+    def extend(self, messages):
+        """Return a new version of the log with the messages of an iterable added."""
+        messages = list(messages)
+        with self._store.lock:
+            if self._length == len(self._store.messages):
+                # This is the latest version: share the storage.
+                self._store.messages.extend(messages)
+                return self._view(self._store, len(self._store.messages), self.summary, self.summarized)
+        # An older version branches off: copy it once.
+        return MessageLog(self[:] + messages, self.summary, self.summarized)
+
+    def with_summary(self, summary, summarized):
+        """Return the same messages with a new running summary covering the first `summarized` ones."""
+        return self._view(self._store, self._length, summary, summarized)
+
+def append_messages(left, right):
+    """
+    Reducer merging a node's new messages into the log, for use as
+    Annotated[MessageLog, append_messages] in typed LangGraph states.
+
+    :param left: The current log, a list, or None.
+    :param right: A message, a list of messages, or a MessageLog that extends left.
+    """
+    if left is None:
+        left = MessageLog()
+    elif not isinstance(left, MessageLog):
+        left = MessageLog(left)
+    if right is None:
+        return left
+    if isinstance(right, MessageLog):
+        if right._store is left._store and len(right) >= len(left):
+            return right
+        right = right[:]
+    elif not isinstance(right, list):
+        right = [right]
+    return left.extend(right)
+
+def message_content(message):
+    """Return the text of a LangChain message, a (role, content) tuple or a string."""
+    if isinstance(message, tuple):
+        return str(message[1])
+    content = getattr(message, "content", message)
+    return content if isinstance(content, str) else str(content)
+
+def message_role(message):
+    if isinstance(message, tuple):
+        return message[0]
+    return getattr(message, "type", "human")
+
+class ConversationMemory:
+    def __init__(self, max_messages=20, max_chars=None, keep_first=0, summarize=None,
+                 summary_message=lambda summary: ("system", f"Summary of the earlier conversation: {summary}")):
+        """
+        Configure how much of the history is sent with each model call.
+
+        :param max_messages: Most recent messages sent per call. With summarize, an overflowing
+            window is summarized down to max_messages // 2 messages.
+        :param max_chars: Upper bound of the characters of those messages, or None; halved the same way.
+        :param keep_first: Leading messages always sent, e.g. 1 for a system prompt.
+        :param summarize: Optional callable summarize(previous_summary, messages) returning a new summary
+            string that also covers messages; without it, older messages are simply dropped.
+        :param summary_message: Builds the message carrying the summary, sent after the first kept messages.
+        """
+        self.max_messages = max_messages
+        self.max_chars = max_chars
+        self.keep_first = keep_first
+        self.summarize = summarize
+        self.summary_message = summary_message
+
+    def _window_start(self, log, bound, max_messages, max_chars):
+        """Index of the first of the last messages after bound that fit the budget; the last message always does."""
+        start = len(log)
+        chars = 0
+        while start > bound and len(log) - start < max_messages:
+            size = len(message_content(log[start - 1]))
+            if max_chars is not None and chars + size > max_chars and start < len(log):
+                break
+            chars += size
+            start -= 1
+        return start
+
+    def prompt(self, log):
+        """
+        Select the messages to send for the next call.
+
+        :return: A (messages, log) tuple; log carries the updated summary when older messages were summarized.
+        """
+        first = min(self.keep_first, len(log))
+        bound = max(first, log.summarized)
+        start = self._window_start(log, bound, self.max_messages, self.max_chars)
+        if self.summarize is not None and start > bound:
+            # Summarize a whole block at once, leaving room for the next turns.
+            start = self._window_start(
+                log, bound, max(1, self.max_messages // 2), self.max_chars // 2 if self.max_chars is not None else None
+            )
+            log = log.with_summary(self.summarize(log.summary, log[bound:start]), start)
+        messages = log[:first]
+        if log.summary:
+            messages.append(self.summary_message(log.summary))
+        messages.extend(log[max(first, start):])
+        return messages, log
+
+class FileCheckpointer:
+    def __init__(self, directory=None, dump=None, load=None):
+        """
+        Persist message logs per thread as append-only JSON Lines files.
+
+        :param directory: Where to keep the files; defaults to WATSONX_GRAPH_STATE_DIR or
+            ~/.cache/watsonx_agent_client/graph_state.
+        :param dump: Callable turning a message into a JSON-serializable value; defaults to
+            {"role", "content"} dicts.
+        :param load: Inverse of dump; defaults to (role, content) tuples, which LangChain
+            chat models accept as messages.
+        """
+        self.directory = directory or os.getenv(
+            "WATSONX_GRAPH_STATE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "watsonx_agent_client", "graph_state")
+        )
+        self.dump = dump or (lambda message: {"role": message_role(message), "content": message_content(message)})
+        self.load_message = load or (lambda data: (data["role"], data["content"]))
+        # Messages and summary already written per thread.
+        self._saved = {}
+        self._lock = threading.Lock()
+
+    def _path(self, thread_id):
+        return os.path.join(self.directory, re.sub(r"[^A-Za-z0-9_.-]", "_", str(thread_id)) + ".jsonl")
+
+    def load(self, thread_id):
+        """Return the saved log of a thread, or an empty log."""
+        messages = []
+        summary, summarized = None, 0
+        try:
+            with open(self._path(thread_id), encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A torn last line from an interrupted write.
+                        continue
+                    if "summary" in record:
+                        summary, summarized = record["summary"], record["summarized"]
+                    else:
+                        messages.append(self.load_message(record["message"]))
+        except FileNotFoundError:
+            pass
+        log = MessageLog(messages, summary, summarized)
+        with self._lock:
+            self._saved[thread_id] = (len(log), summary)
+        return log
+
+    def save(self, thread_id, log):
+        """Append the messages (and summary) added to log since the last save or load of the thread."""
+        with self._lock:
+            saved, saved_summary = self._saved.get(thread_id, (None, None))
+            if saved is None:
+                saved = self._count_saved(thread_id)
+            records = [{"message": self.dump(message)} for message in log[saved:]]
+            if log.summary != saved_summary and log.summary is not None:
+                records.append({"summary": log.summary, "summarized": log.summarized})
+            if records:
+                os.makedirs(self.directory, exist_ok=True)
+                with open(self._path(thread_id), "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(record) + "\n" for record in records))
+            self._saved[thread_id] = (max(saved, len(log)), log.summary)
+
+    def _count_saved(self, thread_id):
+        try:
+            with open(self._path(thread_id), encoding="utf-8") as f:
+                return sum(1 for line in f if line.startswith('{"message"'))
+        except FileNotFoundError:
+            return 0
+
+def message_node(generate, memory=None, checkpointer=None, key="messages"):
+    """
+    Wrap a node function for a StateGraph(dict) workflow.
+
+    The wrapped function receives the windowed messages and the state and returns only the
+    new message(s); the node appends them to the log without copying the history. With a
+    checkpointer, the log is saved under state["thread_id"] after every call.
+
+    :param generate: Callable generate(messages, state) returning a message or a list of messages.
+    :param memory: ConversationMemory selecting the messages to send; defaults to the whole log.
+    :param checkpointer: Optional FileCheckpointer.
+    :param key: State key holding the messages.
+    """
+    def node(state):
+        log = append_messages(state.get(key), None)
+        if memory is not None:
+            messages, log = memory.prompt(log)
+        else:
+            messages = log[:]
+        log = append_messages(log, generate(messages, state))
+        if checkpointer is not None and state.get("thread_id") is not None:
+            checkpointer.save(state["thread_id"], log)
+        # A StateGraph(dict) node output replaces the whole state, so pass the other keys on.
+        return {**state, key: log}
+
+    return node
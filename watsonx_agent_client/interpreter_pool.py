@@ -0,0 +1,297 @@
+"""
+interpreter_pool.py
+
+This module keeps a pool of pre-warmed Python worker processes per virtual environment.
+Each worker (see warm_worker.py) has the heavy framework modules of its venv imported
+already and runs example scripts sent to it over a pipe, so running an example no longer
+pays the interpreter start-up and import cost.
+
+workers_per_venv workers are kept warm per venv; when they are all busy, more are started
+on demand up to max_workers_per_venv, so concurrent runs do not queue behind each other.
+Workers are recycled after a number of jobs, when their memory grows too much, when a job
+leaves threads running, or when a job times out. A worker found dead is replaced, and a job
+it never received is sent to another worker. The last lines a worker wrote to stderr are
+logged when it dies. Every result reports how long the job waited for a free worker
+separately from how long it ran. Metrics the script recorded in the worker are added to the
+registry of this process.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import select
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+from watsonx_agent_client import metrics
+
+logger = logging.getLogger(__name__)
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "warm_worker.py")
+
+# Heavy imports to preload, keyed by the same venv names used by select_venv in main.py.
+DEFAULT_PRELOADS = {
+    ".venv_beeai": ["beeai_framework.backend.chat", "beeai_framework.workflows.agent"],
+    ".venv_langflow": ["langflow.base.models.model", "langchain_ibm"],
+    ".venv_watsonx_sdk": ["ibm_watsonx_ai", "ibm_watsonx_ai.foundation_models"],
+    ".venv_langraph": ["langgraph.graph", "langchain_ibm", "langchain.schema"],
+    ".venv": ["langchain_ibm", "dotenv"],
+}
+
+class WorkerError(Exception):
+    """Raised when a worker dies or does not answer in time."""
+
+class _WorkerGone(WorkerError):
+    """Raised when a worker exited before it received a job, so the job can go to another one."""
+
+class _Worker:
+    """One long-lived worker process and its bookkeeping."""
+
+    def __init__(self, python_executable, preloads, start_timeout):
+        self.python_executable = python_executable
+        self.process = subprocess.Popen(
+            [python_executable, WORKER_SCRIPT, *preloads],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+        )
+        # Job output is captured inside the worker; its own stderr only carries crashes and
+        # stray fd-level writes, of which the tail is kept for the error message.
+        self.stderr_tail = deque(maxlen=20)
+        self._stderr_reader = threading.Thread(target=self._drain_stderr, daemon=True)
+        self._stderr_reader.start()
+        self.jobs = 0
+        # Set from a job result when the worker asks to be replaced.
+        self.recycle_reason = None
+        try:
+            ready = self._read(start_timeout)
+        except BaseException:
+            # Do not leave a half-started worker (or a zombie) behind.
+            self.stop()
+            raise
+        self.baseline_rss = ready.get("rss", 0)
+        self.rss = self.baseline_rss
+        logger.info(
+            "Worker %s ready for %s in %.2fs (preloaded: %s)",
+            self.process.pid, python_executable, ready.get("import_time", 0.0), ", ".join(ready.get("preloaded", [])),
+        )
+
+    def _drain_stderr(self):
+        for line in self.process.stderr:
+            self.stderr_tail.append(line.rstrip("\n"))
+        self.process.stderr.close()
+
+    def describe_exit(self):
+        """Return the exit code and the last stderr lines of a dead worker."""
+        # Let the stderr reader catch up with the traceback the worker printed last.
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            pass
+        self._stderr_reader.join(timeout=1)
+        tail = "\n".join(self.stderr_tail)
+        return f"Worker {self.process.pid} exited with code {self.process.returncode}" + (f":\n{tail}" if tail else "")
+
+    def _read(self, timeout):
+        readable, _, _ = select.select([self.process.stdout], [], [], timeout)
+        if not readable:
+            raise WorkerError(f"Worker {self.process.pid} did not answer within {timeout}s")
+        line = self.process.stdout.readline()
+        if not line:
+            raise WorkerError(self.describe_exit())
+        return json.loads(line)
+
+    def run(self, path, timeout):
+        try:
+            self.process.stdin.write(json.dumps({"path": path}) + "\n")
+            self.process.stdin.flush()
+        except OSError as e:
+            raise _WorkerGone(self.describe_exit()) from e
+        result = self._read(timeout)
+        self.jobs += 1
+        self.rss = result.get("rss", self.rss)
+        self.recycle_reason = result.pop("recycle", None)
+        return result
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def stop(self):
+        if self.alive():
+            self.process.kill()
+        self.process.wait()
+
+class InterpreterPool:
+    def __init__(self, workers_per_venv=1, max_workers_per_venv=4, max_jobs=50, max_rss_growth_mb=512,
+                 start_timeout=120, preloads=None):
+        """
+        Create a pool. Workers are started lazily, or up front with warm().
+
+        :param workers_per_venv: Number of worker processes warm() starts and keeps per interpreter.
+        :param max_workers_per_venv: Number of workers per interpreter that may run at once;
+            the ones beyond workers_per_venv are started when every worker is busy.
+        :param max_jobs: Recycle a worker after it has run this many jobs.
+        :param max_rss_growth_mb: Recycle a worker whose resident memory grew by more than this since start-up.
+        :param start_timeout: Seconds to wait for a new worker to finish its preloads.
+        :param preloads: Mapping of venv directory name to modules to import; defaults to DEFAULT_PRELOADS.
+        """
+        self.workers_per_venv = workers_per_venv
+        self.max_workers_per_venv = max(workers_per_venv, max_workers_per_venv)
+        self.max_jobs = max_jobs
+        self.max_rss_growth = max_rss_growth_mb * 1024 * 1024
+        self.start_timeout = start_timeout
+        self.preloads = DEFAULT_PRELOADS if preloads is None else preloads
+        self._idle = {}
+        self._started = {}
+        self._lock = threading.Lock()
+        atexit.register(self.shutdown)
+
+    def _preloads_for(self, python_executable):
+        # .../<venv>/bin/python -> <venv>
+        venv = os.path.basename(os.path.dirname(os.path.dirname(python_executable)))
+        return self.preloads.get(venv, [])
+
+    def _idle_queue(self, python_executable):
+        with self._lock:
+            if python_executable not in self._idle:
+                self._idle[python_executable] = queue.Queue()
+                self._started[python_executable] = 0
+            return self._idle[python_executable]
+
+    def _start_worker(self, python_executable):
+        return _Worker(python_executable, self._preloads_for(python_executable), self.start_timeout)
+
+    def _acquire(self, python_executable, timeout):
+        """
+        Take an idle worker, starting a new one if every worker of the venv is busy and it has
+        fewer than max_workers_per_venv. Workers that died while idle are replaced.
+        """
+        idle = self._idle_queue(python_executable)
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                worker = idle.get_nowait()
+            except queue.Empty:
+                worker = None
+            if worker is None:
+                with self._lock:
+                    can_start = self._started[python_executable] < self.max_workers_per_venv
+                    if can_start:
+                        self._started[python_executable] += 1
+                if can_start:
+                    try:
+                        return self._start_worker(python_executable)
+                    except Exception:
+                        with self._lock:
+                            self._started[python_executable] -= 1
+                        raise
+                try:
+                    worker = idle.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    raise WorkerError(f"No worker for {python_executable} became free within {timeout}s") from None
+            if worker.alive():
+                return worker
+            logger.warning("Replacing idle worker. %s", worker.describe_exit())
+            self._discard(worker)
+
+    def _discard(self, worker):
+        worker.stop()
+        with self._lock:
+            self._started[worker.python_executable] -= 1
+
+    def _release(self, worker, healthy):
+        """Return a worker to the pool, or replace it if it should be recycled."""
+        recycle = (
+            not healthy
+            or not worker.alive()
+            or worker.jobs >= self.max_jobs
+            or worker.rss - worker.baseline_rss > self.max_rss_growth
+            or worker.recycle_reason is not None
+        )
+        if not recycle:
+            self._idle_queue(worker.python_executable).put(worker)
+            return
+        logger.info(
+            "Recycling worker %s after %s jobs (rss %.1f MB%s)", worker.process.pid, worker.jobs, worker.rss / 1e6,
+            f", {worker.recycle_reason}" if worker.recycle_reason else "",
+        )
+        self._discard(worker)
+        # Warm the replacement in the background so the next job does not pay for it.
+        threading.Thread(target=self.warm, args=([worker.python_executable],), daemon=True).start()
+
+    def warm(self, python_executables):
+        """Start workers for the given interpreters up to workers_per_venv each."""
+        for python_executable in python_executables:
+            if not os.path.exists(python_executable):
+                continue
+            idle = self._idle_queue(python_executable)
+            while True:
+                with self._lock:
+                    if self._started[python_executable] >= self.workers_per_venv:
+                        break
+                    self._started[python_executable] += 1
+                try:
+                    idle.put(self._start_worker(python_executable))
+                except Exception:
+                    logger.exception("Could not start a worker for %s", python_executable)
+                    with self._lock:
+                        self._started[python_executable] -= 1
+                    break
+
+    def run(self, python_executable, path, timeout=30):
+        """
+        Run a script in a warm worker of the given interpreter.
+
+        :param python_executable: Interpreter of the venv the script needs.
+        :param path: Path of the script to run.
+        :param timeout: Seconds the script may run; the worker is killed and replaced after that.
+        :return: A dict with returncode, stdout, stderr, queue_wait, exec_time and worker_pid.
+        :raises WorkerError: If no worker became free in time, or the worker died or timed out.
+        """
+        path = os.path.abspath(path)
+        queued = time.perf_counter()
+        for attempt in range(2):
+            worker = self._acquire(python_executable, timeout)
+            queue_wait = time.perf_counter() - queued
+            healthy = False
+            try:
+                result = worker.run(path, timeout)
+                healthy = True
+                break
+            except _WorkerGone:
+                # The worker died before it read the job, so running it elsewhere is safe.
+                if attempt:
+                    raise
+                logger.warning("Worker %s was gone; retrying the job in another worker", worker.process.pid)
+            finally:
+                self._release(worker, healthy)
+        metrics.merge(result.pop("metrics", None))
+        result["queue_wait"] = queue_wait
+        result["worker_pid"] = worker.process.pid
+        return result
+
+    def shutdown(self):
+        """Stop every idle worker."""
+        with self._lock:
+            idle_queues = list(self._idle.values())
+        for idle in idle_queues:
+            while True:
+                try:
+                    idle.get_nowait().stop()
+                except queue.Empty:
+                    break
+
+if __name__ == "__main__":
+    # Quick check with the current interpreter: python -m watsonx_agent_client.interpreter_pool <script.py>
+    pool = InterpreterPool()
+    for _ in range(3):
+        outcome = pool.run(sys.executable, sys.argv[1])
+        print(f"returncode={outcome['returncode']} queue_wait={outcome['queue_wait']:.3f}s exec_time={outcome['exec_time']:.3f}s")
+    pool.shutdown()
@@ -0,0 +1,274 @@
+"""
+metrics.py
+
+This module collects in-process metrics of the model calls and the example runner, and
+renders them in the Prometheus text exposition format for the /metrics route of main.py.
+
+It is a small dependency-free registry of labelled counters and histograms. Recording is
+a dictionary update under a lock; with WATSONX_METRICS=0 every record call returns
+immediately, so instrumented code pays next to nothing when metrics are disabled.
+
+Example scripts run in other processes (warm workers and streamed runs). Their values are
+taken with snapshot(reset=True), sent to the runner and added to its registry with merge():
+a warm worker returns the snapshot with each job result, and a script started with
+WATSONX_METRICS_EXPORT set appends its snapshot to that file when it exits.
+"""
+
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+ENABLED = os.getenv("WATSONX_METRICS", "1") != "0"
+
+# Latency buckets in seconds, from cache hits to long generations.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{_escape(value)}"' for name, value in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _label_key(values):
+    # Label values are kept as strings (None as ""), so keys from callers and from merged
+    # JSON snapshots are the same and always sort.
+    return tuple("" if value is None else str(value) for value in values)
+
+class Counter:
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0, **labels):
+        if not ENABLED:
+            return
+        key = _label_key(labels.get(name) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels):
+        key = _label_key(labels.get(name) for name in self.labels)
+        with self._lock:
+            return self._values.get(key, 0.0)
+
+    def snapshot(self, reset=False):
+        with self._lock:
+            items = [[list(key), value] for key, value in self._values.items()]
+            if reset:
+                self._values = {}
+        return items
+
+    def merge(self, items):
+        with self._lock:
+            for key, value in items:
+                key = _label_key(key)
+                self._values[key] = self._values.get(key, 0.0) + value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {value:g}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (non-cumulative, last one is +Inf), sum].
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        if not ENABLED:
+            return
+        key = _label_key(labels.get(name) for name in self.labels)
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def snapshot(self, reset=False):
+        with self._lock:
+            items = [[list(key), list(counts), total] for key, (counts, total) in self._values.items()]
+            if reset:
+                self._values = {}
+        return items
+
+    def merge(self, items):
+        with self._lock:
+            for key, counts, total in items:
+                if len(counts) != len(self.buckets) + 1:
+                    # Recorded with other buckets, e.g. by another version of this module.
+                    continue
+                entry = self._values.setdefault(_label_key(key), [[0] * (len(self.buckets) + 1), 0.0])
+                entry[0] = [a + b for a, b in zip(entry[0], counts)]
+                entry[1] += total
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else f"{bound:g}"
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, [('le', le)])} {cumulative}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {total:g}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+REQUEST_SECONDS = Histogram(
+    "watsonx_request_duration_seconds", "Duration of watsonx.ai calls, including retries.",
+    ("component", "operation", "model"),
+)
+REQUESTS = Counter(
+    "watsonx_requests_total", "watsonx.ai calls by outcome.",
+    ("component", "operation", "model", "outcome"),
+)
+TOKENS = Counter(
+    "watsonx_tokens_total", "Tokens reported by the service.",
+    ("component", "model", "direction"),
+)
+BYTES = Counter(
+    "watsonx_bytes_total", "Payload bytes sent to and received from the service (text and vectors).",
+    ("component", "direction"),
+)
+TIME_TO_FIRST_TOKEN = Histogram(
+    "watsonx_time_to_first_token_seconds", "Time to the first chunk of streamed generations.",
+    ("model",),
+)
+CACHE_LOOKUPS = Counter(
+    "watsonx_cache_lookups_total", "Cache lookups by result (hit, miss, bypass or error).",
+    ("cache", "result"),
+)
+EXAMPLE_RUNS = Counter(
+    "watsonx_example_runs_total", "Example runs of the web runner by outcome.",
+    ("example", "mode", "outcome"),
+)
+EXAMPLE_RUN_SECONDS = Histogram(
+    "watsonx_example_run_seconds", "Execution time of example runs.",
+    ("example", "mode"),
+)
+EXAMPLE_QUEUE_SECONDS = Histogram(
+    "watsonx_example_queue_wait_seconds", "Time example runs waited for a warm worker.",
+    ("example",),
+)
+
+REGISTRY = [
+    REQUEST_SECONDS, REQUESTS, TOKENS, BYTES, TIME_TO_FIRST_TOKEN, CACHE_LOOKUPS,
+    EXAMPLE_RUNS, EXAMPLE_RUN_SECONDS, EXAMPLE_QUEUE_SECONDS,
+]
+
+def record_request(component, operation, model, seconds, ok):
+    """Record the duration and outcome of one call."""
+    if not ENABLED:
+        return
+    REQUEST_SECONDS.observe(seconds, component=component, operation=operation, model=model)
+    REQUESTS.inc(component=component, operation=operation, model=model, outcome="ok" if ok else "error")
+
+def record_payload(component, model=None, bytes_out=0, bytes_in=0, tokens_in=None, tokens_out=None):
+    """
+    Record payload sizes and token counts of one call.
+
+    :param bytes_out: Bytes sent to the service.
+    :param bytes_in: Bytes received from the service.
+    :param tokens_in: Input tokens reported by the service, if any.
+    :param tokens_out: Output tokens reported by the service, if any.
+    """
+    if not ENABLED:
+        return
+    if bytes_out:
+        BYTES.inc(bytes_out, component=component, direction="out")
+    if bytes_in:
+        BYTES.inc(bytes_in, component=component, direction="in")
+    if tokens_in:
+        TOKENS.inc(tokens_in, component=component, model=model, direction="input")
+    if tokens_out:
+        TOKENS.inc(tokens_out, component=component, model=model, direction="output")
+
+def record_cache(cache, result, count=1):
+    """Count cache lookups; result is "hit", "miss", "bypass" or "error"."""
+    if count:
+        CACHE_LOOKUPS.inc(count, cache=cache, result=result)
+
+@contextmanager
+def track_request(component, operation, model):
+    """Time the enclosed call and record it with record_request; exceptions count as errors."""
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        record_request(component, operation, model, time.perf_counter() - start, ok)
+
+def snapshot(reset=False):
+    """
+    Return the recorded values as a JSON-serializable dict, for merge() in another process.
+
+    :param reset: Clear the values, so consecutive snapshots do not count anything twice.
+    """
+    return {metric.name: metric.snapshot(reset) for metric in REGISTRY}
+
+def merge(values):
+    """Add the values of a snapshot() taken in another process to this registry."""
+    if not ENABLED or not values:
+        return
+    for metric in REGISTRY:
+        if values.get(metric.name):
+            metric.merge(values[metric.name])
+
+def export(path):
+    """Append a snapshot of this process to a JSON Lines file and reset the values."""
+    values = snapshot(reset=True)
+    if any(values.values()):
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(values) + "\n")
+
+def merge_exported(path):
+    """Merge and delete the snapshots written to path by export()."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    merge(json.loads(line))
+                except ValueError:
+                    continue
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def render():
+    """Return every metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+if ENABLED and os.getenv("WATSONX_METRICS_EXPORT"):
+    atexit.register(export, os.environ["WATSONX_METRICS_EXPORT"])
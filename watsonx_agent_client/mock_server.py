@@ -0,0 +1,560 @@
+"""
+mock_server.py
+
+A local stand-in for the watsonx.ai REST API and the IBM Cloud IAM token endpoint, so the
+check scripts, examples and benchmarks can run without IBM Cloud credentials, in CI or on
+an air-gapped machine.
+
+Served routes:
+
+- POST /identity/token                     IAM API key -> bearer token exchange
+- GET  /ml/v1/foundation_model_specs       model list built from models.json
+- POST /ml/v1/text/generation              text generation
+- POST /ml/v1/text/generation_stream       text generation as server-sent events
+- POST /ml/v1/text/chat                    chat completion
+- POST /ml/v1/text/chat_stream             chat completion as server-sent events
+- POST /ml/v1/text/embeddings              embeddings (deterministic per input text)
+- GET  /v2/projects/{project_id}           project details, read when an APIClient is created
+- GET  /mock/stats                         request counters of the mock itself
+
+Latency, token rate, and 429/5xx error injection are configurable, and every random
+choice comes from a seeded generator so runs are reproducible. Start it with:
+
+    python -m watsonx_agent_client.mock_server --port 8080 --tls --latency lognormal:0.2:0.4 --tokens-per-second 40
+
+The REST clients of this repository (model_benchmark.py, check_models.py --mock and the
+benchmarks) talk to it over plain http://. The ibm_watsonx_ai SDK only accepts https:// URLs
+and treats every host it does not know as Cloud Pak for Data, so for APIClient-based code
+(client_pool.get_client, ModelInference) start the mock with --tls, which serves HTTPS with a
+self-signed certificate for localhost and 127.0.0.1 (created once with the openssl command
+line tool), and set:
+
+    IBM_CLOUD_URL=https://127.0.0.1:8080
+    IBM_CLOUD_PLATFORM_URL=https://127.0.0.1:8080
+    IBM_CLOUD_IAM_URL=https://127.0.0.1:8080/identity/token
+    REQUESTS_CA_BUNDLE=~/.cache/watsonx_agent_client/mock_tls/cert.pem
+    WX_CLIENT_VERIFY_REQUESTS=~/.cache/watsonx_agent_client/mock_tls/cert.pem
+
+REQUESTS_CA_BUNDLE makes the token exchange of client_pool trust the certificate and
+WX_CLIENT_VERIFY_REQUESTS does the same for the SDK. ChatWatsonx exchanges API keys with
+IBM Cloud IAM itself and cannot be pointed at the mock.
+"""
+
+import argparse
+import hashlib
+import ipaddress
+import json
+import math
+import os
+import random
+import ssl
+import subprocess
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from watsonx_agent_client.model_catalog import EMBEDDING_MODELS, MODELS_JSON, load_model_specs
+
+_WORDS = (
+    "watsonx model granite token stream latency answer data cloud agent graph flow prompt "
+    "vector search result context project region request response batch cache signal"
+).split()
+
+class LatencyDistribution:
+    """
+    Samples delays in seconds from a distribution described by a short spec string.
+
+    Supported specs: "fixed:S", "uniform:LOW:HIGH", "normal:MEAN:STD",
+    "lognormal:MEDIAN:SIGMA" and "exponential:MEAN". Negative samples are clamped to 0.
+    """
+
+    def __init__(self, spec, rng):
+        kind, *values = spec.split(":")
+        self.spec = spec
+        self.kind = kind
+        self.values = [float(v) for v in values]
+        self.rng = rng
+        expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exponential": 1}
+        if kind not in expected or len(self.values) != expected[kind]:
+            raise ValueError(f"Invalid latency spec {spec!r}")
+
+    def sample(self):
+        if self.kind == "fixed":
+            value = self.values[0]
+        elif self.kind == "uniform":
+            value = self.rng.uniform(*self.values)
+        elif self.kind == "normal":
+            value = self.rng.gauss(*self.values)
+        elif self.kind == "lognormal":
+            median, sigma = self.values
+            value = self.rng.lognormvariate(math.log(median) if median > 0 else 0.0, sigma)
+        else:
+            value = self.rng.expovariate(1.0 / self.values[0]) if self.values[0] > 0 else 0.0
+        return max(0.0, value)
+
+def _matches_filters(spec, filters):
+    """Apply the subset of the watsonx.ai "filters" syntax used in this repo, e.g. "function_text_chat,!lifecycle_withdrawn"."""
+    functions = {f["id"] for f in spec["functions"]}
+    lifecycle = {state["id"] for state in spec["lifecycle"]}
+    for term in filter(None, (t.strip() for t in filters.split(","))):
+        negate = term.startswith("!")
+        term = term.lstrip("!")
+        if term.startswith("function_"):
+            present = term[len("function_"):] in functions
+        elif term.startswith("lifecycle_"):
+            present = term[len("lifecycle_"):] in lifecycle
+        elif term.startswith("modelid_"):
+            present = spec["model_id"] == term[len("modelid_"):]
+        elif term.startswith("provider_"):
+            present = spec["provider"].lower() == term[len("provider_"):].lower()
+        else:
+            continue
+        if present == negate:
+            return False
+    return True
+
+def fake_embedding(text, dimension):
+    """Return a deterministic unit vector for text, so identical inputs always embed identically."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    vector = [rng.gauss(0.0, 1.0) for _ in range(dimension)]
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+def fake_tokens(prompt, count, seed=None):
+    """Return count deterministic words for a prompt (and optional sampling seed)."""
+    rng = random.Random(f"{prompt}\x00{seed}")
+    return [rng.choice(_WORDS) for _ in range(count)]
+
+class MockWatsonxServer:
+    def __init__(self, host="127.0.0.1", port=0, latency="fixed:0.05", tokens_per_second=50.0,
+                 rate_limit_rate=0.0, error_rate=0.0, concurrency_limit=None, retry_after=1,
+                 embedding_dimension=384, models_path=MODELS_JSON, seed=0, tls=False, certfile=None, keyfile=None):
+        """
+        Configure a mock watsonx.ai server. Call start() to serve in a background thread.
+
+        :param host: Interface to bind.
+        :param port: Port to bind; 0 picks a free port (see .url after start()).
+        :param latency: Latency spec for time to first byte, see LatencyDistribution.
+        :param tokens_per_second: Generation speed after the first token.
+        :param rate_limit_rate: Probability that a request is answered with 429.
+        :param error_rate: Probability that a request is answered with 500 or 503.
+        :param concurrency_limit: Requests beyond this many in flight get 429, like the real service.
+        :param retry_after: Value of the Retry-After header on 429 responses, in seconds.
+        :param embedding_dimension: Dimension of the returned embedding vectors.
+        :param models_path: models.json used for the model list.
+        :param seed: Seed for latency sampling and error injection.
+        :param tls: Serve HTTPS, which the ibm_watsonx_ai SDK requires. Without certfile, a
+            self-signed certificate is created, see self_signed_certificate.
+        :param certfile: PEM certificate to serve with tls.
+        :param keyfile: PEM private key of certfile.
+        """
+        self.host = host
+        self.port = port
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.latency = LatencyDistribution(latency, self.rng)
+        self.tokens_per_second = tokens_per_second
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.concurrency_limit = concurrency_limit
+        self.retry_after = retry_after
+        self.embedding_dimension = embedding_dimension
+        self.model_specs = load_model_specs(models_path)
+        self.models = {spec["model_id"]: spec for spec in self.model_specs}
+        self.stats = {"requests": 0, "rate_limited": 0, "errors": 0, "in_flight": 0, "by_path": {}}
+        self.stats_lock = threading.Lock()
+        self.tls = tls
+        self.certfile = certfile
+        self.keyfile = keyfile
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        """Base URL of the running server, e.g. https://127.0.0.1:8080."""
+        host, port = self._server.server_address[:2]
+        return f"{'https' if self.tls else 'http'}://{host}:{port}"
+
+    def _create_server(self):
+        server = ThreadingHTTPServer((self.host, self.port), _make_handler(self))
+        server.daemon_threads = True
+        if self.tls:
+            if self.certfile is None:
+                self.certfile, self.keyfile = self_signed_certificate()
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(self.certfile, self.keyfile)
+            server.socket = context.wrap_socket(server.socket, server_side=True)
+        return server
+
+    def start(self):
+        """Start serving in a daemon thread and return self."""
+        self._server = self._create_server()
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-watsonx", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the server."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def serve_forever(self):
+        """Serve in the current thread until interrupted."""
+        self._server = self._create_server()
+        self._server.serve_forever()
+
+    def sample_latency(self):
+        with self.rng_lock:
+            return self.latency.sample()
+
+    def draw_fault(self):
+        """Decide whether to inject a fault: returns None, 429, 500 or 503."""
+        with self.rng_lock:
+            draw = self.rng.random()
+            if draw < self.rate_limit_rate:
+                return 429
+            if draw < self.rate_limit_rate + self.error_rate:
+                return self.rng.choice((500, 503))
+        return None
+
+TLS_DIR = os.path.join(os.path.expanduser("~"), ".cache", "watsonx_agent_client", "mock_tls")
+
+def self_signed_certificate(directory=TLS_DIR, hosts=("localhost", "127.0.0.1")):
+    """
+    Return the (certfile, keyfile) paths of a self-signed certificate for hosts, creating it
+    with the openssl command line tool if it does not exist yet.
+
+    :raises RuntimeError: If openssl is not installed or fails.
+    """
+    certfile, keyfile = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    if os.path.exists(certfile) and os.path.exists(keyfile):
+        return certfile, keyfile
+    os.makedirs(directory, exist_ok=True)
+    names = []
+    for host in hosts:
+        try:
+            ipaddress.ip_address(host)
+            names.append(f"IP:{host}")
+        except ValueError:
+            names.append(f"DNS:{host}")
+    try:
+        subprocess.run(
+            ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "3650",
+             "-keyout", keyfile, "-out", certfile, "-subj", "/CN=watsonx-mock",
+             "-addext", f"subjectAltName={','.join(names)}"],
+            check=True, capture_output=True,
+        )
+    except (OSError, subprocess.CalledProcessError) as e:
+        raise RuntimeError(f"Could not create a self-signed certificate with openssl: {e}") from e
+    return certfile, keyfile
+
+def _make_handler(mock):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        # -- plumbing ---------------------------------------------------------------
+
+        def _send_json(self, status, payload, headers=None):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_error(self, status):
+            headers = {"Retry-After": str(mock.retry_after)} if status == 429 else None
+            code = {429: "too_many_requests", 500: "internal_server_error", 503: "service_unavailable"}.get(status, "error")
+            self._send_json(status, {"errors": [{"code": code, "message": f"Injected {status} by the mock server"}],
+                                     "status_code": status}, headers)
+
+        def _read_body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if not length:
+                return {}
+            content_type = self.headers.get("Content-Type", "")
+            raw = self.rfile.read(length).decode("utf-8")
+            if "application/x-www-form-urlencoded" in content_type:
+                return {key: values[0] for key, values in parse_qs(raw).items()}
+            return json.loads(raw)
+
+        def _start_stream(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+
+        def _send_event(self, event_id, payload):
+            self.wfile.write(f"id: {event_id}\nevent: message\ndata: {json.dumps(payload)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        def _dispatch(self, method):
+            parsed = urlparse(self.path)
+            routes = {
+                ("POST", "/identity/token"): self._token,
+                ("GET", "/ml/v1/foundation_model_specs"): self._model_specs,
+                ("POST", "/ml/v1/text/generation"): self._generation,
+                ("POST", "/ml/v1/text/generation_stream"): self._generation_stream,
+                ("POST", "/ml/v1/text/chat"): self._chat,
+                ("POST", "/ml/v1/text/chat_stream"): self._chat_stream,
+                ("POST", "/ml/v1/text/embeddings"): self._embeddings,
+                ("GET", "/mock/stats"): self._stats,
+            }
+            route = routes.get((method, parsed.path))
+            if route is None and method == "GET" and parsed.path.startswith("/v2/projects/"):
+                route = self._project
+            if route is None:
+                self._send_json(404, {"errors": [{"code": "not_found", "message": f"No route {method} {parsed.path}"}]})
+                return
+            query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+            if route in (self._stats, self._project):
+                # Bookkeeping routes are not counted and never fail.
+                route(query, {})
+                return
+
+            with mock.stats_lock:
+                mock.stats["requests"] += 1
+                mock.stats["by_path"][parsed.path] = mock.stats["by_path"].get(parsed.path, 0) + 1
+                over_limit = mock.concurrency_limit is not None and mock.stats["in_flight"] >= mock.concurrency_limit
+                mock.stats["in_flight"] += 1
+            try:
+                body = self._read_body() if method == "POST" else {}
+                fault = 429 if over_limit else mock.draw_fault()
+                if fault is not None:
+                    with mock.stats_lock:
+                        mock.stats["rate_limited" if fault == 429 else "errors"] += 1
+                    self._send_error(fault)
+                    return
+                route(query, body)
+            finally:
+                with mock.stats_lock:
+                    mock.stats["in_flight"] -= 1
+
+        def do_GET(self):
+            self._dispatch("GET")
+
+        def do_POST(self):
+            self._dispatch("POST")
+
+        # -- routes -----------------------------------------------------------------
+
+        def _token(self, query, body):
+            if not body.get("apikey"):
+                self._send_json(400, {"errorCode": "BXNIM0415E", "errorMessage": "Provided API key could not be found."})
+                return
+            time.sleep(mock.sample_latency())
+            now = int(time.time())
+            self._send_json(200, {
+                "access_token": f"mock-{uuid.uuid4().hex}",
+                "refresh_token": "not_supported",
+                "token_type": "Bearer",
+                "expires_in": 3600,
+                "expiration": now + 3600,
+            })
+
+        def _model_specs(self, query, body):
+            resources = [spec for spec in mock.model_specs if _matches_filters(spec, query.get("filters", ""))]
+            limit = int(query.get("limit", 100))
+            start = int(query.get("start", 0))
+            payload = {"total_count": len(resources), "limit": limit, "resources": resources[start:start + limit]}
+            # Support conditional requests so clients can revalidate cached model lists cheaply.
+            etag = '"' + hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:32] + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self._send_json(200, payload, {"ETag": etag})
+
+        def _check_model(self, model_id, function):
+            spec = mock.models.get(model_id)
+            if spec is None or function not in {f["id"] for f in spec["functions"]}:
+                self._send_json(404, {"errors": [{"code": "model_not_supported",
+                                                  "message": f"Model '{model_id}' does not support {function}"}]})
+                return False
+            return True
+
+        @staticmethod
+        def _plan_generation(prompt, parameters):
+            count = int(parameters.get("max_new_tokens") or parameters.get("max_tokens") or 20)
+            seed = parameters.get("random_seed", parameters.get("seed"))
+            if parameters.get("decoding_method", "greedy") == "greedy" and seed is None:
+                seed = "greedy"
+            return fake_tokens(prompt, max(count, 1), seed)
+
+        def _generation_result(self, model_id, tokens, input_tokens, text):
+            return {
+                "model_id": model_id,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime()),
+                "results": [{
+                    "generated_text": text,
+                    "generated_token_count": len(tokens),
+                    "input_token_count": input_tokens,
+                    "stop_reason": "max_tokens",
+                }],
+            }
+
+        def _generation(self, query, body):
+            if not self._check_model(body.get("model_id"), "text_generation"):
+                return
+            prompt = body.get("input", "")
+            tokens = self._plan_generation(prompt, body.get("parameters") or {})
+            time.sleep(mock.sample_latency() + len(tokens) / mock.tokens_per_second)
+            self._send_json(200, self._generation_result(body["model_id"], tokens, len(prompt.split()), " ".join(tokens)))
+
+        def _generation_stream(self, query, body):
+            if not self._check_model(body.get("model_id"), "text_generation"):
+                return
+            prompt = body.get("input", "")
+            tokens = self._plan_generation(prompt, body.get("parameters") or {})
+            time.sleep(mock.sample_latency())
+            self._start_stream()
+            for i, token in enumerate(tokens):
+                if i:
+                    time.sleep(1.0 / mock.tokens_per_second)
+                payload = self._generation_result(body["model_id"], tokens[:i + 1], len(prompt.split()), (" " if i else "") + token)
+                payload["results"][0]["generated_token_count"] = i + 1
+                payload["results"][0]["stop_reason"] = "max_tokens" if i == len(tokens) - 1 else "not_finished"
+                self._send_event(i + 1, payload)
+
+        @staticmethod
+        def _chat_prompt(body):
+            parts = []
+            for message in body.get("messages", []):
+                content = message.get("content", "")
+                if isinstance(content, list):
+                    content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+                parts.append(str(content))
+            return "\n".join(parts)
+
+        def _chat_parameters(self, body):
+            return {
+                "max_tokens": body.get("max_tokens") or 20,
+                "seed": body.get("seed"),
+                "decoding_method": "sample" if (body.get("temperature") or 0) > 0 and body.get("seed") is None else "greedy",
+            }
+
+        def _chat(self, query, body):
+            if not self._check_model(body.get("model_id"), "text_chat"):
+                return
+            prompt = self._chat_prompt(body)
+            tokens = self._plan_generation(prompt, self._chat_parameters(body))
+            time.sleep(mock.sample_latency() + len(tokens) / mock.tokens_per_second)
+            self._send_json(200, {
+                "id": f"chat-{uuid.uuid4().hex}",
+                "model_id": body["model_id"],
+                "created": int(time.time()),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": " ".join(tokens)},
+                             "finish_reason": "length"}],
+                "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": len(tokens),
+                          "total_tokens": len(prompt.split()) + len(tokens)},
+            })
+
+        def _chat_stream(self, query, body):
+            if not self._check_model(body.get("model_id"), "text_chat"):
+                return
+            prompt = self._chat_prompt(body)
+            tokens = self._plan_generation(prompt, self._chat_parameters(body))
+            chat_id = f"chat-{uuid.uuid4().hex}"
+            time.sleep(mock.sample_latency())
+            self._start_stream()
+            for i, token in enumerate(tokens):
+                if i:
+                    time.sleep(1.0 / mock.tokens_per_second)
+                last = i == len(tokens) - 1
+                payload = {
+                    "id": chat_id,
+                    "model_id": body["model_id"],
+                    "created": int(time.time()),
+                    "choices": [{"index": 0, "delta": {"role": "assistant", "content": (" " if i else "") + token},
+                                 "finish_reason": "length" if last else None}],
+                }
+                if last:
+                    payload["usage"] = {"prompt_tokens": len(prompt.split()), "completion_tokens": len(tokens),
+                                        "total_tokens": len(prompt.split()) + len(tokens)}
+                self._send_event(i + 1, payload)
+
+        def _embeddings(self, query, body):
+            model_id = body.get("model_id") or EMBEDDING_MODELS[0]
+            if not self._check_model(model_id, "embedding"):
+                return
+            inputs = body.get("inputs", [])
+            time.sleep(mock.sample_latency())
+            self._send_json(200, {
+                "model_id": model_id,
+                "results": [{"embedding": fake_embedding(text, mock.embedding_dimension)} for text in inputs],
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime()),
+                "input_token_count": sum(len(text.split()) for text in inputs),
+            })
+
+        def _project(self, query, body):
+            # APIClient(project_id=...) reads the project's storage type when it is created.
+            project_id = urlparse(self.path).path.rsplit("/", 1)[-1]
+            self._send_json(200, {"metadata": {"guid": project_id}, "entity": {"name": "mock", "storage": {"type": "assetfiles"}}})
+
+        def _stats(self, query, body):
+            with mock.stats_lock:
+                self._send_json(200, json.loads(json.dumps(mock.stats)))
+
+    return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", default="fixed:0.05", help="Time to first byte, e.g. lognormal:0.2:0.4.")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="Generation speed after the first token.")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Probability of a 429 response.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of a 500/503 response.")
+    parser.add_argument("--concurrency-limit", type=int, default=None, help="Answer 429 above this many requests in flight.")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429 responses.")
+    parser.add_argument("--embedding-dimension", type=int, default=384)
+    parser.add_argument("--models", default=MODELS_JSON, help="Path of models.json.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tls", action="store_true", help="Serve HTTPS, which the ibm_watsonx_ai SDK requires.")
+    parser.add_argument("--certfile", default=None, help="PEM certificate for --tls; defaults to a self-signed one.")
+    parser.add_argument("--keyfile", default=None, help="PEM private key of --certfile.")
+    args = parser.parse_args()
+
+    mock = MockWatsonxServer(
+        host=args.host, port=args.port, latency=args.latency, tokens_per_second=args.tokens_per_second,
+        rate_limit_rate=args.rate_limit_rate, error_rate=args.error_rate, concurrency_limit=args.concurrency_limit,
+        retry_after=args.retry_after, embedding_dimension=args.embedding_dimension, models_path=args.models, seed=args.seed,
+        tls=args.tls, certfile=args.certfile, keyfile=args.keyfile,
+    )
+    scheme = "https" if args.tls else "http"
+    if args.tls and mock.certfile is None:
+        mock.certfile, mock.keyfile = self_signed_certificate()
+    print(f"Mock watsonx.ai listening on {scheme}://{args.host}:{args.port}")
+    print(f"  IBM_CLOUD_URL={scheme}://{args.host}:{args.port}")
+    print(f"  IBM_CLOUD_IAM_URL={scheme}://{args.host}:{args.port}/identity/token")
+    if args.tls:
+        print(f"  IBM_CLOUD_PLATFORM_URL={scheme}://{args.host}:{args.port}")
+        print(f"  REQUESTS_CA_BUNDLE={mock.certfile}")
+        print(f"  WX_CLIENT_VERIFY_REQUESTS={mock.certfile}")
+    try:
+        mock.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""
+model_benchmark.py
+
+Performance sweep over the model catalog, run by check_models.py --benchmark.
+
+Text generation models are called through the streaming REST endpoint for every
+combination of prompt length, output length and concurrency, recording the latency, time
+to first token and tokens per second of each request. Embedding models are called for
+every combination of batch size and concurrency, recording latency and vectors per second.
+Each combination is one result with p50/p95/p99 statistics; results are saved as JSON and
+can be compared with those of an earlier run to spot regressions.
+
+Requests go straight to the REST API with urllib rather than through the SDK, so the
+numbers do not include client-side overhead, and they work against the local mock server
+(watsonx_agent_client/mock_server.py) as well as a real region.
+"""
+
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+API_VERSION = "2024-09-16"
+
+_WORDS = (
+    "the model reads a long prompt about cloud data and answers with a short summary of the "
+    "main points so that the latency of each request can be measured under load"
+).split()
+
+def make_prompt(tokens):
+    """Return a prompt of roughly the given number of tokens (one word each)."""
+    return " ".join(_WORDS[i % len(_WORDS)] for i in range(tokens))
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def summarize(values):
+    """Return the p50, p95, p99 and mean of a list of samples, or None if there are none."""
+    if not values:
+        return None
+    return {
+        "p50": percentile(values, 0.50),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "mean": statistics.mean(values),
+    }
+
+class BenchmarkClient:
+    def __init__(self, url, project_id, token_provider, timeout=120.0):
+        """
+        Create a minimal REST client for the benchmark.
+
+        :param url: watsonx.ai base URL, or the URL of the mock server.
+        :param project_id: The watsonx.ai project ID.
+        :param token_provider: Callable returning a valid bearer token, e.g. a ClientPool's get_token.
+        :param timeout: Socket timeout of each request in seconds.
+        """
+        self.url = url
+        self.project_id = project_id
+        self.token_provider = token_provider
+        self.timeout = timeout
+
+    def _open(self, path, body, token):
+        request = urllib.request.Request(
+            f"{self.url}{path}?version={API_VERSION}",
+            data=json.dumps({**body, "project_id": self.project_id}).encode("utf-8"),
+            headers={
+                "Content-Type": "application/json",
+                "Accept": "application/json",
+                "Authorization": f"Bearer {token}",
+            },
+        )
+        return urllib.request.urlopen(request, timeout=self.timeout)
+
+    def generate(self, model_id, prompt, max_new_tokens):
+        """
+        Stream one greedy generation of exactly max_new_tokens tokens.
+
+        :return: A dict with latency, time_to_first_token, output_tokens and input_tokens.
+        """
+        body = {
+            "model_id": model_id,
+            "input": prompt,
+            "parameters": {"decoding_method": "greedy", "max_new_tokens": max_new_tokens, "min_new_tokens": max_new_tokens},
+        }
+        # The token is fetched before the clock starts, so an IAM exchange does not count as latency.
+        token = self.token_provider()
+        start = time.perf_counter()
+        first_token = None
+        result = {}
+        with self._open("/ml/v1/text/generation_stream", body, token) as response:
+            for raw in response:
+                line = raw.decode("utf-8").strip()
+                if not line.startswith("data:"):
+                    continue
+                results = json.loads(line[len("data:"):]).get("results") or [{}]
+                if first_token is None and results[0].get("generated_text"):
+                    first_token = time.perf_counter() - start
+                result = results[0]
+        return {
+            "latency": time.perf_counter() - start,
+            "time_to_first_token": first_token,
+            "output_tokens": result.get("generated_token_count") or 0,
+            "input_tokens": result.get("input_token_count"),
+        }
+
+    def embed(self, model_id, inputs):
+        """
+        Embed one batch of texts.
+
+        :return: A dict with latency and the number of vectors returned.
+        """
+        token = self.token_provider()
+        start = time.perf_counter()
+        with self._open("/ml/v1/text/embeddings", {"model_id": model_id, "inputs": inputs}, token) as response:
+            data = json.load(response)
+        return {"latency": time.perf_counter() - start, "vectors": len(data.get("results", []))}
+
+def run_concurrently(fn, requests, concurrency):
+    """
+    Call fn() requests times with at most concurrency calls in flight.
+
+    :return: A (samples, errors, wall_seconds) tuple; errors maps error names to counts.
+    """
+    samples = []
+    errors = {}
+    lock = threading.Lock()
+
+    def one():
+        try:
+            sample = fn()
+        except urllib.error.HTTPError as e:
+            name = f"HTTP {e.code}"
+        except Exception as e:
+            name = type(e).__name__
+        else:
+            with lock:
+                samples.append(sample)
+            return
+        with lock:
+            errors[name] = errors.get(name, 0) + 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(requests):
+            pool.submit(one)
+    return samples, errors, time.perf_counter() - start
+
+def benchmark_generation(client, model_id, prompt_tokens, output_tokens, concurrency, requests, on_sample=None,
+                         on_error=None):
+    """
+    Measure one text generation model at one prompt length, output length and concurrency.
+
+    :param on_sample: Optional callable on_sample(model_id, sample), e.g. to feed a ModelRouter.
+    :param on_error: Optional callable on_error(model_id, exception, seconds) for failed requests.
+    :return: A result dict, see the module docstring.
+    """
+    prompt = make_prompt(prompt_tokens)
+
+    def call():
+        start = time.perf_counter()
+        try:
+            sample = client.generate(model_id, prompt, output_tokens)
+        except Exception as e:
+            if on_error is not None:
+                on_error(model_id, e, time.perf_counter() - start)
+            raise
+        if on_sample is not None:
+            on_sample(model_id, sample)
+        return sample
+
+    samples, errors, wall = run_concurrently(call, max(requests, concurrency), concurrency)
+    # Decode rate: the first token arrives at time_to_first_token, so only the remaining
+    # output_tokens - 1 tokens are produced in the time after it.
+    rates = [
+        (s["output_tokens"] - 1) / (s["latency"] - s["time_to_first_token"])
+        for s in samples
+        if s["time_to_first_token"] is not None and s["output_tokens"] > 1 and s["latency"] > s["time_to_first_token"]
+    ]
+    total_tokens = sum(s["output_tokens"] for s in samples)
+    return {
+        "kind": "generation",
+        "model_id": model_id,
+        "prompt_tokens": prompt_tokens,
+        "output_tokens": output_tokens,
+        "concurrency": concurrency,
+        "requests": len(samples) + sum(errors.values()),
+        "errors": errors,
+        "latency": summarize([s["latency"] for s in samples]),
+        "time_to_first_token": summarize([s["time_to_first_token"] for s in samples if s["time_to_first_token"] is not None]),
+        "tokens_per_second": summarize(rates),
+        "throughput_tokens_per_second": total_tokens / wall if wall else None,
+        "wall_seconds": wall,
+    }
+
+def benchmark_embeddings(client, model_id, batch_size, concurrency, requests):
+    """Measure one embedding model at one batch size and concurrency; returns a result dict."""
+    inputs = [f"{make_prompt(16)} {i}" for i in range(batch_size)]
+    samples, errors, wall = run_concurrently(lambda: client.embed(model_id, inputs), max(requests, concurrency), concurrency)
+    return {
+        "kind": "embedding",
+        "model_id": model_id,
+        "batch_size": batch_size,
+        "concurrency": concurrency,
+        "requests": len(samples) + sum(errors.values()),
+        "errors": errors,
+        "latency": summarize([s["latency"] for s in samples]),
+        "vectors_per_second": sum(s["vectors"] for s in samples) / wall if wall else None,
+        "wall_seconds": wall,
+    }
+
+def result_key(result):
+    """Identify a result across runs by its kind, model and sweep parameters."""
+    if result["kind"] == "generation":
+        return ("generation", result["model_id"], result["prompt_tokens"], result["output_tokens"], result["concurrency"])
+    return ("embedding", result["model_id"], result["batch_size"], result["concurrency"])
+
+def format_result(result):
+    """Return one report line for a result."""
+    def ms(summary, key):
+        return f"{summary[key] * 1000:8.0f}" if summary else f"{'-':>8}"
+
+    latency = result["latency"]
+    errors = sum(result["errors"].values())
+    if result["kind"] == "generation":
+        rate = result["tokens_per_second"]
+        label = f"{result['model_id']} in={result['prompt_tokens']} out={result['output_tokens']} c={result['concurrency']}"
+        return (f"{label:<64} p50 {ms(latency, 'p50')} p95 {ms(latency, 'p95')} p99 {ms(latency, 'p99')} ms  "
+                f"ttft p50 {ms(result['time_to_first_token'], 'p50')} ms  "
+                f"{rate['p50'] if rate else 0:7.1f} tok/s  {result['throughput_tokens_per_second'] or 0:8.1f} tok/s total"
+                f"{f'  errors {errors}' if errors else ''}")
+    label = f"{result['model_id']} batch={result['batch_size']} c={result['concurrency']}"
+    return (f"{label:<64} p50 {ms(latency, 'p50')} p95 {ms(latency, 'p95')} p99 {ms(latency, 'p99')} ms  "
+            f"{result['vectors_per_second'] or 0:9.1f} vectors/s{f'  errors {errors}' if errors else ''}")
+
+# Metrics compared between runs: (path, True if higher is better).
+COMPARED_METRICS = [
+    (("latency", "p50"), False),
+    (("latency", "p95"), False),
+    (("time_to_first_token", "p50"), False),
+    (("throughput_tokens_per_second",), True),
+    (("vectors_per_second",), True),
+]
+
+def _lookup(result, path):
+    value = result
+    for key in path:
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+def error_rate(result):
+    """Share of the requests of a result that failed, or None if it made none."""
+    return sum(result["errors"].values()) / result["requests"] if result.get("requests") else None
+
+def compare_results(results, baseline, threshold=0.2, error_threshold=0.01):
+    """
+    Compare results with those of an earlier run.
+
+    A metric the earlier run measured but this one did not (e.g. no latency because every
+    request failed, or zero throughput) is always a regression; its new value and change are None.
+
+    :param results: Result dicts of this run.
+    :param baseline: Result dicts of the earlier run.
+    :param threshold: Relative change in the wrong direction that counts as a regression.
+    :param error_threshold: Increase of the error rate, in absolute terms, that counts as a regression.
+    :return: A (changes, regressions) tuple of lists of (result, metric, old value, new value, change)
+        entries: every compared metric, and the regressed ones. The change is relative, except
+        for "error_rate", where it is the difference of the two rates.
+    """
+    previous = {result_key(result): result for result in baseline}
+    changes = []
+    regressions = []
+    for result in results:
+        old = previous.get(result_key(result))
+        if old is None:
+            continue
+        old_rate, new_rate = error_rate(old), error_rate(result)
+        if old_rate is not None and new_rate is not None:
+            entry = (result, "error_rate", old_rate, new_rate, new_rate - old_rate)
+            changes.append(entry)
+            if new_rate - old_rate > error_threshold:
+                regressions.append(entry)
+        for path, higher_is_better in COMPARED_METRICS:
+            new_value, old_value = _lookup(result, path), _lookup(old, path)
+            if not old_value:
+                continue
+            if not new_value:
+                entry = (result, ".".join(path), old_value, None, None)
+                changes.append(entry)
+                regressions.append(entry)
+                continue
+            change = new_value / old_value - 1
+            entry = (result, ".".join(path), old_value, new_value, change)
+            changes.append(entry)
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append(entry)
+    return changes, regressions
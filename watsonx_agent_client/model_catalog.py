@@ -0,0 +1,419 @@
+"""
+model_catalog.py
+
+This module turns the model list into something the code can query. ModelCatalog is an
+in-memory registry of the foundation models with their capabilities (functions such as
+text_generation, text_chat or embedding), context length, lifecycle and the regions they
+were seen in, indexed by function and provider. It is loaded once from models.json and can
+be refreshed from the foundation_model_specs endpoint of a region or from the model ids
+returned by WatsonxLLM.fetch_models.
+
+ModelRouter picks a model from declared constraints (task, context size, maximum latency)
+using the latency, time to first token and throughput it has measured for each model:
+
+    router = get_model_router()
+    model_id = router.choose("text_chat", context_tokens=3000, output_tokens=300, max_latency=5.0)
+    ...
+    router.record(model_id, seconds, output_tokens=usage["output_tokens"])
+
+It only uses the standard library. List the catalog from the command line with:
+
+    python -m watsonx_agent_client.model_catalog --task text_chat --min-context 32768
+"""
+
+import argparse
+import datetime
+import json
+import os
+import re
+import threading
+import urllib.parse
+import urllib.request
+
+MODELS_JSON = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models.json")
+
+# Embedding models are not listed in models.json; the first one is the WatsonxEmbeddings default.
+EMBEDDING_MODELS = ["ibm/watsonx-embedding-model", "ibm/slate-30m-english-rtrvr", "ibm/slate-125m-english-rtrvr"]
+
+SPECS_PATH = "/ml/v1/foundation_model_specs"
+
+def guess_functions(model_id):
+    """Infer the functions of a model from its name, for models without a spec."""
+    name = model_id.lower()
+    if model_id in EMBEDDING_MODELS or "rtrvr" in name or "embedding" in name:
+        return ["embedding"]
+    if "ttm" in name:
+        return ["time_series_forecast"]
+    functions = ["text_generation"]
+    if any(word in name for word in ("instruct", "chat", "mistral-large", "pixtral", "deepseek")):
+        functions.append("text_chat")
+    if "vision" in name or "pixtral" in name:
+        functions.append("image_chat")
+    return functions
+
+def guess_context_length(model_id):
+    """Infer the maximum sequence length of a model from its name, for models without a spec."""
+    name = model_id.lower()
+    if model_id in EMBEDDING_MODELS or "rtrvr" in name:
+        return 512
+    if "llama-3" in name or "granite-3-" in name or "mistral-large" in name or "pixtral" in name:
+        return 131072
+    if "mixtral" in name or "mistral-small" in name:
+        return 32768
+    if "flan" in name or "mt0" in name:
+        return 4096
+    return 8192
+
+def load_model_specs(path=MODELS_JSON):
+    """
+    Build foundation_model_specs resources from models.json plus the embedding models.
+
+    Capabilities and context lengths are inferred from the model names, which is good
+    enough for a stand-in but not authoritative; refresh the catalog from a region for
+    the real values.
+
+    :return: A list of spec dicts shaped like the watsonx.ai API resources.
+    """
+    with open(path, encoding="utf-8") as f:
+        catalog = json.load(f)
+    entries = [(provider, model_id) for provider, models in catalog["available_models"].items() for model_id in models.values()]
+    entries += [("ibm", model_id) for model_id in EMBEDDING_MODELS]
+    return [spec_from_id(model_id, provider, catalog["latest_update"]["date"]) for provider, model_id in entries]
+
+def normalize_provider(name):
+    """
+    Return the models.json form of a provider name, so that names from the API and from
+    models.json index the same models: "Mistral AI" and "mistral_ai" both become "mistral_ai".
+    """
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+def spec_from_id(model_id, provider=None, available_since=None):
+    """Build a spec dict for a bare model id, with guessed functions and context length."""
+    return {
+        "model_id": model_id,
+        "label": model_id.split("/")[-1],
+        "provider": provider or model_id.split("/")[0],
+        "functions": [{"id": function} for function in guess_functions(model_id)],
+        "model_limits": {"max_sequence_length": guess_context_length(model_id)},
+        "lifecycle": [{"id": "available", "start_date": available_since or "1970-01-01"}],
+    }
+
+def fetch_model_specs(base_url, timeout=10.0):
+    """Fetch every model spec of a region from its foundation_model_specs endpoint, following pagination."""
+    url = f"{base_url}{SPECS_PATH}?" + urllib.parse.urlencode({"version": "2024-09-16", "limit": 200})
+    specs = []
+    while url:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            data = json.load(response)
+        specs.extend(data.get("resources", []))
+        next_href = (data.get("next") or {}).get("href")
+        url = urllib.parse.urljoin(base_url, next_href) if next_href else None
+    return specs
+
+class ModelEntry:
+    """One model of the catalog."""
+
+    def __init__(self, spec):
+        self.model_id = spec["model_id"]
+        self.regions = set()
+        self.update(spec)
+
+    def update(self, spec):
+        self.label = spec.get("label") or self.model_id.split("/")[-1]
+        self.provider = normalize_provider(spec.get("provider") or self.model_id.split("/")[0])
+        self.functions = frozenset(function["id"] for function in spec.get("functions", []))
+        limits = spec.get("model_limits") or {}
+        self.context_length = limits.get("max_sequence_length") or guess_context_length(self.model_id)
+        self.max_output_tokens = limits.get("max_output_tokens")
+        self.lifecycle = sorted(spec.get("lifecycle") or [], key=lambda state: state.get("start_date") or "")
+
+    def lifecycle_state(self, today=None):
+        """Return the current lifecycle state ("available", "deprecated", "withdrawn", ...)."""
+        today = (today or datetime.date.today()).isoformat()
+        state = "available"
+        for entry in self.lifecycle:
+            if (entry.get("start_date") or "") <= today:
+                state = entry["id"]
+        return state
+
+    def as_dict(self):
+        return {
+            "model_id": self.model_id,
+            "provider": self.provider,
+            "functions": sorted(self.functions),
+            "context_length": self.context_length,
+            "max_output_tokens": self.max_output_tokens,
+            "lifecycle": self.lifecycle_state(),
+            "regions": sorted(self.regions),
+        }
+
+class ModelCatalog:
+    def __init__(self, specs=()):
+        """
+        Create a catalog.
+
+        :param specs: Initial spec dicts, shaped like the foundation_model_specs resources.
+        """
+        self._entries = {}
+        self._by_function = {}
+        self._by_provider = {}
+        self._lock = threading.Lock()
+        self.update(specs)
+
+    @classmethod
+    def from_models_json(cls, path=MODELS_JSON):
+        return cls(load_model_specs(path))
+
+    def _index(self, entry):
+        for index in (self._by_function, self._by_provider):
+            for ids in index.values():
+                ids.discard(entry.model_id)
+        for function in entry.functions:
+            self._by_function.setdefault(function, set()).add(entry.model_id)
+        self._by_provider.setdefault(entry.provider, set()).add(entry.model_id)
+
+    def update(self, specs, region=None):
+        """
+        Add or replace models.
+
+        :param specs: Spec dicts, or bare model ids as returned by WatsonxLLM.fetch_models.
+            A bare id only adds the region to a known model; unknown ids get guessed specs.
+        :param region: Base URL the models were listed in.
+        """
+        with self._lock:
+            for spec in specs:
+                if isinstance(spec, str):
+                    entry = self._entries.get(spec)
+                    if entry is None:
+                        entry = self._entries[spec] = ModelEntry(spec_from_id(spec))
+                        self._index(entry)
+                else:
+                    entry = self._entries.get(spec["model_id"])
+                    if entry is None:
+                        entry = self._entries[spec["model_id"]] = ModelEntry(spec)
+                    else:
+                        entry.update(spec)
+                    self._index(entry)
+                if region is not None:
+                    entry.regions.add(region)
+
+    def refresh(self, base_url, fetch=fetch_model_specs):
+        """
+        Add the models served by a region and update the specs of the known ones. Models the
+        region no longer lists are kept.
+
+        :param fetch: Callable fetch(base_url) returning spec dicts.
+        :return: The number of models the region listed.
+        """
+        specs = fetch(base_url)
+        self.update(specs, region=base_url)
+        return len(specs)
+
+    def get(self, model_id):
+        with self._lock:
+            return self._entries.get(model_id)
+
+    def __contains__(self, model_id):
+        with self._lock:
+            return model_id in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def find(self, function=None, min_context=0, provider=None, region=None, include_deprecated=False):
+        """
+        Return the models matching every given constraint, ordered by model id.
+
+        :param function: Required function, e.g. "text_chat" or "embedding".
+        :param min_context: Required maximum sequence length in tokens.
+        :param provider: Provider name, e.g. "ibm", "meta" or "Mistral AI"; see normalize_provider.
+        :param region: Only models seen in this base URL.
+        :param include_deprecated: Also return deprecated models; withdrawn models are never returned.
+        """
+        with self._lock:
+            if function is not None:
+                ids = set(self._by_function.get(function, ()))
+            else:
+                ids = set(self._entries)
+            if provider is not None:
+                ids &= self._by_provider.get(normalize_provider(provider), set())
+            entries = [self._entries[model_id] for model_id in sorted(ids)]
+        allowed = {"available", "deprecated"} if include_deprecated else {"available"}
+        return [
+            entry for entry in entries
+            if entry.context_length >= min_context
+            and (region is None or region in entry.regions)
+            and entry.lifecycle_state() in allowed
+        ]
+
+class ModelStats:
+    """EWMA latency, time to first token, throughput and error rate of one model."""
+
+    def __init__(self):
+        self.latency = None
+        self.time_to_first_token = None
+        self.tokens_per_second = None
+        self.error_rate = 0.0
+        self.samples = 0
+
+    @staticmethod
+    def _ewma(current, value, alpha):
+        return value if current is None else current + alpha * (value - current)
+
+    def update(self, latency, output_tokens, time_to_first_token, ok, alpha):
+        self.samples += 1
+        self.error_rate += alpha * ((0.0 if ok else 1.0) - self.error_rate)
+        if not ok:
+            return
+        self.latency = self._ewma(self.latency, latency, alpha)
+        if time_to_first_token is not None:
+            self.time_to_first_token = self._ewma(self.time_to_first_token, time_to_first_token, alpha)
+        if output_tokens:
+            # Without a first-token time the whole call counts as generation, which underestimates the rate.
+            generation_time = latency - (time_to_first_token or 0.0)
+            if generation_time > 0:
+                self.tokens_per_second = self._ewma(self.tokens_per_second, output_tokens / generation_time, alpha)
+
+    def estimate(self, output_tokens):
+        """Expected seconds for a call producing output_tokens, or None before any measurement."""
+        if self.tokens_per_second is not None and output_tokens:
+            return (self.time_to_first_token or 0.0) + output_tokens / self.tokens_per_second
+        return self.latency
+
+class ModelRouter:
+    def __init__(self, catalog, alpha=0.3, max_error_rate=0.5):
+        """
+        Create a router over a catalog.
+
+        :param catalog: The ModelCatalog to choose from.
+        :param alpha: EWMA smoothing factor; higher values react faster.
+        :param max_error_rate: Models whose EWMA error rate exceeds this are only chosen as a last resort.
+        """
+        self.catalog = catalog
+        self.alpha = alpha
+        self.max_error_rate = max_error_rate
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, model_id, latency, output_tokens=None, time_to_first_token=None, ok=True):
+        """
+        Feed one measured call into the statistics of a model.
+
+        :param latency: Seconds the whole call took.
+        :param output_tokens: Generated tokens, if known.
+        :param time_to_first_token: Seconds to the first streamed token, if known.
+        """
+        with self._lock:
+            stats = self.stats.get(model_id)
+            if stats is None:
+                stats = self.stats[model_id] = ModelStats()
+            stats.update(latency, output_tokens, time_to_first_token, ok, self.alpha)
+
+    def estimate(self, model_id, output_tokens=256):
+        """Expected seconds for a call of model_id producing output_tokens, or None if unmeasured."""
+        with self._lock:
+            stats = self.stats.get(model_id)
+            return stats.estimate(output_tokens) if stats is not None else None
+
+    def rank(self, task="text_generation", context_tokens=0, output_tokens=256, max_latency=None, preferred=None,
+             provider=None, region=None):
+        """
+        Return the model ids that can serve a request, best first.
+
+        Models whose estimated latency fits max_latency come first, then models without
+        measurements (so new models get tried), then the measured ones that are too slow or
+        failing, fastest first. Within the first two groups the order of preferred decides,
+        followed by the estimated latency.
+
+        :param task: Required function, e.g. "text_generation", "text_chat" or "embedding".
+        :param context_tokens: Tokens of the prompt; context_tokens + output_tokens must fit the context length.
+        :param output_tokens: Expected tokens of the answer.
+        :param max_latency: Seconds the call may take, or None for no limit.
+        :param preferred: Model ids in order of preference, e.g. by quality; others follow.
+        """
+        preferred = list(preferred or [])
+        candidates = self.catalog.find(task, min_context=context_tokens + output_tokens, provider=provider, region=region)
+        with self._lock:
+            measured = {entry.model_id: self.stats.get(entry.model_id) for entry in candidates}
+
+        def sort_key(entry):
+            stats = measured[entry.model_id]
+            estimate = stats.estimate(output_tokens) if stats is not None else None
+            # A model whose calls all failed has no latency yet, but it is not unmeasured.
+            if stats is not None and stats.samples and stats.error_rate > self.max_error_rate:
+                group = 2
+            elif estimate is None:
+                group = 1
+            elif max_latency is not None and estimate > max_latency:
+                group = 2
+            else:
+                group = 0
+            rank = preferred.index(entry.model_id) if entry.model_id in preferred and group < 2 else len(preferred)
+            return (group, rank, estimate if estimate is not None else float("inf"), entry.model_id)
+
+        return [entry.model_id for entry in sorted(candidates, key=sort_key)]
+
+    def choose(self, task="text_generation", **constraints):
+        """
+        Return the best model for a request; see rank() for the constraints.
+
+        :raises LookupError: If no model in the catalog supports the task and context size.
+        """
+        ranked = self.rank(task, **constraints)
+        if not ranked:
+            raise LookupError(f"No available model supports {task!r} with the requested context size")
+        return ranked[0]
+
+    def snapshot(self):
+        """Return the measured statistics of each model."""
+        with self._lock:
+            return {
+                model_id: {
+                    "latency": stats.latency,
+                    "time_to_first_token": stats.time_to_first_token,
+                    "tokens_per_second": stats.tokens_per_second,
+                    "error_rate": stats.error_rate,
+                    "samples": stats.samples,
+                }
+                for model_id, stats in self.stats.items()
+            }
+
+_catalog = None
+_router = None
+_registry_lock = threading.Lock()
+
+def get_catalog():
+    """Return the process-wide catalog, loaded from models.json (or WATSONX_MODELS_JSON) on first use."""
+    global _catalog
+    with _registry_lock:
+        if _catalog is None:
+            _catalog = ModelCatalog.from_models_json(os.getenv("WATSONX_MODELS_JSON", MODELS_JSON))
+        return _catalog
+
+def get_model_router():
+    """Return the process-wide router over get_catalog()."""
+    global _router
+    catalog = get_catalog()
+    with _registry_lock:
+        if _router is None:
+            _router = ModelRouter(catalog)
+        return _router
+
+def main():
+    parser = argparse.ArgumentParser(description="List the models of the catalog that match the given constraints.")
+    parser.add_argument("--task", default=None, help="Required function, e.g. text_chat or embedding.")
+    parser.add_argument("--min-context", type=int, default=0, help="Required context length in tokens.")
+    parser.add_argument("--provider", default=None)
+    parser.add_argument("--refresh", default=None, metavar="URL", help="Refresh the catalog from this region first.")
+    parser.add_argument("--include-deprecated", action="store_true")
+    args = parser.parse_args()
+
+    catalog = get_catalog()
+    if args.refresh:
+        catalog.refresh(args.refresh)
+    for entry in catalog.find(args.task, args.min_context, args.provider, include_deprecated=args.include_deprecated):
+        print(f"{entry.model_id:<48} {entry.context_length:>7}  {entry.lifecycle_state():<10} {', '.join(sorted(entry.functions))}")
+
+if __name__ == "__main__":
+    main()
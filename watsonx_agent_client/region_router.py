@@ -0,0 +1,261 @@
+"""
+region_router.py
+
+This module routes watsonx.ai calls to the fastest healthy regional endpoint. A background
+thread probes every configured region (an unauthenticated GET of the model specs) and the
+router keeps an exponentially weighted moving average (EWMA) of latency and error rate per
+region, fed by the probes and by the real calls.
+
+Calls go to the healthy region with the lowest latency. Optionally a call is hedged: if the
+first region has not answered after a high percentile of its recent call latencies, the
+same request is sent to the second-best region and whichever succeeds first wins.
+"""
+
+import asyncio
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+PROBE_PATH = "/ml/v1/foundation_model_specs?version=2024-09-16&limit=1"
+
+def http_probe(url, timeout=5.0):
+    """
+    Probe a region with a lightweight, unauthenticated request.
+
+    :return: True if the region answered without a server error.
+    """
+    try:
+        with urllib.request.urlopen(f"{url}{PROBE_PATH}", timeout=timeout) as response:
+            return response.status < 500
+    except urllib.error.HTTPError as e:
+        return e.code < 500
+
+class RegionStats:
+    """EWMA latency and error rate of one region, plus its recent call latencies for hedging."""
+
+    def __init__(self, url, history=200):
+        self.url = url
+        self.latency = None
+        self.error_rate = 0.0
+        self.samples = 0
+        self.call_latencies = deque(maxlen=history)
+
+    def update(self, latency, ok, alpha):
+        self.samples += 1
+        if ok:
+            self.latency = latency if self.latency is None else self.latency + alpha * (latency - self.latency)
+        self.error_rate += alpha * ((0.0 if ok else 1.0) - self.error_rate)
+
+    def percentile(self, q):
+        if not self.call_latencies:
+            return None
+        ordered = sorted(self.call_latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+class RegionRouter:
+    def __init__(self, urls, probe_interval=30.0, alpha=0.3, max_error_rate=0.5, hedge_percentile=0.95,
+                 hedge_min_samples=20, probe=http_probe):
+        """
+        Create a router over a list of regional base URLs.
+
+        :param urls: Base URLs of the regions, e.g. "https://us-south.ml.cloud.ibm.com".
+        :param probe_interval: Seconds between two probe rounds of the background thread.
+        :param alpha: EWMA smoothing factor; higher values react faster.
+        :param max_error_rate: Regions whose EWMA error rate exceeds this are considered unhealthy.
+        :param hedge_percentile: Percentile of the primary region's call latencies after which a hedged call starts.
+        :param hedge_min_samples: Calls a region needs before its percentile is trusted for hedging.
+        :param probe: Callable probe(url) returning True when the region is healthy; may raise.
+        """
+        if not urls:
+            raise ValueError("RegionRouter needs at least one URL")
+        self.probe_interval = probe_interval
+        self.alpha = alpha
+        self.max_error_rate = max_error_rate
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.probe = probe
+        self.stats = {url: RegionStats(url) for url in urls}
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(4, 2 * len(urls)), thread_name_prefix="watsonx-region")
+        self._prober = None
+        self._stopped = threading.Event()
+
+    def record(self, url, latency, ok, call=False):
+        """Feed one observation of a region into its EWMA statistics."""
+        with self._lock:
+            region = self.stats[url]
+            region.update(latency, ok, self.alpha)
+            if call and ok:
+                region.call_latencies.append(latency)
+
+    def probe_all(self):
+        """Probe every region once, concurrently."""
+        def probe_one(url):
+            start = time.perf_counter()
+            try:
+                ok = bool(self.probe(url))
+            except Exception:
+                ok = False
+            self.record(url, time.perf_counter() - start, ok)
+
+        list(self._executor.map(probe_one, self.stats))
+
+    def start(self):
+        """Start a daemon thread that probes all regions now and then every probe_interval seconds."""
+        with self._lock:
+            if self._prober is None:
+                self._prober = threading.Thread(target=self._probe_loop, name="watsonx-region-probe", daemon=True)
+                self._prober.start()
+        return self
+
+    def _probe_loop(self):
+        while True:
+            self.probe_all()
+            if self._stopped.wait(self.probe_interval):
+                return
+
+    def stop(self):
+        self._stopped.set()
+
+    def ranked(self, preferred=None):
+        """
+        Return the region URLs, healthy ones first, each group ordered by EWMA latency.
+
+        :param preferred: URL to put first among the regions without measurements yet,
+            so calls go there until the first probes complete.
+        """
+        with self._lock:
+            regions = list(self.stats.values())
+        def sort_key(region):
+            unhealthy = region.error_rate > self.max_error_rate
+            unknown = region.latency is None
+            return (unhealthy, unknown, unknown and region.url != preferred, region.latency or 0.0)
+        return [region.url for region in sorted(regions, key=sort_key)]
+
+    def best(self, preferred=None):
+        """Return the URL of the fastest healthy region."""
+        return self.ranked(preferred)[0]
+
+    def _hedge_delay(self, url, hedge_after):
+        if hedge_after is not None:
+            return hedge_after
+        with self._lock:
+            region = self.stats[url]
+            if len(region.call_latencies) < self.hedge_min_samples:
+                return None
+            return region.percentile(self.hedge_percentile)
+
+    def _timed(self, fn, url):
+        start = time.perf_counter()
+        try:
+            result = fn(url)
+        except Exception:
+            self.record(url, time.perf_counter() - start, False, call=True)
+            raise
+        self.record(url, time.perf_counter() - start, True, call=True)
+        return result
+
+    def call(self, fn, hedge=False, hedge_after=None, preferred=None):
+        """
+        Run fn(url) against the best region.
+
+        :param fn: Callable receiving the base URL of the chosen region.
+        :param hedge: If True, send a duplicate call to the second-best region when the first is slow.
+        :param hedge_after: Seconds before hedging; defaults to the hedge_percentile of the primary region.
+        :param preferred: See ranked().
+        :return: The result of the first successful call.
+        """
+        ranked = self.ranked(preferred)
+        primary = ranked[0]
+        delay = self._hedge_delay(primary, hedge_after) if hedge and len(ranked) > 1 else None
+        if delay is None:
+            return self._timed(fn, primary)
+
+        first = self._executor.submit(self._timed, fn, primary)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result()
+        with self._lock:
+            self.hedges += 1
+        second = self._executor.submit(self._timed, fn, ranked[1])
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is second:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    # The slower call keeps running in the background; its result is discarded.
+                    return future.result()
+                error = error or future.exception()
+        raise error
+
+    async def acall(self, fn, hedge=False, hedge_after=None, preferred=None):
+        """Async counterpart of call() for a coroutine function fn(url)."""
+        ranked = self.ranked(preferred)
+        primary = ranked[0]
+        delay = self._hedge_delay(primary, hedge_after) if hedge and len(ranked) > 1 else None
+
+        async def timed(url):
+            start = time.perf_counter()
+            try:
+                result = await fn(url)
+            except Exception:
+                self.record(url, time.perf_counter() - start, False, call=True)
+                raise
+            self.record(url, time.perf_counter() - start, True, call=True)
+            return result
+
+        if delay is None:
+            return await timed(primary)
+        first = asyncio.ensure_future(timed(primary))
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+        with self._lock:
+            self.hedges += 1
+        second = asyncio.ensure_future(timed(ranked[1]))
+        pending = {first, second}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            with self._lock:
+                                self.hedge_wins += 1
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def snapshot(self):
+        """Return the EWMA latency, error rate and sample count of each region, and the hedge counters."""
+        with self._lock:
+            regions = {
+                url: {"latency": region.latency, "error_rate": region.error_rate, "samples": region.samples}
+                for url, region in self.stats.items()
+            }
+            return {"regions": regions, "hedges": self.hedges, "hedge_wins": self.hedge_wins}
+
+_routers = {}
+_routers_lock = threading.Lock()
+
+def get_router(urls, **kwargs):
+    """Return the process-wide, already started router for a set of region URLs."""
+    key = tuple(urls)
+    with _routers_lock:
+        router = _routers.get(key)
+        if router is None:
+            router = _routers[key] = RegionRouter(list(urls), **kwargs)
+    return router.start()
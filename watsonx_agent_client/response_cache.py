@@ -0,0 +1,322 @@
+"""
+response_cache.py
+
+This module provides an opt-in, exact-match cache for model responses. Entries are keyed
+by (model_id, normalised parameters, SHA-256 of the prompt) and are only used for
+deterministic requests: greedy decoding, or sampling with a fixed seed. Requests with
+random sampling always bypass the cache.
+
+Two backends are available: an in-memory LRU and a persistent SQLite file that several
+processes can share. Both support a TTL and a byte-size limit, and the cache reports
+hits, misses and bypasses.
+
+Enable it for the scripts in this repository by setting WATSONX_RESPONSE_CACHE to
+"memory" or to the path of a cache file (and optionally WATSONX_RESPONSE_CACHE_TTL in seconds).
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from watsonx_agent_client import metrics
+
+def is_deterministic(params):
+    """
+    Tell whether a request with these parameters always produces the same output.
+
+    Text generation parameters (with "decoding_method") are deterministic when decoding is
+    greedy or a random seed is fixed. Chat parameters are deterministic when a seed is
+    fixed or the temperature is 0.
+
+    :param params: The generation parameters of the request.
+    :return: True if the response may be served from the cache.
+    """
+    params = params or {}
+    seed = params.get("random_seed", params.get("seed"))
+    if "decoding_method" in params:
+        return params["decoding_method"] == "greedy" or seed is not None
+    return seed is not None or params.get("temperature") == 0
+
+def normalize_params(params):
+    """Return a canonical JSON string for params, ignoring unset (None) values and key order."""
+    cleaned = {str(key): value for key, value in (params or {}).items() if value is not None}
+    return json.dumps(cleaned, sort_keys=True, separators=(",", ":"), default=str)
+
+def make_key(model_id, params, prompt):
+    """
+    Build the cache key of a request.
+
+    :param prompt: A string, or any JSON-serialisable value such as a list of chat messages.
+    :return: A hex SHA-256 digest.
+    """
+    if not isinstance(prompt, str):
+        prompt = json.dumps(prompt, sort_keys=True, default=str)
+    digest = hashlib.sha256()
+    digest.update(f"{model_id}\x00{normalize_params(params)}\x00".encode("utf-8"))
+    digest.update(prompt.encode("utf-8"))
+    return digest.hexdigest()
+
+class MemoryBackend:
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_entries=10000):
+        """
+        In-process LRU backend.
+
+        :param max_bytes: Upper bound for the total size of the stored values.
+        :param max_entries: Upper bound for the number of entries.
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, now):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            blob, expires_at = entry
+            if expires_at is not None and expires_at <= now:
+                del self._entries[key]
+                self._bytes -= len(blob)
+                return None
+            self._entries.move_to_end(key)
+            return blob
+
+    def put(self, key, blob, expires_at):
+        if len(blob) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[0])
+            self._entries[key] = (blob, expires_at)
+            self._bytes += len(blob)
+            while self._bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def size(self):
+        with self._lock:
+            return len(self._entries), self._bytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+class SQLiteBackend:
+    # Puts after which the stored size is recounted, to notice writes of other processes.
+    recount_interval = 1000
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, touch_interval=60.0):
+        """
+        Persistent backend in a SQLite file, shareable between processes.
+
+        :param path: Location of the cache file.
+        :param max_bytes: Upper bound for the total size of the stored values.
+        :param touch_interval: Seconds within which a hit does not refresh the last access time
+            of an entry again, so reads of hot entries do not write to the database.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.touch_interval = touch_interval
+        self.evictions = 0
+        # Running estimate of the stored bytes; None until it is first counted.
+        self._total = None
+        self._puts = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " expires_at REAL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+
+    def get(self, key, now):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at, last_access FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            blob, expires_at, last_access = row
+            if expires_at is not None and expires_at <= now:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            if last_access < now - self.touch_interval:
+                self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            return blob
+
+    def put(self, key, blob, expires_at):
+        if len(blob) > self.max_bytes:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), expires_at, time.time()),
+            )
+            # Replaced keys are counted twice; the estimate only errs high, and _evict counts
+            # exactly before deleting anything.
+            self._puts += 1
+            if self._total is None or self._puts >= self.recount_interval:
+                self._total = self._stored_bytes()
+                self._puts = 0
+            else:
+                self._total += len(blob)
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _stored_bytes(self):
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _evict(self):
+        """
+        Drop expired entries, then least recently used ones until the values take at most
+        90% of max_bytes, so the next puts do not have to evict again straight away.
+        Expired entries are otherwise only removed when they are read.
+        """
+        self._conn.execute("DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+        total = self._total = self._stored_bytes()
+        if total <= self.max_bytes:
+            return
+        excess, freed, victims = total - int(self.max_bytes * 0.9), 0, []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_access"):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self.evictions += len(victims)
+        self._total -= freed
+
+    def size(self):
+        with self._lock:
+            return tuple(self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone())
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._total, self._puts = 0, 0
+
+class ResponseCache:
+    def __init__(self, backend=None, ttl=None):
+        """
+        Create a response cache.
+
+        :param backend: A MemoryBackend or SQLiteBackend; defaults to a MemoryBackend.
+        :param ttl: Seconds an entry stays valid, or None to keep entries until evicted.
+        """
+        self.backend = backend or MemoryBackend()
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """
+        Build the cache configured by WATSONX_RESPONSE_CACHE, or return None if it is unset.
+
+        WATSONX_RESPONSE_CACHE is "memory" or a file path; WATSONX_RESPONSE_CACHE_TTL is in seconds.
+        """
+        setting = os.getenv("WATSONX_RESPONSE_CACHE")
+        if not setting:
+            return None
+        ttl = os.getenv("WATSONX_RESPONSE_CACHE_TTL")
+        backend = MemoryBackend() if setting == "memory" else SQLiteBackend(setting)
+        return cls(backend=backend, ttl=float(ttl) if ttl else None)
+
+    _METRIC_RESULTS = {"hits": "hit", "misses": "miss", "bypassed": "bypass"}
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+        metrics.record_cache("response", self._METRIC_RESULTS[counter])
+
+    def get(self, model_id, params, prompt):
+        """
+        Look up a response.
+
+        :return: The cached response, or None on a miss or for non-deterministic parameters.
+        """
+        if not is_deterministic(params):
+            self._count("bypassed")
+            return None
+        blob = self.backend.get(make_key(model_id, params, prompt), time.time())
+        if blob is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return json.loads(blob)
+
+    def put(self, model_id, params, prompt, response):
+        """Store a JSON-serialisable response. Non-deterministic requests are not stored."""
+        if not is_deterministic(params):
+            return
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+        blob = json.dumps(response, default=str).encode("utf-8")
+        self.backend.put(make_key(model_id, params, prompt), blob, expires_at)
+
+    def cached_call(self, model_id, params, prompt, call):
+        """
+        Return the cached response for a request, or run call() and cache its result.
+
+        :param call: Zero-argument callable performing the request; its result must be JSON-serialisable.
+        """
+        response = self.get(model_id, params, prompt)
+        if response is not None:
+            return response
+        response = call()
+        self.put(model_id, params, prompt, response)
+        return response
+
+    async def acached_call(self, model_id, params, prompt, call):
+        """Async counterpart of cached_call; call is a zero-argument coroutine function."""
+        response = self.get(model_id, params, prompt)
+        if response is not None:
+            return response
+        response = await call()
+        self.put(model_id, params, prompt, response)
+        return response
+
+    def stats(self):
+        """
+        Report cache counters.
+
+        :return: A dict with hits, misses, bypassed, hit_rate (over cacheable lookups),
+            evictions, entries and bytes.
+        """
+        entries, size = self.backend.size()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.backend.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def clear(self):
+        """Remove every entry and reset the counters."""
+        self.backend.clear()
+        with self._lock:
+            self.hits = self.misses = self.bypassed = 0
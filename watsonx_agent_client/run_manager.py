@@ -0,0 +1,203 @@
+"""
+run_manager.py
+
+This module runs example scripts in the background and streams their output line by line,
+so the Flask app can forward it to the browser as server-sent events instead of blocking a
+request thread until the script exits.
+
+The number of concurrent runs is bounded, every run has a wall-clock timeout, and any run
+can be cancelled by id. Metrics a script records are exported to a file when it exits and
+added to the registry of this process.
+"""
+
+import logging
+import os
+import queue
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+
+from watsonx_agent_client import metrics
+
+logger = logging.getLogger(__name__)
+
+class TooManyRuns(Exception):
+    """Raised when the concurrent run limit is reached."""
+
+class _Run:
+    """A running script, its output queue and its final state."""
+
+    def __init__(self, run_id, process, path, metrics_file):
+        self.id = run_id
+        self.process = process
+        self.path = path
+        self.metrics_file = metrics_file
+        self.events = queue.Queue()
+        self.started = time.time()
+        self.finished = None
+        self.returncode = None
+        self.cancelled = False
+        self.timed_out = False
+        # Set once the ("exit", summary) event is in the queue; every event is queued by then.
+        self.exit_queued = threading.Event()
+
+class RunManager:
+    def __init__(self, max_concurrent_runs=4, timeout=30, retention=300, on_exit=None):
+        """
+        Create a run manager.
+
+        :param max_concurrent_runs: Maximum number of scripts running at the same time.
+        :param timeout: Seconds a script may run before it is killed.
+        :param retention: Seconds a finished run is kept for late stream subscribers.
+        :param on_exit: Optional callback on_exit(path, summary) called when a run ends,
+            with the summary dict of describe().
+        """
+        self.max_concurrent_runs = max_concurrent_runs
+        self.timeout = timeout
+        self.retention = retention
+        self.on_exit = on_exit
+        self._slots = threading.BoundedSemaphore(max_concurrent_runs)
+        self._runs = {}
+        self._lock = threading.Lock()
+
+    def start(self, python_executable, path):
+        """
+        Start a script in the background.
+
+        :param python_executable: Interpreter of the venv the script needs.
+        :param path: Path of the script to run.
+        :return: The id of the new run.
+        :raises TooManyRuns: If max_concurrent_runs scripts are already running.
+        """
+        self._purge()
+        if not self._slots.acquire(blocking=False):
+            raise TooManyRuns(f"{self.max_concurrent_runs} runs are already in progress")
+        run_id = uuid.uuid4().hex
+        metrics_file = os.path.join(tempfile.gettempdir(), f"watsonx-metrics-{run_id}.jsonl")
+        try:
+            process = subprocess.Popen(
+                # -u: unbuffered, so lines reach us as soon as the script prints them.
+                [python_executable, "-u", path],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                stdin=subprocess.DEVNULL,
+                text=True,
+                bufsize=1,
+                env={**os.environ, "PYTHONUNBUFFERED": "1", "WATSONX_METRICS_EXPORT": metrics_file},
+            )
+        except Exception:
+            self._slots.release()
+            raise
+        run = _Run(run_id, process, path, metrics_file)
+        with self._lock:
+            self._runs[run.id] = run
+        readers = [
+            threading.Thread(target=self._pump, args=(run, process.stdout, "stdout"), daemon=True),
+            threading.Thread(target=self._pump, args=(run, process.stderr, "stderr"), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+        threading.Thread(target=self._wait, args=(run, readers), daemon=True).start()
+        return run.id
+
+    @staticmethod
+    def _pump(run, stream, name):
+        for line in stream:
+            run.events.put((name, line.rstrip("\n")))
+        stream.close()
+
+    def _wait(self, run, readers):
+        try:
+            run.process.wait(timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            run.timed_out = True
+            run.process.kill()
+            run.process.wait()
+        finally:
+            self._slots.release()
+        for reader in readers:
+            reader.join()
+        run.returncode = run.process.returncode
+        run.finished = time.time()
+        metrics.merge_exported(run.metrics_file)
+        summary = self.describe(run.id)
+        if self.on_exit is not None:
+            try:
+                self.on_exit(run.path, summary)
+            except Exception:
+                logger.exception("on_exit callback failed for run %s", run.id)
+        run.events.put(("exit", summary))
+        run.exit_queued.set()
+
+    def cancel(self, run_id):
+        """
+        Kill a run.
+
+        :return: True if the run existed and was still running.
+        """
+        run = self._get(run_id)
+        if run is None or run.process.poll() is not None:
+            return False
+        run.cancelled = True
+        run.process.kill()
+        return True
+
+    def events(self, run_id, keepalive=15):
+        """
+        Iterate over the output of a run as it is produced.
+
+        :param run_id: Id returned by start().
+        :param keepalive: Seconds of silence after which a ("keepalive", None) event is yielded.
+        :return: A generator of (event, data) tuples: ("stdout", line), ("stderr", line),
+            ("keepalive", None) and finally ("exit", summary dict). Each run supports one subscriber.
+        """
+        run = self._get(run_id)
+        if run is None:
+            raise KeyError(run_id)
+        while True:
+            if run.exit_queued.is_set():
+                # Everything is queued, so a late subscriber drains the queue without waiting.
+                try:
+                    event = run.events.get_nowait()
+                except queue.Empty:
+                    # The exit event was already consumed by an earlier subscriber.
+                    yield "exit", self.describe(run_id)
+                    return
+            else:
+                try:
+                    event = run.events.get(timeout=keepalive)
+                except queue.Empty:
+                    if not run.exit_queued.is_set():
+                        yield "keepalive", None
+                    continue
+            yield event
+            if event[0] == "exit":
+                return
+
+    def describe(self, run_id):
+        """Return a summary dict of a run, or None if it is unknown."""
+        run = self._get(run_id)
+        if run is None:
+            return None
+        end = run.finished or time.time()
+        return {
+            "id": run.id,
+            "running": run.finished is None,
+            "returncode": run.returncode,
+            "cancelled": run.cancelled,
+            "timed_out": run.timed_out,
+            "duration": end - run.started,
+        }
+
+    def _get(self, run_id):
+        with self._lock:
+            return self._runs.get(run_id)
+
+    def _purge(self):
+        """Forget finished runs older than the retention period."""
+        cutoff = time.time() - self.retention
+        with self._lock:
+            for run_id in [r.id for r in self._runs.values() if r.finished and r.finished < cutoff]:
+                del self._runs[run_id]
@@ -0,0 +1,375 @@
+"""
+scheduler.py
+
+This module provides a shared request scheduler placed in front of every watsonx.ai call
+(embeddings, WatsonxLLM and the SDK examples), with one scheduler per project:
+
+- a token bucket caps the request rate of the project;
+- an AIMD controller adapts the number of requests in flight: it grows by one request per
+  round of successful calls and halves on 429 throttling (or shrinks slightly when calls get
+  slower than a latency target);
+- throttled and transient failures are retried with jittered exponential backoff, waiting
+  at least as long as the Retry-After header asks;
+- waiting requests are admitted by priority lane, so INTERACTIVE calls overtake BATCH jobs.
+
+The scheduler works for threads (call) and asyncio tasks (acall) alike and only uses the
+standard library. Configure the defaults with WATSONX_RATE_LIMIT (requests per second),
+WATSONX_MAX_CONCURRENCY and WATSONX_LATENCY_TARGET (seconds).
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Priority lanes; lower values are admitted first.
+INTERACTIVE = 0
+BATCH = 1
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# "Status code: 503" in the message of SDK errors that do not expose the response.
+_STATUS_IN_MESSAGE = re.compile(r"\bstatus(?:[ _]code)?\W{0,3}([1-5]\d\d)\b", re.IGNORECASE)
+
+# Network errors of HTTP clients that are not OSError subclasses, as (module, attribute)
+# pairs. They are looked up in sys.modules, so the scheduler never imports a client itself.
+_TRANSIENT_ERRORS = [
+    ("requests.exceptions", "ConnectionError"),
+    ("requests.exceptions", "Timeout"),
+    ("requests.exceptions", "ChunkedEncodingError"),
+    ("urllib3.exceptions", "TimeoutError"),
+    ("urllib3.exceptions", "ProtocolError"),
+    ("urllib3.exceptions", "NewConnectionError"),
+    ("httpx", "TimeoutException"),
+    ("httpx", "NetworkError"),
+    ("httpx", "RemoteProtocolError"),
+]
+
+def error_status(exc):
+    """
+    Find the HTTP status and Retry-After seconds of an exception raised by an HTTP client.
+
+    Understands requests, httpx, urllib and ibm_watsonx_ai errors, which expose the status
+    either on the exception or on its response.
+
+    :return: A (status, retry_after) tuple; either may be None.
+    """
+    response = getattr(exc, "response", None)
+    status = None
+    for source in (exc, response):
+        for attribute in ("status_code", "status", "code"):
+            value = getattr(source, attribute, None)
+            if isinstance(value, int) and 100 <= value < 600:
+                status = value
+                break
+        if status is not None:
+            break
+    if status is None:
+        match = _STATUS_IN_MESSAGE.search(str(exc))
+        if match:
+            status = int(match.group(1))
+        elif "Too Many Requests" in str(exc):
+            status = 429
+    headers = getattr(exc, "headers", None) or getattr(response, "headers", None) or {}
+    try:
+        retry_after = float(headers.get("Retry-After"))
+    except (AttributeError, TypeError, ValueError):
+        retry_after = None
+    return status, retry_after
+
+def is_transient(exc, status=None):
+    """
+    Tell whether a failed call may succeed when retried: throttling, a server error or a
+    connection failure or timeout of the HTTP client.
+
+    :param status: The status from error_status(exc), if already known.
+    """
+    if status is None:
+        status, _ = error_status(exc)
+    if status in RETRYABLE_STATUS or isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    for module_name, name in _TRANSIENT_ERRORS:
+        error_type = getattr(sys.modules.get(module_name), name, None)
+        if isinstance(error_type, type) and isinstance(exc, error_type):
+            return True
+    return False
+
+class TokenBucket:
+    def __init__(self, rate, burst=None):
+        """
+        Create a token bucket.
+
+        :param rate: Tokens added per second, or None for no limit.
+        :param burst: Bucket capacity; defaults to one second worth of tokens.
+        """
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate or 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, cost=1.0):
+        """
+        Take tokens, going into debt if the bucket is empty.
+
+        :return: Seconds the caller has to wait before using the reserved tokens.
+        """
+        if self.rate is None:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= cost
+            return max(0.0, -self._tokens / self.rate)
+
+class _Waiter:
+    """A request queued for a concurrency slot, woken by the thread that grants it one."""
+
+    def __init__(self, loop=None):
+        self.granted = False
+        self.cancelled = False
+        self.loop = loop
+        if loop is None:
+            self.event = threading.Event()
+        else:
+            self.future = loop.create_future()
+
+    def wake(self):
+        self.granted = True
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(None)
+
+class Scheduler:
+    def __init__(self, rate=None, burst=None, initial_concurrency=16, min_concurrency=1, max_concurrency=64,
+                 latency_target=None, max_retries=5, base_delay=0.5, max_delay=30.0):
+        """
+        Create a scheduler.
+
+        :param rate: Maximum requests per second, or None for no rate limit.
+        :param burst: Requests allowed at once after an idle period; defaults to one second worth.
+        :param initial_concurrency: Requests in flight allowed before any feedback.
+        :param min_concurrency: Lower bound of the adaptive limit.
+        :param max_concurrency: Upper bound of the adaptive limit.
+        :param latency_target: Seconds; successful calls slower than this shrink the limit a little.
+        :param max_retries: Retries of a throttled or failed call before its error is raised.
+        :param base_delay: First backoff step in seconds; doubles on every retry.
+        :param max_delay: Upper bound of a single backoff step.
+        """
+        self.bucket = TokenBucket(rate, burst)
+        self.limit = float(initial_concurrency)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.latency_target = latency_target
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stats = {"calls": 0, "throttled": 0, "retries": 0, "failures": 0}
+        self._in_flight = 0
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._last_decrease = 0.0
+        # Smoothed latency of successful calls, used as the AIMD window length.
+        self._round_trip = 1.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Build a scheduler from WATSONX_RATE_LIMIT, WATSONX_MAX_CONCURRENCY and WATSONX_LATENCY_TARGET."""
+        rate = os.getenv("WATSONX_RATE_LIMIT")
+        max_concurrency = int(os.getenv("WATSONX_MAX_CONCURRENCY", "64"))
+        latency_target = os.getenv("WATSONX_LATENCY_TARGET")
+        return cls(
+            rate=float(rate) if rate else None,
+            initial_concurrency=min(16, max_concurrency),
+            max_concurrency=max_concurrency,
+            latency_target=float(latency_target) if latency_target else None,
+        )
+
+    # Concurrency slots
+
+    def _try_enter(self, priority, waiter):
+        """Take a slot if one is free and nobody is queued; otherwise queue the waiter."""
+        with self._lock:
+            if not self._waiters and self._in_flight < int(self.limit):
+                self._in_flight += 1
+                return True
+            heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+            return False
+
+    def _grant_locked(self):
+        while self._waiters and self._in_flight < int(self.limit):
+            _, _, waiter = heapq.heappop(self._waiters)
+            if waiter.cancelled:
+                continue
+            self._in_flight += 1
+            waiter.wake()
+
+    def _leave(self):
+        with self._lock:
+            self._in_flight -= 1
+            self._grant_locked()
+
+    def _abandon(self, waiter):
+        """Give up a queued slot request, releasing the slot if it was granted meanwhile."""
+        with self._lock:
+            waiter.cancelled = True
+            granted = waiter.granted
+        if granted:
+            self._leave()
+
+    @contextmanager
+    def slot(self, priority=INTERACTIVE):
+        """Hold one concurrency slot (and one rate token) for the duration of the block, e.g. a stream."""
+        waiter = _Waiter()
+        if not self._try_enter(priority, waiter):
+            try:
+                waiter.event.wait()
+            except BaseException:
+                self._abandon(waiter)
+                raise
+        try:
+            time.sleep(self.bucket.reserve())
+            yield
+        finally:
+            self._leave()
+
+    @asynccontextmanager
+    async def aslot(self, priority=INTERACTIVE):
+        """Async counterpart of slot()."""
+        waiter = _Waiter(asyncio.get_running_loop())
+        if not self._try_enter(priority, waiter):
+            try:
+                await waiter.future
+            except BaseException:
+                self._abandon(waiter)
+                raise
+        try:
+            await asyncio.sleep(self.bucket.reserve())
+            yield
+        finally:
+            self._leave()
+
+    # AIMD feedback
+
+    def _on_success(self, latency):
+        with self._lock:
+            self.stats["calls"] += 1
+            self._round_trip += 0.2 * (latency - self._round_trip)
+            if self.latency_target is not None and latency > self.latency_target:
+                self._decrease(0.9)
+            else:
+                # Additive increase: about +1 once every request of the current window succeeded.
+                self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+                self._grant_locked()
+
+    def _on_throttle(self):
+        with self._lock:
+            self.stats["throttled"] += 1
+            self._decrease(0.5)
+
+    def _decrease(self, factor):
+        # The 429s of the requests that were in flight together should only halve the limit once.
+        now = time.monotonic()
+        if now - self._last_decrease < self._round_trip:
+            return
+        self._last_decrease = now
+        self.limit = max(float(self.min_concurrency), self.limit * factor)
+
+    def _retry_delay(self, exc, attempt):
+        """
+        Decide whether a failed call is retried.
+
+        :return: Seconds to wait before the next attempt, or None to raise the error.
+        """
+        status, retry_after = error_status(exc)
+        if status == 429:
+            self._on_throttle()
+        if not is_transient(exc, status) or attempt >= self.max_retries:
+            with self._lock:
+                self.stats["failures"] += 1
+            return None
+        with self._lock:
+            self.stats["retries"] += 1
+        # Full jitter spreads out clients that were throttled together.
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        logger.info("Request failed with %s; retrying in %.2fs (attempt %s)", status or type(exc).__name__, delay, attempt + 1)
+        return delay
+
+    # Calls
+
+    def call(self, fn, *args, priority=INTERACTIVE, **kwargs):
+        """
+        Run fn(*args, **kwargs) under the rate limit and concurrency limit, retrying
+        throttled and transient failures.
+
+        :param priority: INTERACTIVE or BATCH.
+        :return: The result of fn.
+        """
+        for attempt in itertools.count():
+            with self.slot(priority):
+                start = time.perf_counter()
+                try:
+                    result = fn(*args, **kwargs)
+                except Exception as e:
+                    delay = self._retry_delay(e, attempt)
+                    if delay is None:
+                        raise
+                else:
+                    self._on_success(time.perf_counter() - start)
+                    return result
+            time.sleep(delay)
+
+    async def acall(self, fn, *args, priority=INTERACTIVE, **kwargs):
+        """Async counterpart of call() for a coroutine function fn."""
+        for attempt in itertools.count():
+            async with self.aslot(priority):
+                start = time.perf_counter()
+                try:
+                    result = await fn(*args, **kwargs)
+                except Exception as e:
+                    delay = self._retry_delay(e, attempt)
+                    if delay is None:
+                        raise
+                else:
+                    self._on_success(time.perf_counter() - start)
+                    return result
+            await asyncio.sleep(delay)
+
+    def snapshot(self):
+        """Return the current limit, requests in flight and queued, and the call counters."""
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "queued": sum(1 for _, _, waiter in self._waiters if not waiter.cancelled),
+                **self.stats,
+            }
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+def get_scheduler(project_id=None):
+    """Return the process-wide scheduler of a project, creating it from the environment on first use."""
+    with _schedulers_lock:
+        scheduler = _schedulers.get(project_id)
+        if scheduler is None:
+            scheduler = _schedulers[project_id] = Scheduler.from_env()
+        return scheduler
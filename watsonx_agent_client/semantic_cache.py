@@ -0,0 +1,215 @@
+"""
+semantic_cache.py
+
+This module provides a semantic response cache. Prompts are embedded with WatsonxEmbeddings
+and compared by cosine similarity against the prompts answered recently; if the best match
+is above a threshold its stored completion is returned instead of calling the model. This
+catches paraphrases that the exact-match ResponseCache (response_cache.py) cannot.
+
+Entries live in one namespace per model and parameter set, each a fixed-capacity float32
+matrix of unit vectors that is scanned with a single matrix-vector product. When a
+namespace is full the least recently used entry is replaced. report() shows how much model
+latency the cache saved after paying for the embedding lookups.
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+import numpy as np
+
+from watsonx_agent_client import metrics
+from watsonx_agent_client.response_cache import normalize_params
+
+class _Namespace:
+    """Vectors, completions and bookkeeping of one model and parameter set."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.vectors = None
+        self.responses = [None] * capacity
+        self.latencies = np.zeros(capacity)
+        self.created = np.zeros(capacity)
+        self.last_used = np.zeros(capacity)
+        self.size = 0
+
+    def search(self, vector, now, ttl):
+        """Return (slot, score) of the most similar live entry, or (None, -1.0)."""
+        if self.vectors is None or self.size == 0 or self.vectors.shape[1] != vector.shape[0]:
+            return None, -1.0
+        scores = self.vectors[:self.size] @ vector
+        if ttl is not None:
+            scores[self.created[:self.size] + ttl <= now] = -np.inf
+        slot = int(np.argmax(scores))
+        return slot, float(scores[slot])
+
+    def store(self, vector, response, latency, now):
+        if self.vectors is None or self.vectors.shape[1] != vector.shape[0]:
+            self.vectors = np.zeros((self.capacity, vector.shape[0]), dtype=np.float32)
+            self.size = 0
+        if self.size < self.capacity:
+            slot = self.size
+            self.size += 1
+            evicted = False
+        else:
+            slot = int(np.argmin(self.last_used))
+            evicted = True
+        self.vectors[slot] = vector
+        self.responses[slot] = response
+        self.latencies[slot] = latency
+        self.created[slot] = self.last_used[slot] = now
+        return evicted
+
+class SemanticCache:
+    def __init__(self, embedder=None, threshold=0.92, max_entries=1000, ttl=None):
+        """
+        Create a semantic cache.
+
+        :param embedder: Object with get_embeddings_matrix(texts, normalize=True), usually a
+            WatsonxEmbeddings; one is created from the .env credentials if omitted.
+        :param threshold: Minimum cosine similarity for a cached completion to be reused.
+        :param max_entries: Number of prompts kept per namespace.
+        :param ttl: Seconds an entry stays valid, or None to keep entries until evicted.
+        """
+        if embedder is None:
+            from embeddings.watsonx_embeddings import WatsonxEmbeddings
+            from watsonx_agent_client.scheduler import INTERACTIVE
+            # The lookup sits on the request path, so it must not queue behind batch jobs.
+            embedder = WatsonxEmbeddings(priority=INTERACTIVE)
+        self.embedder = embedder
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.evictions = 0
+        self.lookup_time = 0.0
+        self.saved_time = 0.0
+        self._namespaces = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, embedder=None):
+        """
+        Build the cache configured by WATSONX_SEMANTIC_CACHE (the similarity threshold, e.g. "0.92"),
+        or return None if it is unset.
+
+        :param embedder: Passed to the constructor; defaults to a WatsonxEmbeddings for the .env credentials.
+        """
+        threshold = os.getenv("WATSONX_SEMANTIC_CACHE")
+        if not threshold:
+            return None
+        return cls(embedder=embedder, threshold=float(threshold))
+
+    @staticmethod
+    def namespace_key(model_id, params):
+        return f"{model_id}\x00{normalize_params(params)}"
+
+    def embed(self, prompt):
+        """Return the unit-norm float32 vector of a prompt."""
+        return self.embedder.get_embeddings_matrix([prompt], normalize=True)[0]
+
+    def lookup(self, model_id, params, prompt):
+        """
+        Find a stored completion for a prompt similar to this one.
+
+        :return: (response, vector, score). response is None on a miss; vector is the prompt
+            embedding to pass to store(), or None if embedding failed.
+        """
+        start = time.perf_counter()
+        try:
+            vector = self.embed(prompt)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+                self.lookup_time += time.perf_counter() - start
+            metrics.record_cache("semantic", "error")
+            return None, None, -1.0
+        now = time.time()
+        with self._lock:
+            namespace = self._namespaces.get(self.namespace_key(model_id, params))
+            slot, score = namespace.search(vector, now, self.ttl) if namespace else (None, -1.0)
+            self.lookup_time += time.perf_counter() - start
+            if slot is None or score < self.threshold:
+                self.misses += 1
+                metrics.record_cache("semantic", "miss")
+                return None, vector, score
+            namespace.last_used[slot] = now
+            self.hits += 1
+            self.saved_time += float(namespace.latencies[slot])
+            metrics.record_cache("semantic", "hit")
+            return namespace.responses[slot], vector, score
+
+    def store(self, model_id, params, vector, response, latency=0.0):
+        """
+        Remember a completion under the embedding returned by lookup().
+
+        :param latency: Seconds the model took to produce the response, used for the savings report.
+        """
+        if vector is None:
+            return
+        key = self.namespace_key(model_id, params)
+        with self._lock:
+            namespace = self._namespaces.get(key)
+            if namespace is None:
+                namespace = self._namespaces[key] = _Namespace(self.max_entries)
+            if namespace.store(vector, response, latency, time.time()):
+                self.evictions += 1
+
+    def cached_call(self, model_id, params, prompt, call):
+        """Return a stored completion for a similar prompt, or run call() and store its result."""
+        response, vector, _ = self.lookup(model_id, params, prompt)
+        if response is not None:
+            return response
+        start = time.perf_counter()
+        response = call()
+        self.store(model_id, params, vector, response, time.perf_counter() - start)
+        return response
+
+    async def acached_call(self, model_id, params, prompt, call):
+        """
+        Async counterpart of cached_call; call is a zero-argument coroutine function. The
+        embedding request of the lookup runs in a thread, off the event loop.
+        """
+        response, vector, _ = await asyncio.to_thread(self.lookup, model_id, params, prompt)
+        if response is not None:
+            return response
+        start = time.perf_counter()
+        response = await call()
+        self.store(model_id, params, vector, response, time.perf_counter() - start)
+        return response
+
+    def report(self):
+        """
+        Summarise the cache's effect.
+
+        :return: A dict with hits, misses, errors, hit_rate, evictions, the number of entries per model,
+            the total model latency avoided by hits (saved_seconds), the time spent embedding and
+            searching (lookup_seconds) and their difference (net_saved_seconds).
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            entries = {}
+            for key, namespace in self._namespaces.items():
+                model_id = key.split("\x00", 1)[0]
+                entries[model_id] = entries.get(model_id, 0) + namespace.size
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": entries,
+                "saved_seconds": self.saved_time,
+                "lookup_seconds": self.lookup_time,
+                "net_saved_seconds": self.saved_time - self.lookup_time,
+            }
+
+    def clear(self):
+        """Remove every entry and reset the counters."""
+        with self._lock:
+            self._namespaces.clear()
+            self.hits = self.misses = self.errors = self.evictions = 0
+            self.lookup_time = self.saved_time = 0.0
@@ -0,0 +1,159 @@
+"""
+warm_worker.py
+
+Long-lived worker process started by interpreter_pool.py inside one of the framework
+virtual environments. It imports the heavy framework modules once at start-up and then
+runs example scripts on request, so each run skips the cold-start import cost.
+
+Protocol: one JSON object per line. The pool writes jobs to the worker's stdin:
+
+    {"path": "/abs/path/to/example.py"}
+
+and the worker answers on its original stdout with:
+
+    {"returncode": 0, "stdout": "...", "stderr": "...", "exec_time": 1.23, "rss": 123456789, "metrics": {...}}
+
+"metrics" holds what the script recorded with watsonx_agent_client.metrics, if it used it,
+so the pool can add it to the registry of the web app. A "recycle" key with a reason asks
+the pool to replace the worker, because the job left threads running that cannot be undone.
+
+The first line the worker writes is {"ready": true, ...} once the preloads are done.
+After every job, modules the script imported are dropped from sys.modules and the
+environment, working directory and root logger are restored, so the next script starts
+from the state right after the preloads, as it would in a fresh interpreter.
+This file only uses the standard library because it runs in every framework venv.
+"""
+
+import contextlib
+import importlib
+import io
+import json
+import logging
+import os
+import resource
+import runpy
+import sys
+import threading
+import time
+import traceback
+
+def current_rss():
+    """Return the resident set size of this process in bytes."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is the peak (in KiB on Linux, bytes on macOS), which is the best we can do here.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+def preload(modules):
+    """Import the given modules, ignoring the ones that are not installed in this venv."""
+    loaded = []
+    for name in modules:
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except Exception:
+            pass
+    return loaded
+
+def reset_state(modules, environ, cwd, root_handlers, root_level):
+    """
+    Undo what a job changed in the interpreter: forget the modules it imported (the
+    preloaded ones stay) and restore the environment, the working directory and the root
+    logger. A logging.basicConfig in a job would otherwise leave a handler writing to that
+    job's captured stderr behind.
+
+    :param modules: Names in sys.modules after the preloads.
+    :param root_handlers: Handlers of the root logger after the preloads.
+    :param root_level: Level of the root logger after the preloads.
+    """
+    for name in [name for name in sys.modules if name not in modules]:
+        del sys.modules[name]
+    if os.environ != environ:
+        os.environ.clear()
+        os.environ.update(environ)
+    if os.getcwd() != cwd:
+        os.chdir(cwd)
+    root = logging.getLogger()
+    for handler in root.handlers:
+        if handler not in root_handlers:
+            handler.close()
+    root.handlers[:] = root_handlers
+    root.setLevel(root_level)
+
+def run_job(path):
+    """Run one script as __main__ and capture what it prints."""
+    stdout, stderr = io.StringIO(), io.StringIO()
+    returncode = 0
+    script_dir = os.path.dirname(path)
+    saved_argv, saved_path = sys.argv, list(sys.path)
+    # Mimic "python path": the script's directory comes first on sys.path.
+    sys.argv = [path]
+    sys.path.insert(0, script_dir)
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                runpy.run_path(path, run_name="__main__")
+            except SystemExit as e:
+                if isinstance(e.code, int):
+                    returncode = e.code
+                elif e.code is not None:
+                    print(e.code, file=sys.stderr)
+                    returncode = 1
+            except BaseException:
+                traceback.print_exc()
+                returncode = 1
+    finally:
+        sys.argv, sys.path[:] = saved_argv, saved_path
+    result = {
+        "returncode": returncode,
+        "stdout": stdout.getvalue(),
+        "stderr": stderr.getvalue(),
+        "exec_time": time.perf_counter() - start,
+        "rss": current_rss(),
+    }
+    metrics = sys.modules.get("watsonx_agent_client.metrics")
+    if metrics is not None and hasattr(metrics, "snapshot"):
+        try:
+            result["metrics"] = metrics.snapshot(reset=True)
+        except Exception:
+            pass
+    return result
+
+def main():
+    # Keep the original stdout for the protocol and send stray fd-level writes to stderr.
+    protocol = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    os.dup2(2, 1)
+
+    start = time.perf_counter()
+    loaded = preload(sys.argv[1:])
+    protocol.write(json.dumps({
+        "ready": True,
+        "pid": os.getpid(),
+        "preloaded": loaded,
+        "import_time": time.perf_counter() - start,
+        "rss": current_rss(),
+    }) + "\n")
+    protocol.flush()
+
+    modules, environ, cwd = set(sys.modules), dict(os.environ), os.getcwd()
+    root = logging.getLogger()
+    root_handlers, root_level = list(root.handlers), root.level
+    threads = threading.active_count()
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        job = json.loads(line)
+        result = run_job(job["path"])
+        reset_state(modules, environ, cwd, root_handlers, root_level)
+        leaked = threading.active_count() - threads
+        if leaked > 0:
+            result["recycle"] = f"{leaked} thread(s) started by the job are still running"
+        protocol.write(json.dumps(result) + "\n")
+        protocol.flush()
+
+if __name__ == "__main__":
+    main()